@@ -0,0 +1,144 @@
+import pandas as pd
+
+from ingestion import to_records
+
+# Latency percentiles reported per endpoint
+PERCENTILES = (0.50, 0.95, 0.99)
+
+# --- API Logs ---
+def _status_class(status_code):
+    return (status_code // 100).astype("string") + "xx"
+
+def summarize_api_logs(df, window="5min", burst_threshold=10, max_bursts=20):
+    """
+    Summarizes API logs per endpoint with vectorized groupbys.
+
+    Args:
+        df (pd.DataFrame): Typed API logs (see ingestion.load_source).
+        window (str): Time window used to detect 4xx/5xx bursts.
+        burst_threshold (int): Minimum errors of one class in one window to count as a burst.
+        max_bursts (int): Maximum number of bursts reported (largest first).
+
+    Returns:
+        dict: Total requests, per-endpoint latency percentiles and status-class rates, bursts.
+    """
+    if df.empty:
+        return {"total_requests": 0, "endpoints": [], "status_classes": {}, "bursts": []}
+
+    status_class = _status_class(df["status_code"])
+    latency = df["response_time"].astype("float64")
+    keys = [df["endpoint"], df["method"]]
+
+    grouped = latency.groupby(keys, observed=True)
+    stats = grouped.quantile(list(PERCENTILES)).unstack()
+    stats.columns = [f"p{int(q * 100)}_ms" for q in stats.columns]
+    stats["requests"] = grouped.size()
+    stats["max_ms"] = grouped.max()
+
+    rates = pd.crosstab(keys, status_class, normalize="index").round(4)
+    rates.index.names = stats.index.names
+    rates.columns = [f"rate_{c}" for c in rates.columns]
+    endpoints = stats.join(rates).fillna(0).reset_index()
+
+    # Bursts: error counts per (window, endpoint, class) above the threshold
+    errors = df[df["status_code"] >= 400]
+    bursts = []
+    if not errors.empty:
+        counts = (
+            errors.groupby(
+                [errors["timestamp"].dt.floor(window), errors["endpoint"], _status_class(errors["status_code"])],
+                observed=True,
+            )
+            .size()
+            .rename("errors")
+        )
+        counts = counts[counts >= burst_threshold].nlargest(max_bursts)
+        counts.index.names = ["window_start", "endpoint", "status_class"]
+        bursts = to_records(counts.reset_index())
+
+    global_rates = status_class.value_counts(normalize=True).round(4)
+
+    return {
+        "total_requests": int(len(df)),
+        "endpoints": to_records(endpoints),
+        "status_classes": {str(k): float(v) for k, v in global_rates.items()},
+        "bursts": bursts,
+    }
+
+def api_exemplars(df, max_rows=50):
+    """
+    Picks a bounded set of representative API log rows: errors first, then the slowest requests.
+    """
+    if df.empty or max_rows <= 0:
+        return []
+    errors = df[df["status_code"] >= 400].nlargest(max_rows, "response_time")
+    slowest = df.nlargest(max_rows, "response_time")
+    picked = pd.concat([errors, slowest])
+    picked = picked[~picked.index.duplicated()].head(max_rows)
+    return to_records(picked)
+
+# --- Infrastructure ---
+def summarize_infrastructure(df):
+    """
+    Builds the exposed-port set of each host.
+
+    Returns:
+        dict: One entry per hostname with its sorted list of open ports.
+    """
+    if df.empty:
+        return {"hosts": []}
+
+    exploded = df[["hostname", "open_ports"]].explode("open_ports").dropna()
+    ports = exploded.groupby("hostname")["open_ports"].agg(lambda p: sorted(set(p)))
+    hosts = df.drop(columns=["open_ports"]).drop_duplicates("hostname").set_index("hostname")
+    hosts["open_ports"] = ports.reindex(hosts.index).apply(lambda p: p if isinstance(p, list) else [])
+    hosts["port_count"] = hosts["open_ports"].str.len()
+    return {"hosts": to_records(hosts.reset_index())}
+
+# --- MLOps ---
+def summarize_mlops(df, now=None):
+    """
+    Reports accuracy and staleness (days since last_trained) per model version.
+
+    Args:
+        df (pd.DataFrame): Typed MLOps inventory.
+        now (pd.Timestamp, optional): Reference time. Defaults to now.
+
+    Returns:
+        dict: One entry per (model_name, version).
+    """
+    if df.empty:
+        return {"models": []}
+
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    models = (
+        df.groupby(["model_name", "version"], observed=True)
+        .agg(accuracy=("accuracy", "mean"), last_trained=("last_trained", "max"))
+        .reset_index()
+    )
+    models["age_days"] = (now - models["last_trained"]).dt.days
+    return {"models": to_records(models)}
+
+# --- Payload ---
+def build_summary_payload(frames, max_exemplars=50, window="5min", burst_threshold=10, now=None):
+    """
+    Builds a compact payload whose size grows with distinct endpoints, hosts
+    and models rather than with the number of log rows.
+
+    Args:
+        frames (dict): Typed DataFrames keyed by 'infrastructure', 'mlops', 'api_logs'.
+        max_exemplars (int): Maximum raw API rows attached as exemplars.
+        window (str): Burst detection window.
+        burst_threshold (int): Minimum errors per window to report a burst.
+        now (pd.Timestamp, optional): Reference time for model staleness.
+
+    Returns:
+        dict: The summary payload.
+    """
+    return {
+        "mode": "summary",
+        "infrastructure": summarize_infrastructure(frames["infrastructure"]),
+        "mlops": summarize_mlops(frames["mlops"], now=now),
+        "api_logs": summarize_api_logs(frames["api_logs"], window=window, burst_threshold=burst_threshold),
+        "exemplars": {"api_logs": api_exemplars(frames["api_logs"], max_exemplars)},
+    }
@@ -1,169 +1,439 @@
 import streamlit as st
-import pandas as pd
+import itertools
+import json
+import os
+import sqlite3
 import time
-import datetime
-from n8n_connector import send_to_n8n
-from visualizations import create_risk_matrix
-from fpdf import FPDF
-
-# --- Helper Function for Risk Level ---
-def get_risk_level(score):
-    if score > 10:
-        return "CRITIQUE", "🔴", (220, 53, 69) # Red
-    elif score >= 6:
-        return "MAJEUR", "🟠", (255, 193, 7) # Orange/Dark Yellow
+import uuid
+import telemetry
+from artifacts import ArtifactStore, file_digest, findings_digest
+from cache import ResponseCache
+from frap import export_finding, get_risk_level, to_markdown
+from history import HistoryStore
+from jobs import JobQueue
+from telemetry import span
+# pandas (ingestion, delta, pipeline, sampling, tail), plotly (visualizations),
+# fpdf (report, only when the PDF is requested) and requests/dotenv
+# (n8n_connector, replicas) are imported where first used, so the empty-state
+# page of a new session does not load them (see benchmarks/bench_startup.py)
+
+# Minimum interval between two redraws of the metrics and matrix while findings stream in
+MATRIX_REFRESH_SECONDS = 0.5
+# Interval between two status checks of a background audit
+JOB_POLL_SECONDS = 1.0
+
+# --- Response Cache ---
+@st.cache_resource
+def get_response_cache():
+    # Shared by all sessions so identical audits are answered from the cache
+    return ResponseCache()
+
+def render_cache_stats(slot, cache):
+    stats = cache.stats
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    with slot.container():
+        st.caption(
+            f"Cache IA : {hits} succès ({stats['memory_hits']} mémoire, {stats['disk_hits']} disque) "
+            f"| {stats['misses']} échecs | {stats['evictions']} évictions"
+        )
+
+# --- Audit History ---
+@st.cache_resource
+def get_history():
+    return HistoryStore()
+
+def render_sampling_note(report):
+    """
+    States the share of API log rows sent to the agent.
+    """
+    if report["rows_out"] == report["rows_in"]:
+        st.caption(f"📉 Logs API : {report['rows_in']:,} lignes, dans le budget ({report['budget_rows']:,}) : aucun échantillonnage.")
+        return
+    st.caption(
+        f"📉 Logs API échantillonnés : {report['rows_out']:,} / {report['rows_in']:,} lignes "
+        f"(ratio {report['ratio']:.1%}, {report['strata']} strates). "
+        f"Les {report['kept']:,} erreurs et latences anormales sont toutes conservées ; "
+        f"les autres lignes portent un poids 'sample_weight'."
+    )
+    if report["over_budget"]:
+        st.warning("Les erreurs et latences anormales dépassent à elles seules le budget d'échantillonnage.")
+
+def record_audit(history, findings, uploads, delta_fingerprints=None, delta_path=None):
+    """
+    Saves the delta state (to delta_path) and the history entry of a successful audit.
+
+    Returns:
+        list: Warnings to show with the results.
+    """
+    if delta_fingerprints is not None:
+        from delta import merge_findings, save_state as save_delta_state
+
+        save_delta_state(delta_fingerprints, merge_findings(findings, []), delta_path)
+    if not findings:
+        return []
+    try:
+        history.record_run(findings, uploads="|".join(uploads))
+    except sqlite3.Error as e:
+        return [f"Historique non enregistré : {e}"]
+    return []
+
+# --- Background Audits ---
+@st.cache_resource
+def get_job_queue():
+    # Shared by all sessions: bounds the audits running at once on the server
+    return JobQueue()
+
+def audit_results(payload, webhook_url, parallel, cache, hedge=False):
+    """
+    Returns the lazy (pillar key, findings or error) results of an audit.
+    """
+    from n8n_connector import iter_findings, iter_pillar_findings
+
+    if parallel:
+        return iter_pillar_findings(payload, webhook_url, stream=True, cache=cache, hedge=hedge)
+    # Findings are parsed from the response as the agent writes them
+    return (
+        (None, item if isinstance(item, dict) and "error" in item else [item])
+        for item in iter_findings(payload, webhook_url, cache=cache, hedge=hedge)
+    )
+
+def collect_findings(items):
+    """
+    Returns (findings, failed) for the results of a finished audit.
+    """
+    findings = []
+    failed = False
+    for _, result in items:
+        if isinstance(result, list):
+            findings.extend(result)
+        else:
+            failed = True
+    return findings, failed
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job(job_id):
+    """
+    Shows the progress of a background audit until it finishes.
+    """
+    apply_timing_mode()
+    job = get_job_queue().get(job_id)
+    if job is None or job["status"] in ("done", "failed"):
+        # Full rerun: the results are then rendered by render_job
+        st.rerun()
+    if job["status"] == "queued":
+        st.info(f"⏳ Audit en file d'attente (position {job['position']}).")
+        return
+    findings, _ = collect_findings(job["items"])
+    st.info(f"📡 Analyse en cours : {len(findings)} constat(s) reçu(s) en {time.time() - job['started']:.0f} s.")
+    render_results(job["items"], final=False)
+
+def render_job(job_id):
+    """
+    Renders a background audit: its progress while it runs, then its results.
+    """
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.warning("Audit introuvable : il a peut-être expiré. Relancez l'audit.")
+        return
+    if job["status"] in ("queued", "running"):
+        poll_job(job_id)
+        return
+    if job["status"] == "failed":
+        st.error(f"L'audit a échoué : {job['error']}")
+
+    if job["meta"].get("sampling"):
+        render_sampling_note(job["meta"]["sampling"])
+    findings, _, shown = render_results(job["items"])
+    for note in job["notes"]:
+        st.warning(note)
+    if shown:
+        render_report_section(findings)
+
+# --- Tail Mode ---
+# Latest findings listed in the tail dashboard
+TAIL_DETAILS = 50
+
+@st.cache_resource
+def get_tail_auditor(paths, from_end):
+    # One auditor per set of files, shared by the sessions watching them
+    from tail import TailAuditor
+
+    return TailAuditor(dict(paths), from_end=from_end)
+
+def render_tail_metrics(totals):
+    """
+    Renders the metrics row from the running totals of the micro-batches.
+    """
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total des Risques", totals["findings"])
+    with col2:
+        st.metric("Score de Risque Max", totals["max_score"])
+    with col3:
+        st.metric("Problèmes Critiques", totals["critical"])
+    with col4:
+        st.metric("Lignes analysées", totals["rows"])
+
+def tail_cycle(auditor, webhook_url, hedge):
+    """
+    Audits the lines appended since the last cycle and redraws the dashboard.
+    """
+    apply_timing_mode()
+    report = auditor.cycle(webhook_url, hedge=hedge)
+    if report["error"]:
+        st.error(report["error"])
+    totals = auditor.totals
+    st.caption(
+        f"Dernier cycle : {report['rows']} nouvelle(s) ligne(s), {len(report['findings'])} constat(s) "
+        f"en {report['seconds']:.2f} s | {totals['cycles']} micro-lot(s) envoyé(s)"
+    )
+    metrics_slot, matrix_slot, details = create_results_layout()
+    with metrics_slot.container():
+        render_tail_metrics(totals)
+    # Each cycle has new findings: the figure is not memoized (see refresh_summary)
+    from visualizations import create_risk_matrix
+
+    matrix_slot.plotly_chart(create_risk_matrix(auditor.findings), use_container_width=True)
+    with details:
+        for risk in reversed(auditor.findings[-TAIL_DETAILS:]):
+            render_risk_expander(risk)
+
+def render_tail(auditor, webhook_url, interval, hedge=False):
+    """
+    Runs tail_cycle every interval seconds (only this part of the page reruns).
+    """
+    st.fragment(run_every=interval)(tail_cycle)(auditor, webhook_url, hedge)
+
+# --- Timing Instrumentation ---
+@st.cache_resource
+def get_span_recorder():
+    # Shared by the sessions for the process-wide totals; spans carry their session
+    return telemetry.SpanRecorder()
+
+def session_tag():
+    if "session_tag" not in st.session_state:
+        st.session_state["session_tag"] = uuid.uuid4().hex
+    return st.session_state["session_tag"]
+
+def apply_timing_mode():
+    """
+    Turns span recording on or off for this session's script thread (the
+    recorder is per thread, see telemetry.enable). Fragment reruns get a
+    new thread, so the fragments call it again.
+    """
+    # Disabled spans are shared no-op objects (see telemetry.span)
+    if st.session_state.get("timing_mode"):
+        telemetry.enable(telemetry.TaggedRecorder(get_span_recorder(), session=session_tag()))
     else:
-        return "MINEUR", "🟢", (40, 167, 69) # Green
-
-# --- PDF Generation Logic ---
-def clean_text(text):
-    """
-    Replaces incompatible characters for Latin-1 encoding.
-    """
-    replacements = {
-        '\u2013': '-',  # En dash
-        '\u2014': '-',  # Em dash
-        '\u2018': "'",  # Left single quote
-        '\u2019': "'",  # Right single quote
-        '\u201c': '"',  # Left double quote
-        '\u201d': '"',  # Right double quote
-        '\u2022': '*',  # Bullet
-        '\u2026': '...', # Ellipsis
-        '€': 'EUR',
-    }
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
-    return text.encode('latin-1', 'replace').decode('latin-1')
+        telemetry.disable()
 
-class AuditReport(FPDF):
-    def header(self):
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'AuditS2I - Rapport d\'Inspection Automatisé | {datetime.date.today()}', 0, 1, 'R')
-        self.ln(5)
+def render_timing_panel(slot, recorder, since, session):
+    """
+    Renders the spans of this session's last audit and exports the totals of
+    all sessions for the dashboards.
+    """
+    import pandas as pd
+
+    recorder.write_prometheus(os.path.join(telemetry.DEFAULT_METRICS_DIR, "audits2i.prom"))
+    recorder.write_jsonl(os.path.join(telemetry.DEFAULT_METRICS_DIR, "spans.jsonl"))
 
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+    spans = recorder.spans(since=since, session=session)
+    with slot.container():
+        with st.expander("⏱ Mesures de performance", expanded=False):
+            if not spans:
+                st.caption("Aucune mesure pour le dernier audit.")
+                return
+            table = pd.DataFrame(spans).reindex(
+                columns=["stage", "seconds", "bytes_in", "bytes_out", "rows", "rss_delta_mb"]
+            ).rename(columns={"rss_delta_mb": "Δ RSS processus (Mo)"})
+            st.dataframe(table, hide_index=True)
+            st.download_button(
+                "Exporter (Prometheus)", recorder.to_prometheus(),
+                file_name="audits2i.prom", mime="text/plain", on_click="ignore",
+            )
+            st.download_button(
+                "Exporter (JSON lines)", "\n".join(json.dumps(span, default=str) for span in spans) + "\n",
+                file_name="audits2i_spans.jsonl", mime="application/x-ndjson", on_click="ignore",
+            )
 
-def generate_pdf(audit_results):
+# --- Results Rendering ---
+def render_metrics(findings):
     """
-    Generates a Professional PDF report from the audit results.
+    Renders the aggregate metrics row for the findings received so far.
     """
-    pdf = AuditReport()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    
-    # --- Title Page ---
-    pdf.add_page()
-    pdf.set_font('Arial', 'B', 24)
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(0, 60, '', 0, 1) # Spacer
-    pdf.cell(0, 10, 'RAPPORT DE MISSION D\'AUDIT', 0, 1, 'C')
-    pdf.ln(10)
-    
-    pdf.set_font('Arial', 'B', 16)
-    pdf.set_text_color(80, 80, 80)
-    pdf.cell(0, 10, 'Module 1 : Fondations Technologiques', 0, 1, 'C')
-    pdf.ln(20)
-    
-    pdf.set_font('Arial', 'I', 12)
-    pdf.set_text_color(128, 128, 128)
-    pdf.cell(0, 10, 'Confidentiel', 0, 1, 'C')
-    
-    # --- Risk Pages ---
-    for risk in audit_results:
-        pdf.add_page()
-        
-        score = risk.get("risk_score", 0)
-        text = risk.get("frap_text", "")
-        pillar = risk.get("pillar", "Général")
-        
-        level_name, _, color_rgb = get_risk_level(score)
-        
-        # Banner Header
-        pdf.set_fill_color(*color_rgb)
-        pdf.set_text_color(255, 255, 255)
-        pdf.set_font('Arial', 'B', 16)
-        # Add some padding visually by using a cell with fill
-        header_text = f"  {pillar.upper()} - {level_name}"
-        pdf.cell(0, 15, clean_text(header_text), 0, 1, 'L', 1)
-        pdf.ln(10)
-        
-        # Risk Score Badge
-        pdf.set_fill_color(245, 245, 245) # Light Gray
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_draw_color(200, 200, 200)
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(50, 10, f" Score de Risque : {score} ", 1, 1, 'C', 1)
-        pdf.ln(10)
-        
-        # Body Content
-        pdf.set_text_color(0, 0, 0)
-        
-        # Robust Text Rendering (Markdown Stripping & Formatting)
-        clean_body = clean_text(text)
-        lines = clean_body.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                pdf.ln(5) # Spacing for empty lines
-                continue
-                
-            is_header = False
-            
-            # 1. Detect & Clean Markdown Headers (### Title)
-            if line.startswith('#'):
-                is_header = True
-                # Remove all leading # and spaces
-                line = line.lstrip('#').strip()
-            
-            # 2. Detect & Clean Bold Wrappers (**Title**)
-            elif line.startswith('**') and line.endswith('**'):
-                is_header = True
-                line = line[2:-2].strip() # Remove first and last 2 chars
-            
-            # 3. Detect Numbered Headers (1. Title)
-            elif len(line) > 2 and line[0].isdigit() and line[1] == '.':
-                is_header = True
-            
-            # 4. Detect Uppercase Labels (CONTEXTE :)
-            elif ':' in line and len(line.split(':')[0]) < 40 and line.split(':')[0].isupper():
-                is_header = True
-
-            # Clean up any remaining inline markdown bold markers
-            line = line.replace('**', '') 
-            
-            if is_header:
-                # Special styling for "NORME VIOLÉE"
-                if "NORME" in line and "VIOLÉE" in line:
-                    pdf.set_font('Arial', 'BI', 10)
-                    pdf.set_text_color(100, 100, 100) # Gray
-                else:
-                    pdf.set_font('Arial', 'B', 11)
-                    pdf.set_text_color(0, 0, 0) # Black
-                
-                # Add a small top margin for headers if not at top of page
-                if pdf.get_y() > 40: 
-                    pdf.ln(2)
-                pdf.multi_cell(0, 6, line)
-                
-                # Reset color to black for subsequent text if it was gray
-                pdf.set_text_color(0, 0, 0) 
-            else:
-                pdf.set_font('Arial', '', 11)
-                pdf.set_text_color(0, 0, 0)
-                pdf.multi_cell(0, 6, line)
-        
-        # Footer Note for the risk
-        pdf.ln(10)
-        pdf.set_font('Arial', 'I', 9)
-        pdf.set_text_color(100, 100, 100)
-        pdf.cell(0, 10, "Généré par l'Agent IA AuditS2I", 0, 1, 'L')
-
-    return pdf.output(dest='S').encode('latin-1')
+    total_risks = len(findings)
+    max_risk_score = max([r.get("risk_score", 0) for r in findings]) if findings else 0
+    # Count Critical based on score > 10
+    critical_count = len([r for r in findings if r.get("risk_score", 0) > 10])
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total des Risques", total_risks)
+    with col2:
+        st.metric("Score de Risque Max", max_risk_score)
+    with col3:
+        st.metric("Problèmes Critiques", critical_count)
+
+def render_risk_expander(risk):
+    """
+    Renders one finding as an expander in the "Résultats Détaillés" list.
+    """
+    score = risk.get("risk_score", 0)
+    pillar = risk.get("pillar", "Général")
+
+    # Get Dynamic Level and Color
+    level_name, icon, _ = get_risk_level(score)
+
+    # Expander Title: "🟠 Infrastructure (Majeur - Score: 9)"
+    expander_title = f"{icon} {pillar} ({level_name.title()} - Score: {score})"
+
+    with st.expander(expander_title):
+        st.markdown(f"**Statut :** {level_name}")
+        st.markdown(to_markdown(risk))
+
+def create_results_layout():
+    """
+    Creates the results area and returns the slots updated as findings arrive.
+    """
+    st.markdown("---")
+    st.subheader("📊 Résultats de l'Audit")
+
+    # Metrics Row
+    metrics_slot = st.empty()
+
+    # Risk Matrix & Detailed Risks
+    col_left, col_right = st.columns([1, 1])
+    with col_left:
+        st.markdown("### 🕸 Matrice des Risques")
+        matrix_slot = st.empty()
+    with col_right:
+        st.markdown("### 📝 Résultats Détaillés")
+        details = st.container(height=400, border=True)
+
+    return metrics_slot, matrix_slot, details
+
+def refresh_summary(metrics_slot, matrix_slot, findings, final=True):
+    """
+    Redraws the metrics and the risk matrix for the findings received so far.
+
+    Intermediate figures (final=False) are not memoized: they would evict the
+    parsed uploads from the shared artifact store.
+    """
+    from visualizations import create_risk_matrix
+
+    with metrics_slot.container():
+        render_metrics(findings)
+    # Visualization now handles the new schema (pillar, frequency, gravity)
+    fig = get_risk_matrix(findings) if final else create_risk_matrix(findings)
+    matrix_slot.plotly_chart(fig, use_container_width=True, key=f"risk_matrix_{len(findings)}")
+
+def render_results(results, refresh_seconds=None, final=True):
+    """
+    Renders (pillar key, findings or error) results as they are consumed.
+
+    Args:
+        results (iterable): e.g. audit_results(), or the items of a finished job.
+        refresh_seconds (float, optional): Redraw the metrics and the matrix
+            at most this often while consuming; None draws them once at the end.
+        final (bool): False for the partial results of a running job (the
+            last figure is not memoized either).
+
+    Returns:
+        tuple: (findings, failed, shown) where shown tells whether the results
+        layout was kept (it is removed when the audit failed without findings).
+    """
+    from n8n_connector import PILLARS
+
+    response = []
+    failed = False
+    last_refresh, drawn = 0.0, None
+    # Errors are shown above the results; the layout exists from the start so
+    # that an audit without findings still shows its (empty) metrics
+    notices = st.container()
+    layout = st.empty()
+    with layout.container():
+        metrics_slot, matrix_slot, details = create_results_layout()
+    for pillar_key, result in results:
+        prefix = f"{PILLARS[pillar_key]} : " if pillar_key else ""
+        if isinstance(result, dict) and "error" in result:
+            notices.error(prefix + result["message"])
+            failed = True
+            continue
+        if not isinstance(result, list):
+            notices.error(prefix + "⚠ Format de réponse inattendu de l'Agent IA.")
+            failed = True
+            continue
+
+        response.extend(result)
+        with details:
+            for risk in result:
+                render_risk_expander(risk)
+        # Expanders appear per finding; metrics and matrix are throttled
+        if (refresh_seconds is not None and drawn != len(response)
+                and time.monotonic() - last_refresh >= refresh_seconds):
+            refresh_summary(metrics_slot, matrix_slot, response, final=False)
+            last_refresh = time.monotonic()
+            drawn = len(response)
+
+    if failed and not response:
+        layout.empty()
+        return response, failed, False
+    # The last throttled redraw may already show every finding (same chart key)
+    if drawn != len(response):
+        refresh_summary(metrics_slot, matrix_slot, response, final=final)
+    return response, failed, True
+
+# --- Artifact Memoization ---
+def get_artifacts():
+    # Per-session store of parsed frames, risk matrix figures and PDF bytes
+    if "artifacts" not in st.session_state:
+        st.session_state["artifacts"] = ArtifactStore()
+    return st.session_state["artifacts"]
+
+def upload_digest(file):
+    # Streamlit gives each new upload a new file_id, so its content is hashed once
+    file_id = getattr(file, "file_id", None)
+    if file_id is None:
+        return file_digest(file)
+    return get_artifacts().get_or_create(("digest", file_id), lambda: file_digest(file))
+
+def get_risk_matrix(findings):
+    from visualizations import create_risk_matrix
+
+    return get_artifacts().get_or_create(("figure", findings_digest(findings)), lambda: create_risk_matrix(findings))
+
+def timed_pdf(findings):
+    from report import generate_pdf
+
+    with span("pdf.render", rows=len(findings)) as timing:
+        pdf = generate_pdf(findings)
+        timing.set(bytes_out=len(pdf))
+    return pdf
+
+def render_report_section(findings):
+    """
+    Renders the PDF download. The report is only generated when the button is
+    clicked (deferred download) and is then reused for the same findings.
+    """
+    artifacts = get_artifacts()
+    key = ("pdf", findings_digest(findings))
+
+    st.markdown("---")
+    st.subheader("📄 Génération de Rapport")
+    st.download_button(
+        label="Télécharger le Rapport PDF Complet",
+        data=lambda: artifacts.get_or_create(key, lambda: timed_pdf(findings)),
+        file_name="Rapport_AuditS2I.pdf",
+        mime="application/pdf",
+        on_click="ignore",
+    )
+    st.download_button(
+        label="Exporter les Constats (JSON)",
+        data=lambda: json.dumps([export_finding(f) for f in findings], ensure_ascii=False, indent=2),
+        file_name="Constats_AuditS2I.json",
+        mime="application/json",
+        on_click="ignore",
+    )
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -247,115 +517,239 @@ with st.sidebar:
     
     st.markdown("---")
     st.header("⚙ Paramètres")
-    webhook_url = st.text_input("URL Webhook n8n", placeholder="https://your-n8n-instance/webhook/...", type="password")
+    webhook_url = st.text_input(
+        "URL Webhook n8n",
+        placeholder="https://your-n8n-instance/webhook/...",
+        type="password",
+        help="Plusieurs répliques n8n : séparez les URLs par des virgules. Les appels sont répartis sur la réplique la moins chargée et une réplique en échec est écartée temporairement.",
+    )
+    hedge_mode = False
+    # Several replicas (see replicas.parse_webhook_urls); requests is only loaded then
+    if len(webhook_url.replace(",", " ").split()) > 1:
+        from replicas import get_replica_pool, parse_webhook_urls
+
+        webhook_urls = parse_webhook_urls(webhook_url)
+        hedge_mode = st.checkbox(
+            "Requêtes couvertes (hedging)",
+            help="Si une réplique n'a pas répondu après le p95 des latences observées, renvoie la requête à une autre réplique et garde la première réponse.",
+        )
+        health = get_replica_pool(webhook_urls).health()
+        available = sum(r["state"] != "open" for r in health)
+        st.caption(f"Répliques n8n : {available}/{len(health)} disponibles")
+    use_cache = st.checkbox(
+        "Cache des résultats IA",
+        value=True,
+        help="Réutilise la réponse de l'agent lorsque les mêmes données sont envoyées au même workflow.",
+    )
+    cache_stats_slot = st.empty()
+    delta_mode = st.checkbox(
+        "Audit incrémental (delta)",
+        help="N'envoie que les lignes ajoutées, modifiées ou supprimées depuis le dernier audit et conserve les constats encore valides.",
+    )
+    parallel_mode = st.checkbox(
+        "Envoi parallèle par pilier",
+        help="Envoie chaque pilier séparément et en parallèle ; les résultats s'affichent dès qu'un pilier répond.",
+    )
+    rules_mode = st.checkbox(
+        "Pré-filtrage local (règles déterministes)",
+        help="Évalue localement les règles ISO 27001 / ITIL / COBIT et n'envoie que les lignes signalées, avec les règles déclenchées.",
+    )
+    summary_mode = st.checkbox(
+        "Envoyer un résumé agrégé",
+        help="Agrège localement les logs (latences p50/p95/p99, taux de codes, ports exposés, fraîcheur des modèles) au lieu d'envoyer toutes les lignes.",
+    )
+    # Sampling and the wire format apply to the full rows only
+    rows_mode = not (summary_mode or rules_mode)
+    sample_mode = st.checkbox(
+        "Échantillonnage stratifié (logs API)",
+        disabled=not rows_mode,
+        help="Au-delà du budget, n'envoie qu'un échantillon des logs API stratifié par endpoint, méthode, classe de statut et heure, pondéré pour le recalcul des volumes. Les erreurs et latences anormales sont toujours conservées.",
+    ) and rows_mode
+    if sample_mode:
+        from sampling import DEFAULT_MAX_BYTES, DEFAULT_MAX_ROWS
+
+        sample_budget = {
+            "max_rows": st.number_input("Budget (lignes)", min_value=1000, value=DEFAULT_MAX_ROWS, step=10_000),
+            "max_bytes": st.number_input("Budget (Mo)", min_value=1, value=DEFAULT_MAX_BYTES // (1024 * 1024)) * 1024 * 1024,
+        }
+    columns_mode = st.checkbox(
+        "Format colonnes",
+        disabled=not rows_mode,
+        help="Envoie les lignes colonne par colonne (\"wire_format\": \"columns\"), plus compact et plus rapide à sérialiser. Le workflow n8n doit lire ce format ; sinon les lignes sont envoyées une par une, au format d'origine.",
+    ) and rows_mode
+    if not rows_mode:
+        st.caption("Échantillonnage et format colonnes : sans effet avec le résumé agrégé ou le pré-filtrage, qui n'envoient pas toutes les lignes.")
+    
+    background_mode = st.checkbox(
+        "Exécution en arrière-plan",
+        help="Place l'audit dans la file partagée : la page suit son avancement et les résultats restent accessibles après un rechargement (lien de la page).",
+    )
+    if background_mode:
+        queue_stats = get_job_queue().stats()
+        st.caption(f"File d'audits : {queue_stats['queued']} en attente | {queue_stats['running']} en cours")
+
+    # tail.TAIL_ROOT, read here so that the sidebar does not import pandas
+    tail_root = os.getenv("AUDITS2I_TAIL_ROOT")
+    # Server files can only be followed under a configured directory
+    tail_mode = bool(tail_root) and st.checkbox(
+        "Suivi continu (tail)",
+        help="Suit des journaux CSV qui grossissent sur le serveur : seules les lignes ajoutées depuis le dernier cycle sont lues et envoyées à l'agent par micro-lots ; la position de lecture est conservée entre les redémarrages.",
+    )
+    if tail_mode:
+        from tail import DEFAULT_INTERVAL_SECONDS
+
+        tail_paths = (
+            ("api_logs", st.text_input("Journal API (chemin serveur)", placeholder=os.path.join(tail_root, "access.csv"),
+                                       help=f"Fichier situé sous {tail_root} (AUDITS2I_TAIL_ROOT).")),
+            ("infrastructure", st.text_input("Inventaire infrastructure (chemin serveur)")),
+            ("mlops", st.text_input("Inventaire MLOps (chemin serveur)")),
+        )
+        tail_interval = st.number_input("Intervalle (s)", min_value=1.0, value=DEFAULT_INTERVAL_SECONDS, step=5.0)
+        tail_from_end = st.checkbox(
+            "Ignorer le contenu existant",
+            help="Les fichiers suivis pour la première fois commencent à leur fin : seules les lignes écrites ensuite sont auditées.",
+        )
+
+    timing_mode = st.checkbox(
+        "Mesures de performance",
+        key="timing_mode",
+        help="Chronomètre chaque étape (lecture CSV, envoi n8n, matrice, PDF) et exporte les mesures (Prometheus, JSON lines).",
+    )
+    timing_slot = st.empty()
     
     st.markdown("---")
     st.caption("v1.5.0 | Propulsé par n8n & Streamlit")
 
+apply_timing_mode()
+
 # --- Main Stage ---
 st.title("Console d'Audit en Temps Réel")
 st.markdown("Bienvenue sur **AuditS2I**. Importez vos journaux d'audit pour générer un rapport FRAP en temps réel.")
 
+job_id = st.query_params.get("job")
+
+if tail_mode:
+    if any(path for _, path in tail_paths):
+        try:
+            auditor = get_tail_auditor(tuple((source, path) for source, path in tail_paths if path), tail_from_end)
+        except ValueError as e:
+            st.error(f"Chemin refusé : {e}")
+        else:
+            render_tail(auditor, webhook_url, tail_interval, hedge=hedge_mode)
+    else:
+        st.info("Indiquez le chemin d'au moins un journal à suivre dans la barre latérale.")
+
 # Check if files are uploaded
-if infra_file and mlops_file and api_file:
+elif infra_file and mlops_file and api_file:
     st.success("✅ Toutes les sources de données sont connectées.")
+    uploads = tuple(upload_digest(f) for f in (infra_file, mlops_file, api_file))
+    previous_audit = st.session_state.get("audit")
     
     if st.button("🚀 Lancer l'Audit Intelligent"):
+        from delta import carry_over_findings, compute_delta, has_changes, load_state as load_delta_state, state_path
+        from ingestion import load_sources
+        from pipeline import build_payload
+
+        delta_path = None
+        if timing_mode:
+            # The timing panel shows the spans recorded from here on
+            st.session_state["timing_since"] = get_span_recorder().last_sequence
         # 1. Prepare Data
         with st.spinner("Chiffrement et préparation des données..."):
-            # Read CSVs into DataFrames (mock processing)
+            # Read CSVs in bounded-size chunks into typed DataFrames
             try:
-                infra_df = pd.read_csv(infra_file)
-                mlops_df = pd.read_csv(mlops_file)
-                api_df = pd.read_csv(api_file)
-                
-                # Sanitize DataFrames (replace NaN with empty string for JSON compatibility)
-                infra_df = infra_df.fillna("")
-                mlops_df = mlops_df.fillna("")
-                api_df = api_df.fillna("")
-
-                # Convert to dict for JSON payload
-                payload = {
-                    "infrastructure": infra_df.to_dict(orient="records"),
-                    "mlops": mlops_df.to_dict(orient="records"),
-                    "api_logs": api_df.to_dict(orient="records")
-                }
-                time.sleep(1) # UX pause
+                with span("ingestion", bytes_in=sum(getattr(f, "size", 0) for f in (infra_file, mlops_file, api_file))) as timing:
+                    frames = get_artifacts().get_or_create(
+                        ("frames",) + uploads, lambda: load_sources(infra_file, mlops_file, api_file)
+                    )
+                    timing.set(rows=sum(len(df) for df in frames.values()))
+
+                if delta_mode:
+                    # Keep only rows added or changed since the previous audit of
+                    # the same files (by name) with the same workflow
+                    delta_path = state_path(
+                        tuple(f.name for f in (infra_file, mlops_file, api_file)),
+                        webhook_url or os.getenv("N8N_WEBHOOK_URL") or "",
+                    )
+                    delta_state = load_delta_state(delta_path)
+                    with span("delta"):
+                        delta = compute_delta(frames, delta_state["fingerprints"])
+                    frames = delta["frames"]
+
+                with span("payload", rows=sum(len(df) for df in frames.values())):
+                    payload = build_payload(
+                        frames, summary=summary_mode, rules=rules_mode, sample=sample_budget if sample_mode else None,
+                        wire_format="columns" if columns_mode else "records",
+                    )
+                sampling = payload.get("sampling")
+                if sampling:
+                    render_sampling_note(sampling)
+
+                if delta_mode:
+                    payload["delta"] = {"removed": delta["removed"], "counts": delta["counts"]}
             except Exception as e:
                 st.error(f"Erreur lors du traitement des fichiers : {e}")
                 st.stop()
 
-        # 2. Send to n8n
-        with st.spinner("📡 Transmission à l'Agent IA (n8n)..."):
-            response = send_to_n8n(payload, webhook_url)
-            time.sleep(1.5) # UX pause to show spinner
-
-        # 3. Process Response
-        if isinstance(response, dict) and "error" in response:
-            st.error(response["message"])
-        elif isinstance(response, list):
-            # --- Results Area ---
-            st.markdown("---")
-            st.subheader("📊 Résultats de l'Audit")
-            
-            # Calculate Aggregate Metrics
-            total_risks = len(response)
-            max_risk_score = max([r.get("risk_score", 0) for r in response]) if response else 0
-            # Count Critical based on score > 10
-            critical_count = len([r for r in response if r.get("risk_score", 0) > 10])
-            
-            # Metrics Row
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("Total des Risques", total_risks)
-            with col2:
-                st.metric("Score de Risque Max", max_risk_score)
-            with col3:
-                st.metric("Problèmes Critiques", critical_count)
-            
-            # Risk Matrix & Detailed Risks
-            col_left, col_right = st.columns([1, 1])
-            
-            with col_left:
-                st.markdown("### 🕸 Matrice des Risques")
-                # Visualization now handles the new schema (pillar, frequency, gravity)
-                fig = create_risk_matrix(response)
-                st.plotly_chart(fig, use_container_width=True)
-                
-            with col_right:
-                st.markdown("### 📝 Résultats Détaillés")
-                with st.container(height=400, border=True):
-                    for i, risk in enumerate(response):
-                        score = risk.get("risk_score", 0)
-                        text = risk.get("frap_text", "")
-                        pillar = risk.get("pillar", "Général")
-                        
-                        # Get Dynamic Level and Color
-                        level_name, icon, _ = get_risk_level(score)
-                        
-                        # Expander Title: "🟠 Infrastructure (Majeur - Score: 9)"
-                        expander_title = f"{icon} {pillar} ({level_name.title()} - Score: {score})"
-                        
-                        with st.expander(expander_title):
-                            st.markdown(f"**Statut :** {level_name}")
-                            st.markdown(text)
-            
-            # --- PDF Download ---
-            st.markdown("---")
-            st.subheader("📄 Génération de Rapport")
-            
-            pdf_bytes = generate_pdf(response)
-            st.download_button(
-                label="Télécharger le Rapport PDF Complet",
-                data=pdf_bytes,
-                file_name="Rapport_AuditS2I.pdf",
-                mime="application/pdf"
-            )
+        # 2. Send to n8n (one call, or one concurrent call per pillar)
+        cache = get_response_cache() if use_cache else None
+        if delta_mode and not has_changes(delta):
+            st.info("Aucun changement depuis le dernier audit : résultats précédents réutilisés.")
+            results = []
+        else:
+            results = audit_results(payload, webhook_url, parallel_mode, cache, hedge=hedge_mode)
 
+        if delta_mode:
+            # Still-valid findings of the previous run are shown first
+            carried = carry_over_findings(delta_state["findings"], delta["touched"], delta["touched_pillars"])
+            results = itertools.chain([(None, carried)], results)
+
+        history = get_history()
+        delta_fingerprints = delta["fingerprints"] if delta_mode else None
+
+        if background_mode:
+            # The worker consumes the same generators; the page only polls
+            def finish(items):
+                findings, failed = collect_findings(items)
+                return [] if failed else record_audit(history, findings, uploads, delta_fingerprints, delta_path)
+
+            job_id = get_job_queue().submit(
+                lambda: results, on_done=finish, meta={"uploads": list(uploads), "sampling": sampling},
+            )
+            st.query_params["job"] = job_id
         else:
-             st.error("⚠ Format de réponse inattendu de l'Agent IA.")
+            if job_id:
+                del st.query_params["job"]
+                job_id = None
+            # 3. Process Responses (rendered progressively as findings arrive)
+            with st.spinner("📡 Analyse par l'Agent IA (n8n)..."):
+                response, failed, shown = render_results(results, refresh_seconds=MATRIX_REFRESH_SECONDS)
 
-else:
+            if not failed:
+                for note in record_audit(history, response, uploads, delta_fingerprints, delta_path):
+                    st.warning(note)
+
+            if shown:
+                # Kept in session state so later reruns (e.g. the download) reuse the results
+                st.session_state["audit"] = {"uploads": uploads, "findings": response, "sampling": sampling}
+
+    elif previous_audit and previous_audit["uploads"] == uploads and not job_id:
+        # Rerun without a new audit: redraw the previous results from memoized artifacts
+        response = previous_audit["findings"]
+        if previous_audit.get("sampling"):
+            render_sampling_note(previous_audit["sampling"])
+        metrics_slot, matrix_slot, details = create_results_layout()
+        with metrics_slot.container():
+            render_metrics(response)
+        matrix_slot.plotly_chart(get_risk_matrix(response), use_container_width=True)
+        with details:
+            for risk in response:
+                render_risk_expander(risk)
+
+    if st.session_state.get("audit", {}).get("uploads") == uploads and not job_id:
+        render_report_section(st.session_state["audit"]["findings"])
+
+elif not job_id:
     st.info("👋 Veuillez importer les 3 fichiers CSV requis dans la barre latérale pour commencer.")
     
     # Placeholder for empty state
@@ -365,3 +759,14 @@ else:
     - **Logs MLOps** : Métadonnées d'entraînement, logs de pipeline.
     - **Logs API** : En-têtes Requête/Réponse, codes d'erreur.
     """)
+
+# Background audit of this page (kept in the URL, so it survives a reload)
+if job_id:
+    render_job(job_id)
+
+# Cache counters are rendered last so they include the current run
+if use_cache:
+    render_cache_stats(cache_stats_slot, get_response_cache())
+
+if timing_mode:
+    render_timing_panel(timing_slot, get_span_recorder(), st.session_state.get("timing_since", 0), session_tag())
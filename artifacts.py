@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from cache import payload_digest
+
+DEFAULT_MAX_ENTRIES = 16
+
+def file_digest(file, chunk_size=1024 * 1024):
+    """
+    Computes the SHA-256 of a path or file-like object, reading it in chunks.
+
+    The position of file-like objects is restored afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(file, str):
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    position = file.tell()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+    file.seek(position)
+    return digest.hexdigest()
+
+def findings_digest(findings):
+    """
+    Stable key of a findings list (used for the figure and PDF artifacts).
+    """
+    return payload_digest(findings, "findings")
+
+class ArtifactStore:
+    """
+    Bounded LRU of derived artifacts (parsed frames, figures, PDF bytes) keyed
+    by content digests, so Streamlit reruns reuse them instead of recomputing.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # Download callables run outside the script thread
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get_or_create(self, key, factory):
+        """
+        Returns the artifact stored under key, building it with factory() on a miss.
+
+        Args:
+            key (tuple): e.g. ('figure', findings digest).
+            factory (callable): Builds the artifact.
+
+        Returns:
+            The artifact.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._entries[key]
+            self.stats["misses"] += 1
+
+            value = factory()
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return value
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,276 @@
+"""
+Headless batch audit of many environments.
+
+Each environment is an infra/mlops/api CSV triple. For every environment the
+same functions as the Streamlit app are run (ingestion, payload building,
+send_to_n8n, PDF report) and <out>/<env>.pdf plus <out>/<env>.json are
+written. Environments run in a thread or process pool; webhook calls are
+bounded separately so a large pool does not flood n8n.
+
+Inputs:
+    - a directory whose subdirectories each hold infra.csv, mlops.csv and api.csv
+      (the directory itself is one environment when it holds the triple), or
+    - a CSV manifest with the columns name, infra, mlops, api (paths relative
+      to the manifest).
+
+Usage:
+    python batch_audit.py environments/ --out reports/ --workers 8 --max-inflight 4
+    python batch_audit.py manifest.csv --executor process --summary --rules
+    python batch_audit.py environments/ --sample-rows 50000
+    python batch_audit.py environments/ --wire-format columns
+"""
+import argparse
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from cache import ResponseCache
+from frap import parse_finding
+from history import DEFAULT_DB_PATH, HistoryStore
+from ingestion import WIRE_FORMATS, load_sources
+from n8n_connector import send_to_n8n
+from pipeline import build_payload
+from report import render_report
+
+SOURCE_FILES = ("infra.csv", "mlops.csv", "api.csv")
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_INFLIGHT = 4
+
+# Bounds concurrent webhook calls across the pool (set by _init_worker)
+_webhook_slots = None
+
+# --- Inputs ---
+def discover_environments(path):
+    """
+    Lists the environments to audit.
+
+    Args:
+        path (str): A directory of environments or a CSV manifest.
+
+    Returns:
+        list: (name, (infra path, mlops path, api path)) tuples, sorted by name.
+    """
+    if os.path.isfile(path):
+        base = os.path.dirname(os.path.abspath(path))
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        return [
+            (row["name"], tuple(os.path.join(base, row[col]) for col in ("infra", "mlops", "api")))
+            for row in rows
+        ]
+
+    def triple(directory):
+        files = tuple(os.path.join(directory, name) for name in SOURCE_FILES)
+        return files if all(os.path.isfile(f) for f in files) else None
+
+    if triple(path):
+        return [(os.path.basename(os.path.abspath(path)), triple(path))]
+    environments = []
+    for entry in sorted(os.scandir(path), key=lambda e: e.name):
+        if entry.is_dir() and triple(entry.path):
+            environments.append((entry.name, triple(entry.path)))
+    return environments
+
+# --- Per-Environment Audit ---
+def _init_worker(slots):
+    global _webhook_slots
+    _webhook_slots = slots
+
+def audit_environment(name, files, out_dir, webhook_url=None, summary=False, rules=False, cache_dir=None,
+                      history_db=DEFAULT_DB_PATH, sample=None, wire_format="records"):
+    """
+    Audits one environment and writes its report and findings.
+
+    Returns:
+        dict: 'name', 'status' ('ok' or 'error'), 'message', 'rows',
+        'findings' (count), 'timings' (seconds per stage) and output paths.
+    """
+    timings = {}
+    result = {"name": name, "status": "ok", "message": "", "rows": 0, "findings": 0, "timings": timings}
+    started = time.perf_counter()
+
+    def stage(label, fn):
+        start = time.perf_counter()
+        value = fn()
+        timings[label] = time.perf_counter() - start
+        return value
+
+    try:
+        frames = stage("ingestion", lambda: load_sources(*files))
+        result["rows"] = sum(len(df) for df in frames.values())
+        payload = stage("payload", lambda: build_payload(frames, summary=summary, rules=rules, sample=sample,
+                                                                 wire_format=wire_format))
+        if "sampling" in payload:
+            result["sample_ratio"] = payload["sampling"]["ratio"]
+        del frames
+
+        cache = ResponseCache(cache_dir) if cache_dir else None
+        def send():
+            if _webhook_slots is None:
+                return send_to_n8n(payload, webhook_url, cache=cache)
+            with _webhook_slots:
+                return send_to_n8n(payload, webhook_url, cache=cache)
+        findings = stage("send", send)
+    except Exception as e:
+        result.update(status="error", message=f"{type(e).__name__}: {e}")
+        timings["total"] = time.perf_counter() - started
+        return result
+
+    json_path = os.path.join(out_dir, f"{name}.json")
+    if isinstance(findings, dict) and "error" in findings:
+        result.update(status="error", message=findings["message"])
+        findings = []
+    elif not isinstance(findings, list):
+        result.update(status="error", message="⚠ Format de réponse inattendu de l'Agent IA.")
+        findings = []
+    else:
+        result["findings"] = len(findings)
+        if history_db:
+            try:
+                history = HistoryStore(history_db)
+                try:
+                    stage("history", lambda: history.record_run(findings, source="batch", environment=name))
+                finally:
+                    history.close()
+            except sqlite3.Error as e:
+                # The report is still produced; only the history entry is missing
+                result["message"] = f"Historique non enregistré : {e}"
+        pdf_path = os.path.join(out_dir, f"{name}.pdf")
+        try:
+            # Already inside a pool: the report is rendered in this worker
+            stage("pdf", lambda: render_report(findings, pdf_path, workers=0))
+            result["pdf"] = pdf_path
+        except Exception as e:
+            # The findings are still written below; the other environments go on
+            result.update(status="error", message=f"Rapport PDF non généré : {type(e).__name__}: {e}")
+
+    try:
+        document = {
+            "environment": name,
+            "generated": datetime.datetime.now().isoformat(timespec="seconds"),
+            "status": result["status"],
+            "message": result["message"],
+            "findings": [{**f, "sections": parse_finding(f)["sections"]} for f in findings],
+        }
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+        result["json"] = json_path
+    except Exception as e:
+        result.update(status="error", message=f"Constats non enregistrés : {type(e).__name__}: {e}")
+    timings["total"] = time.perf_counter() - started
+    return result
+
+# --- Batch ---
+def run_batch(environments, out_dir, workers=DEFAULT_WORKERS, executor="thread",
+              max_inflight=DEFAULT_MAX_INFLIGHT, on_result=None, **audit_kwargs):
+    """
+    Audits environments concurrently.
+
+    Args:
+        environments (list): (name, files) tuples (see discover_environments).
+        out_dir (str): Output directory.
+        workers (int): Environments audited at once.
+        executor (str): 'thread' or 'process' (spawned processes; ingestion and
+            PDF rendering then use every CPU).
+        max_inflight (int): Maximum concurrent webhook calls across all workers.
+        on_result (callable, optional): Called with each result as it completes.
+        **audit_kwargs: Forwarded to audit_environment (webhook_url, summary, rules,
+            cache_dir, history_db, sample, wire_format).
+
+    Returns:
+        dict: 'results' (in completion order), 'wall' (seconds), 'environments',
+        'failed', 'rows' and the throughput in environments per minute and rows per second.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    if executor == "process":
+        # spawn: fork is unsafe with the threads of the connection pool
+        context = multiprocessing.get_context("spawn")
+        slots = context.BoundedSemaphore(max_inflight)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(slots,))
+    else:
+        _init_worker(threading.BoundedSemaphore(max_inflight))
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    results = []
+    started = time.perf_counter()
+    with pool:
+        futures = [pool.submit(audit_environment, name, files, out_dir, **audit_kwargs) for name, files in environments]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    wall = time.perf_counter() - started
+
+    rows = sum(r["rows"] for r in results)
+    return {
+        "results": results,
+        "wall": wall,
+        "environments": len(results),
+        "failed": sum(r["status"] != "ok" for r in results),
+        "rows": rows,
+        "environments_per_minute": len(results) / wall * 60 if wall else 0.0,
+        "rows_per_second": rows / wall if wall else 0.0,
+    }
+
+def _print_result(result):
+    t = result["timings"]
+    print(
+        f"{result['name']:<24} {result['status']:<6} {result['rows']:>10} {result['findings']:>8} "
+        + " ".join(f"{t.get(k, 0.0):>8.2f}" for k in ("ingestion", "payload", "send", "pdf", "total"))
+        + (f"  {result['message']}" if result["message"] else ""),
+        flush=True,
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Directory of environments or CSV manifest.")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Environments audited at once.")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT, help="Maximum concurrent webhook calls.")
+    parser.add_argument("--webhook-url", default=None, help="Defaults to env var N8N_WEBHOOK_URL (mock findings when unset).")
+    parser.add_argument("--summary", action="store_true", help="Send the aggregated summary instead of the rows.")
+    parser.add_argument("--rules", action="store_true", help="Send only the rows flagged by the rule engine.")
+    parser.add_argument("--sample-rows", type=int, default=None,
+                        help="Send a stratified sample of at most this many API log rows (errors and slow requests always kept).")
+    parser.add_argument("--wire-format", choices=WIRE_FORMATS, default="records",
+                        help="Layout of the rows sent to n8n: one object per row (default) or one array per column.")
+    parser.add_argument("--cache-dir", default=None, help="Reuse cached AI results from this directory.")
+    parser.add_argument("--history-db", default=DEFAULT_DB_PATH, help="SQLite audit history (empty to disable).")
+    args = parser.parse_args(argv)
+    if (args.summary or args.rules) and (args.sample_rows or args.wire_format != "records"):
+        # Sampling and the wire format only shape the full rows
+        parser.error("--sample-rows and --wire-format apply without --summary and --rules")
+
+    environments = discover_environments(args.input)
+    if not environments:
+        print(f"Aucun environnement trouvé dans {args.input}", file=sys.stderr)
+        return 2
+
+    print(f"{'environment':<24} {'status':<6} {'rows':>10} {'findings':>8} "
+          f"{'ingest s':>8} {'payload':>8} {'send s':>8} {'pdf s':>8} {'total s':>8}")
+    batch = run_batch(
+        environments, args.out, workers=args.workers, executor=args.executor,
+        max_inflight=args.max_inflight, on_result=_print_result,
+        webhook_url=args.webhook_url, summary=args.summary, rules=args.rules, cache_dir=args.cache_dir,
+        history_db=args.history_db, sample={"max_rows": args.sample_rows} if args.sample_rows else None,
+        wire_format=args.wire_format,
+    )
+    print(
+        f"\n{batch['environments']} environments ({batch['failed']} failed) in {batch['wall']:.1f} s: "
+        f"{batch['environments_per_minute']:.1f} env/min, {batch['rows_per_second']:,.0f} rows/s"
+    )
+    with open(os.path.join(args.out, "batch_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(batch, f, ensure_ascii=False, indent=2)
+    return 1 if batch["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
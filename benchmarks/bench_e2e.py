@@ -0,0 +1,178 @@
+"""
+End-to-end benchmark suite of the audit pipeline.
+
+For each API log size, writes a synthetic environment (see synthetic.py),
+starts the local n8n stand-in (see mock_n8n.py) and times the stages the app
+and the batch CLI run: ingestion, payload building (rows, summary, rules),
+transport, create_risk_matrix and generate_pdf on the agent's findings.
+
+Results are written as JSON (one record per scenario and size, with the
+environment they were measured in). With --compare, each scenario is checked
+against a previous results file and the script exits with status 1 when one
+is slower than the tolerance allows.
+
+Usage:
+    python benchmarks/bench_e2e.py --api-rows 10000 200000 --findings 100 --json results.json
+    python benchmarks/bench_e2e.py --json new.json --compare results.json --tolerance 0.25
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import plotly
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import n8n_connector
+from frap import parse_frap
+from ingestion import load_sources
+from mock_n8n import MockWebhookServer
+from pipeline import build_payload
+from report import generate_pdf
+from synthetic import make_findings, write_environment
+from telemetry import _memory_mb
+from visualizations import create_risk_matrix
+
+# Differences below this many seconds are never reported as regressions (timer noise)
+MIN_REGRESSION_SECONDS = 0.01
+
+def timed(fn, repeat):
+    """
+    Runs fn repeat times.
+
+    Returns:
+        tuple: (last value, best seconds, median seconds).
+    """
+    times = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - start)
+    return value, min(times), statistics.median(times)
+
+def cold(fn):
+    # FRAP parsing is memoized; clearing it times the first render of new findings
+    def run():
+        parse_frap.cache_clear()
+        return fn()
+    return run
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+    }
+
+def run_suite(args):
+    results = []
+
+    def record(scenario, size, fn, repeat=args.repeat, **fields):
+        value, best, median = timed(fn, repeat)
+        results.append({
+            "scenario": scenario, "api_rows": size, "best_seconds": round(best, 6),
+            "median_seconds": round(median, 6), "repeat": repeat,
+            "peak_rss_mb": _memory_mb()[1], **fields,
+        })
+        print(f"{size:>9} {scenario:>18} {best:>9.3f} {median:>9.3f}", flush=True)
+        return value
+
+    findings = make_findings(args.findings)
+    print(f"{'api rows':>9} {'scenario':>18} {'best s':>9} {'median s':>9}")
+    with MockWebhookServer(latency=args.latency, findings=findings) as server, tempfile.TemporaryDirectory() as tmp:
+        for size in args.api_rows:
+            paths = write_environment(os.path.join(tmp, str(size)), args.hosts, args.models, size)
+            bytes_in = sum(os.path.getsize(p) for p in paths)
+
+            frames = record("ingestion", size, lambda: load_sources(*paths), bytes_in=bytes_in)
+            rows = sum(len(df) for df in frames.values())
+            payloads = {}
+            for mode, options in (("rows", {}), ("summary", {"summary": True}), ("rules", {"rules": True})):
+                payloads[mode] = record(f"payload.{mode}", size, lambda: build_payload(frames, **options), rows=rows)
+
+            for mode in ("rows", "summary"):
+                server.reset_counters()
+                response = record(
+                    f"transport.{mode}", size,
+                    lambda: n8n_connector.send_to_n8n(payloads[mode], server.url),
+                )
+                assert isinstance(response, list) and len(response) == len(findings), response
+                results[-1]["wire_bytes"] = server.bytes_received // args.repeat
+                results[-1]["json_bytes"] = server.bytes_decoded // args.repeat
+
+            record("matrix", size, cold(lambda: create_risk_matrix(response)), findings=len(response))
+            pdf = record("pdf", size, cold(lambda: generate_pdf(response)), findings=len(response))
+            results[-1]["bytes_out"] = len(pdf)
+    return results
+
+def compare(results, baseline, tolerance):
+    """
+    Prints the change of each scenario against a baseline.
+
+    Returns:
+        list: The (scenario, api rows) pairs slower than the tolerance allows.
+    """
+    previous = {(r["scenario"], r["api_rows"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'api rows':>9} {'scenario':>18} {'base s':>9} {'new s':>9} {'change':>8}")
+    for r in results:
+        base = previous.get((r["scenario"], r["api_rows"]))
+        if base is None:
+            continue
+        change = r["best_seconds"] / base["best_seconds"] - 1 if base["best_seconds"] else 0.0
+        slower = r["best_seconds"] - base["best_seconds"] > MIN_REGRESSION_SECONDS and change > tolerance
+        if slower:
+            regressions.append((r["scenario"], r["api_rows"]))
+        print(f"{r['api_rows']:>9} {r['scenario']:>18} {base['best_seconds']:>9.3f} {r['best_seconds']:>9.3f} "
+              f"{change:>+8.1%}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api-rows", type=int, nargs="+", default=[10_000, 200_000])
+    parser.add_argument("--hosts", type=int, default=500, help="Rows of infra.csv.")
+    parser.add_argument("--models", type=int, default=50, help="Rows of mlops.csv.")
+    parser.add_argument("--findings", type=int, default=100, help="Findings returned by the stand-in.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in agent latency (s).")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None, help="Write the results to this file.")
+    parser.add_argument("--compare", default=None, help="Previous results file to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    document = {"environment": environment(), "parameters": vars(args), "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
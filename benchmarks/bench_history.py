@@ -0,0 +1,73 @@
+"""
+Query latency of the SQLite audit history.
+
+Fills a temporary history with runs of synthetic findings (a fixed pool of
+recurring findings sampled per run) and times the queries behind the
+history page.
+
+Usage:
+    python benchmarks/bench_history.py --runs 1000 --findings-per-run 50
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryStore
+from synthetic import make_findings
+
+def timed(fn, repeat):
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--findings-per-run", type=int, default=50)
+    parser.add_argument("--distinct", type=int, default=120, help="Distinct recurring findings.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pool = make_findings(args.distinct)
+    for i, finding in enumerate(pool):
+        # Distinct evidence, so each pooled finding has its own fingerprint
+        finding["frap_text"] = finding["frap_text"].replace("(Preuves) :\n", f"(Preuves) :\nCas {i}. ")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.sqlite3"))
+        start = time.perf_counter()
+        first = datetime.datetime(2026, 1, 1)
+        for run in range(args.runs):
+            store.record_run(
+                rng.sample(pool, min(args.findings_per_run, len(pool))), source="batch",
+                environment=f"env{run % 20}", started_at=first + datetime.timedelta(hours=run),
+            )
+        total = args.runs * min(args.findings_per_run, len(pool))
+        print(f"inserted {total} findings in {time.perf_counter() - start:.1f} s\n")
+
+        queries = [
+            ("score_trend(50)", lambda: store.score_trend(50)),
+            ("score_trend(50, env)", lambda: store.score_trend(50, "env3")),
+            ("top_recurring(10)", lambda: store.top_recurring(10)),
+            ("top_recurring(pillar, score)", lambda: store.top_recurring(10, "MLOps", 9)),
+            ("norm_counts(10)", lambda: store.norm_counts(10)),
+            ("recent_runs(20)", lambda: store.recent_runs(20)),
+        ]
+        print(f"{'query':<30} {'best ms':>8}")
+        for name, fn in queries:
+            print(f"{name:<30} {timed(fn, args.repeat) * 1000:>8.2f}")
+        store.close()
+
+if __name__ == "__main__":
+    main()
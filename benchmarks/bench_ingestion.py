@@ -0,0 +1,82 @@
+"""
+Memory/throughput benchmark for the CSV ingestion stage.
+
+Generates synthetic API logs and compares the legacy path
+(read_csv + fillna + to_dict) with the chunked typed ingestion.
+Each measurement runs in a fresh process so peak RSS is not polluted
+by previous runs.
+
+Usage:
+    python benchmarks/bench_ingestion.py --rows 10000 1000000 10000000
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+from synthetic import write_api_csv
+
+def _peak_rss_mb():
+    # VmHWM is reset on exec, unlike ru_maxrss which a spawned child inherits
+    # from the parent that generated the synthetic file.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _run(mode, path, chunksize):
+    start = time.perf_counter()
+    if mode == "legacy":
+        df = pd.read_csv(path).fillna("")
+        records = df.to_dict(orient="records")
+        rows = len(records)
+    elif mode == "stream":
+        rows = 0
+        for chunk in ingestion.iter_source(path, "api_logs", chunksize):
+            rows += len(chunk)
+    else:
+        df = ingestion.load_source(path, "api_logs", chunksize)
+        rows = len(df)
+    elapsed = time.perf_counter() - start
+    return rows, elapsed, _peak_rss_mb()
+
+def measure(mode, path, chunksize):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1) as pool:
+        return pool.apply(_run, (mode, path, chunksize))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--modes", nargs="+", default=["legacy", "load", "stream"], choices=["legacy", "load", "stream"])
+    parser.add_argument("--chunksize", type=int, default=ingestion.DEFAULT_CHUNKSIZE)
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000,
+                        help="Skip the legacy path above this size (it needs several GB).")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'mode':>8} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"api_{rows}.csv")
+            write_api_csv(path, rows)
+            for mode in args.modes:
+                if mode == "legacy" and rows > args.legacy_max_rows:
+                    continue
+                n, elapsed, peak = measure(mode, path, args.chunksize)
+                print(f"{n:>12} {mode:>8} {elapsed:>9.2f} {n / elapsed:>12,.0f} {peak:>9.1f}")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
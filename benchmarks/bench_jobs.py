@@ -0,0 +1,130 @@
+"""
+Load test of the background audit queue.
+
+N simulated auditors arrive over a ramp-up period, each submitting one
+audit against a local stand-in webhook, then polling its status like the
+UI does until it finishes. Two scenarios are compared:
+
+- sync: every auditor runs its audit in its own thread, as a Streamlit
+  script run does without the queue (only the global n8n cap applies);
+- queue: audits go through a JobQueue with a bounded worker pool.
+
+An audit waits first in the job queue (queue scenario), then for one of
+the global n8n slots (slot wait, from the n8n.stream spans). Turnaround is
+the time until the results are available to the auditor, polling included.
+
+Usage:
+    python benchmarks/bench_jobs.py --users 10 50 --workers 4 --max-inflight 8 --latency 1.0
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import n8n_connector
+import telemetry
+from jobs import JobQueue
+from mock_n8n import MockWebhookServer
+
+PAYLOAD = {"infrastructure": [{"cpu_usage": 91}], "mlops": [{"drift_score": 0.4}], "api_logs": [{"status_code": 500}]}
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+def run_audit(url):
+    findings = list(n8n_connector.iter_findings(PAYLOAD, url))
+    if any("error" in f for f in findings):
+        raise RuntimeError(findings[-1]["message"])
+    return findings
+
+def simulate(users, ramp, submit):
+    """
+    Starts one thread per user after a random delay within ramp seconds.
+
+    submit(record) runs the user's audit and fills record with 'turnaround'
+    and, for queued audits, 'queue_wait' (seconds); failures set 'error'.
+    """
+    records = [{} for _ in range(users)]
+    rng = random.Random(42)
+    delays = sorted(rng.uniform(0, ramp) for _ in range(users))
+
+    def user(record, delay):
+        time.sleep(delay)
+        try:
+            submit(record)
+        except Exception as e:
+            record["error"] = str(e)
+
+    threads = [threading.Thread(target=telemetry.bind(user), args=(r, d)) for r, d in zip(records, delays)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - started
+
+def sync_scenario(url):
+    def submit(record):
+        submitted = time.perf_counter()
+        run_audit(url)
+        record["turnaround"] = time.perf_counter() - submitted
+    return submit
+
+def queue_scenario(jobs, url, poll):
+    def submit(record):
+        submitted = time.perf_counter()
+        job_id = jobs.submit(run_audit, url)
+        while True:
+            time.sleep(poll)
+            job = jobs.get(job_id)
+            if job["status"] in ("done", "failed"):
+                break
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
+        record["queue_wait"] = job["started"] - job["submitted"]
+        record["turnaround"] = time.perf_counter() - submitted
+    return submit
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--workers", type=int, default=4, help="JobQueue workers.")
+    parser.add_argument("--max-inflight", type=int, default=8, help="Global cap on concurrent n8n calls.")
+    parser.add_argument("--latency", type=float, default=1.0, help="Stand-in agent latency per request (s).")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Users arrive within this many seconds.")
+    parser.add_argument("--poll", type=float, default=0.2, help="Status polling interval (s).")
+    args = parser.parse_args()
+
+    n8n_connector.set_max_inflight(args.max_inflight)
+    print(f"{'users':>6} {'scenario':>8} {'audits/s':>9} {'p95 queue':>10} {'p95 slot':>9} "
+          f"{'p50 turn':>9} {'p95 turn':>9} {'n8n peak':>9} {'failed':>7}")
+    with MockWebhookServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        for users in args.users:
+            jobs = JobQueue(directory=os.path.join(tmp, f"jobs-{users}"), workers=args.workers)
+            scenarios = [
+                ("sync", sync_scenario(server.url)),
+                ("queue", queue_scenario(jobs, server.url, args.poll)),
+            ]
+            for name, submit in scenarios:
+                server.reset_counters()
+                recorder = telemetry.enable()
+                records, wall = simulate(users, args.ramp, submit)
+                telemetry.disable()
+                ok = [r for r in records if "error" not in r]
+                queue_waits = [r.get("queue_wait", 0.0) for r in ok]
+                slot_waits = [s.get("slot_wait_seconds", 0.0) for s in recorder.spans() if s["stage"] == "n8n.stream"]
+                turnarounds = [r["turnaround"] for r in ok]
+                print(f"{users:>6} {name:>8} {len(ok) / wall:>9.2f} {percentile(queue_waits, 95):>10.2f} "
+                      f"{percentile(slot_waits, 95):>9.2f} {percentile(turnarounds, 50):>9.2f} "
+                      f"{percentile(turnarounds, 95):>9.2f} {server.max_inflight:>9} {users - len(ok):>7}")
+            jobs.shutdown()
+
+if __name__ == "__main__":
+    main()
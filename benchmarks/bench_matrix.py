@@ -0,0 +1,46 @@
+"""
+Risk matrix benchmark: figure build time and serialized size.
+
+The per-finding mode draws one marker per finding, so the figure JSON
+sent to the browser grows linearly. The aggregated mode draws at most one
+bubble per (frequency, gravity) cell, so the JSON size stays flat.
+
+Usage:
+    python benchmarks/bench_matrix.py --findings 100 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from visualizations import create_risk_matrix
+from synthetic import make_findings
+
+def measure(findings, aggregate):
+    start = time.perf_counter()
+    fig = create_risk_matrix(findings, aggregate=aggregate)
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    size = len(fig.to_json())
+    return build, time.perf_counter() - start, size, fig.data[-1].type
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, nargs="+", default=[100, 1000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    # Warm-up: the static heatmap layer is built once per process
+    create_risk_matrix([])
+
+    print(f"{'findings':>9} {'mode':>10} {'trace':>10} {'build ms':>9} {'json ms':>8} {'json KB':>9}")
+    for count in args.findings:
+        findings = make_findings(count)
+        for aggregate in (False, True):
+            build, dump, size, trace = measure(findings, aggregate)
+            mode = "aggregate" if aggregate else "markers"
+            print(f"{count:>9} {mode:>10} {trace:>10} {build * 1000:>9.1f} {dump * 1000:>8.1f} {size / 1024:>9.1f}")
+
+if __name__ == "__main__":
+    main()
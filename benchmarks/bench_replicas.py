@@ -0,0 +1,106 @@
+"""
+Webhook calls balanced over several n8n replicas.
+
+Starts local n8n stand-ins (see mock_n8n.py) whose answers are slow for a
+share of the requests, and sends the same audits through send_to_n8n to:
+
+- single:   one replica;
+- balanced: all replicas (least outstanding requests, failover);
+- hedged:   all replicas, with a second copy sent after the p95 latency;
+- failing:  all replicas, one of them answering 503 to every request.
+
+Reports the p50/p95/p99 latency of the calls, the errors, and the replica
+pool counters (failovers, hedges and hedges won, calls per replica).
+Hedged copies hold a webhook slot of their own (N8N_MAX_INFLIGHT, set with
+--max-inflight): with no free slot a call is not hedged.
+
+Usage:
+    python benchmarks/bench_replicas.py --replicas 3 --calls 400 --concurrency 8 --slow-rate 0.05 --slow-latency 1.0
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import n8n_connector
+from mock_n8n import MockWebhookServer
+from replicas import get_replica_pool
+
+PAYLOAD = {"infrastructure": [{"hostname": "server-0001", "open_ports": "22;443"}], "mlops": [], "api_logs": []}
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def run(name, servers, args, hedge=False):
+    urls = [server.url for server in servers]
+    webhook_url = ",".join(urls)
+
+    def call(_):
+        start = time.perf_counter()
+        response = n8n_connector.send_to_n8n(PAYLOAD, webhook_url, hedge=hedge)
+        return time.perf_counter() - start, isinstance(response, dict) and response.get("error")
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(call, range(args.calls)))
+    seconds = [s for s, _ in results]
+    errors = sum(1 for _, error in results if error)
+
+    line = (f"{name:>9} {statistics.median(seconds):>7.3f} {percentile(seconds, 0.95):>7.3f} "
+            f"{percentile(seconds, 0.99):>7.3f} {max(seconds):>7.3f} {errors:>6}")
+    if len(urls) > 1:
+        pool = get_replica_pool(urls)
+        calls = "/".join(str(r["calls"]) for r in pool.health())
+        states = "/".join(r["state"] for r in pool.health())
+        line += (f" {pool.stats['failovers']:>9} {pool.stats['hedges']:>6} {pool.stats['hedge_wins']:>5}"
+                 f"  calls {calls} ({states})")
+    print(line, flush=True)
+
+def start_servers(args, count, failing=False):
+    servers = []
+    for index in range(count):
+        server = MockWebhookServer(latency=args.latency)
+        server.slow_rate = args.slow_rate
+        server.slow_latency = args.slow_latency
+        if failing and index == count - 1:
+            server.fail_status = 503
+        servers.append(server.__enter__())
+    return servers
+
+def stop_servers(servers):
+    for server in servers:
+        server.__exit__(None, None, None)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--replicas", type=int, default=3)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in agent latency (s).")
+    parser.add_argument("--slow-rate", type=float, default=0.05, help="Share of slow answers per replica.")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="Extra delay of a slow answer (s).")
+    parser.add_argument("--max-inflight", type=int, default=None,
+                        help="Concurrent webhook calls allowed, hedged copies included (default: 2 x concurrency).")
+    args = parser.parse_args()
+    n8n_connector.set_max_inflight(args.max_inflight or 2 * args.concurrency)
+
+    print(f"{'scenario':>9} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'max s':>7} {'errors':>6} "
+          f"{'failovers':>9} {'hedges':>6} {'won':>5}")
+    for name, count, hedge, failing in (
+        ("single", 1, False, False),
+        ("balanced", args.replicas, False, False),
+        ("hedged", args.replicas, True, False),
+        ("failing", args.replicas, False, True),
+    ):
+        servers = start_servers(args, count, failing)
+        try:
+            run(name, servers, args, hedge=hedge)
+        finally:
+            stop_servers(servers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Wall time and peak RSS of PDF report generation.
+
+Compares the legacy monolithic path (one FPDF document returned as a
+string) with the report engine streaming to a file, serially and with a
+process pool. Each measurement runs in a fresh process.
+
+Usage:
+    python benchmarks/bench_report.py --findings 10 1000 10000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import report
+from bench_ingestion import _peak_rss_mb
+from synthetic import make_findings
+
+def legacy_generate(findings):
+    pdf = report.AuditReport()
+    report.render_title_page(pdf)
+    for risk in findings:
+        report.render_risk_page(pdf, risk)
+    return pdf.output(dest='S').encode('latin-1')
+
+def _run(mode, count, workers, path):
+    findings = make_findings(count)
+    start = time.perf_counter()
+    if mode == "legacy":
+        with open(path, "wb") as f:
+            f.write(legacy_generate(findings))
+    else:
+        report.render_report(findings, path, workers=workers if mode == "parallel" else 0)
+    elapsed = time.perf_counter() - start
+    return elapsed, _peak_rss_mb(), os.path.getsize(path)
+
+def _child(queue, *args):
+    queue.put(_run(*args))
+
+def measure(mode, count, workers, path):
+    # A plain (non-daemon) process, since the parallel mode starts its own pool.
+    # Peak RSS is the merging process only; workers hold one section each.
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(queue, mode, count, workers, path))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, nargs="+", default=[10, 1_000, 10_000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "stream", "parallel"], choices=["legacy", "stream", "parallel"])
+    args = parser.parse_args()
+
+    print(f"{'findings':>9} {'mode':>9} {'seconds':>8} {'peak MB':>8} {'PDF KB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.pdf")
+        for count in args.findings:
+            for mode in args.modes:
+                elapsed, peak, size = measure(mode, count, args.workers, path)
+                print(f"{count:>9} {mode:>9} {elapsed:>8.2f} {peak:>8.1f} {size / 1024:>9.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Rerun-latency benchmark for the Streamlit results page.
+
+A widget interaction reruns the whole script. Before memoization a rerun
+of the results page re-parsed the CSVs, rebuilt the risk matrix and
+rendered the PDF (plus 2.5 s of UX sleeps, excluded here). With the
+artifact store a rerun only hashes the uploads (memoized per upload) and
+looks the artifacts up; the PDF is rendered on download only.
+
+Usage:
+    python benchmarks/bench_rerun.py --rows 100000 --findings 10 100
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artifacts import ArtifactStore, file_digest, findings_digest
+from ingestion import load_sources
+from report import generate_pdf
+from visualizations import create_risk_matrix
+from bench_ingestion import write_api_csv
+from synthetic import make_findings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def legacy_rerun(files, findings):
+    load_sources(*files)
+    create_risk_matrix(findings)
+    generate_pdf(findings)
+
+def memoized_rerun(store, files, findings):
+    uploads = tuple(store.get_or_create(("digest", id(f)), lambda f=f: file_digest(f)) for f in files)
+    store.get_or_create(("frames",) + uploads, lambda: load_sources(*files))
+    store.get_or_create(("figure", findings_digest(findings)), lambda: create_risk_matrix(findings))
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="API log rows in the upload.")
+    parser.add_argument("--findings", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        api_path = os.path.join(tmp, "api.csv")
+        write_api_csv(api_path, args.rows)
+        paths = [os.path.join(ROOT, "data", "infra.csv"), os.path.join(ROOT, "data", "mlops.csv"), api_path]
+        # Uploaded files are in-memory buffers in Streamlit
+        files = []
+        for path in paths:
+            with open(path, "rb") as f:
+                files.append(io.BytesIO(f.read()))
+
+        print(f"{'findings':>9} {'legacy ms':>10} {'first ms':>10} {'rerun ms':>10} {'speed-up':>9}")
+        for count in args.findings:
+            findings = make_findings(count)
+            legacy = timed(lambda: legacy_rerun(files, findings), args.repeat)
+
+            store = ArtifactStore()
+            first = timed(lambda: memoized_rerun(store, files, findings), 1)
+            rerun = timed(lambda: memoized_rerun(store, files, findings), args.repeat)
+            print(f"{count:>9} {legacy * 1000:>10.1f} {first * 1000:>10.1f} {rerun * 1000:>10.2f} {legacy / rerun:>8.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Throughput benchmark for the local rule engine.
+
+Loads synthetic API logs through the real ingestion path, then times
+rule evaluation and compares the filtered payload with the full one.
+
+Usage:
+    python benchmarks/bench_rules.py --rows 10000 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+import rules
+from bench_ingestion import write_api_csv
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    infra = ingestion.load_source(os.path.join(root, "data", "infra.csv"), "infrastructure")
+    mlops = ingestion.load_source(os.path.join(root, "data", "mlops.csv"), "mlops")
+
+    print(f"{'rows':>12} {'eval s':>8} {'rows/s':>14} {'flagged':>9} {'full KB':>10} {'filtered KB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, "api.csv")
+            write_api_csv(path, rows)
+            frames = {"infrastructure": infra, "mlops": mlops, "api_logs": ingestion.load_source(path, "api_logs")}
+
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                flagged, _ = rules.evaluate_rules(frames)
+                best = min(best, time.perf_counter() - start)
+
+            full_kb = len(json.dumps(ingestion.to_records(frames["api_logs"]))) / 1024
+            filtered_kb = len(json.dumps(rules.build_filtered_payload(frames))) / 1024
+            kept = len(flagged["api_logs"])
+            print(f"{rows:>12} {best:>8.3f} {rows / best:>14,.0f} {kept:>9} {full_kb:>10.0f} {filtered_kb:>12.0f}")
+
+if __name__ == "__main__":
+    main()
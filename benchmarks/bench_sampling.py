@@ -0,0 +1,62 @@
+"""
+Stratified sampling of large API log uploads.
+
+For each size, samples the synthetic API logs within the budget and reports
+the sampling time, the sample ratio, the columnar payload size before and
+after, whether every error row was kept, and the error of the re-scaled
+request counts per (endpoint, method, status class).
+
+Usage:
+    python benchmarks/bench_sampling.py --rows 200000 1000000 --max-rows 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+import sampling
+from bench_ingestion import write_api_csv
+
+def payload_bytes(df):
+    return sum(len(piece.encode("utf-8")) for piece in ingestion.iter_frame_json(df))
+
+def rescaled_count_error(df, sample):
+    # Largest relative error of the weighted counts over the strata without time bucket
+    keys = ["endpoint", "method"]
+    truth = df.groupby(keys + [df["status_code"] // 100], observed=True).size()
+    estimate = sample.groupby(keys + [sample["status_code"] // 100], observed=True)[sampling.WEIGHT_COLUMN].sum()
+    estimate = estimate.reindex(truth.index, fill_value=0)
+    return float(((estimate - truth).abs() / truth).max())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000, 1_000_000])
+    parser.add_argument("--max-rows", type=int, default=sampling.DEFAULT_MAX_ROWS)
+    parser.add_argument("--max-bytes", type=int, default=sampling.DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'sample':>8} {'ratio':>7} {'strata':>7} {'kept':>7} {'errors ok':>9} "
+          f"{'MB in':>7} {'MB out':>7} {'count err':>9} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, "api.csv")
+            write_api_csv(path, rows)
+            df = ingestion.load_source(path, "api_logs")
+
+            start = time.perf_counter()
+            sample, report = sampling.sample_api_logs(df, max_rows=args.max_rows, max_bytes=args.max_bytes,
+                                                     wire_format="columns")
+            seconds = time.perf_counter() - start
+
+            errors_kept = (sample["status_code"] >= 400).sum() == (df["status_code"] >= 400).sum()
+            count_error = rescaled_count_error(df, sample) if sampling.WEIGHT_COLUMN in sample else 0.0
+            print(f"{rows:>9} {report['rows_out']:>8} {report['ratio']:>7.3f} {report['strata']:>7} "
+                  f"{report['kept']:>7} {str(bool(errors_kept)):>9} {payload_bytes(df) / 1e6:>7.1f} "
+                  f"{payload_bytes(sample) / 1e6:>7.1f} {count_error:>9.3f} {seconds:>8.3f}")
+
+if __name__ == "__main__":
+    main()
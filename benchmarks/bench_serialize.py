@@ -0,0 +1,76 @@
+"""
+Payload serialization benchmark: row records vs streamed JSON bodies.
+
+The records path converts each typed frame back to one dict per row
+(to_records), serializes the whole payload with the json module and
+gzip-compresses the resulting text. The streamed paths hand the frames to
+the connector, which writes them while the body is sent: as row records
+converted one slice at a time (the default wire format), or column by
+column with pandas' C encoder ('wire_format': 'columns'). Each measurement runs in a fresh process; the
+frame is loaded before the clock starts and its RSS is reported as the
+baseline.
+
+Usage:
+    python benchmarks/bench_serialize.py --rows 100000 1000000
+"""
+import argparse
+import gzip
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+import n8n_connector
+from bench_ingestion import _peak_rss_mb, write_api_csv
+
+def _run(mode, path):
+    frames = {"api_logs": ingestion.load_source(path, "api_logs")}
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "records":
+        payload = {name: ingestion.to_records(df) for name, df in frames.items()}
+        body = n8n_connector.build_batches(payload)[0]
+        raw_bytes = len(body)
+        wire_bytes = len(gzip.compress(body, compresslevel=n8n_connector.GZIP_LEVEL))
+    else:
+        wire_format = "columns" if mode == "columnar" else "records"
+        body = n8n_connector.build_batches({**frames, ingestion.WIRE_FORMAT_KEY: wire_format})[0]
+        raw_bytes = sum(len(chunk) for chunk in body.chunks(compress=False))
+        wire_bytes = sum(len(chunk) for chunk in body.chunks(compress=True))
+    elapsed = time.perf_counter() - start
+    return elapsed, baseline, _peak_rss_mb(), raw_bytes, wire_bytes
+
+def _child(queue, *args):
+    queue.put(_run(*args))
+
+def measure(mode, path):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(queue, mode, path))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    # The streamed times cover two passes (plain size, then gzip) to report both sizes
+    print(f"{'rows':>9} {'mode':>9} {'seconds':>8} {'base MB':>8} {'peak MB':>8} {'JSON MB':>8} {'wire MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "api.csv")
+        for rows in args.rows:
+            write_api_csv(path, rows)
+            for mode in ("records", "streamed", "columnar"):
+                elapsed, baseline, peak, raw, wire = measure(mode, path)
+                print(f"{rows:>9} {mode:>9} {elapsed:>8.2f} {baseline:>8.1f} {peak:>8.1f} "
+                      f"{raw / 1e6:>8.1f} {wire / 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Cold-start budget of the Streamlit app.
+
+Runs app.py in a fresh interpreter (bare mode, no uploads: the empty-state
+page every new session renders first) and measures the time spent in the
+script after streamlit itself is imported. Reports the import cost of the
+modules it loads (python -X importtime) and which heavy dependencies were
+loaded.
+
+Exits with status 1 when the median run is over the budget, or when one of
+the deferred dependencies (--deferred) was loaded by the empty-state page.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5 --budget 0.25
+    python benchmarks/bench_startup.py --deferred pandas fpdf dotenv --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded only once the user uploads data, launches an audit or asks for the report
+DEFERRED_MODULES = ["pandas", "numpy", "fpdf", "requests", "dotenv"]
+
+RUN_APP = """
+import json, runpy, sys, time
+start = time.perf_counter()
+import streamlit
+loaded = time.perf_counter()
+runpy.run_path({app!r}, run_name="__main__")
+end = time.perf_counter()
+print(json.dumps({{"streamlit": loaded - start, "app": end - loaded, "modules": sorted(sys.modules)}}))
+"""
+
+def parse_importtime(stderr):
+    """
+    Parses python -X importtime output.
+
+    Returns:
+        dict: Cumulative seconds of each top-level import made after
+        streamlit (nested imports are counted in the module that triggered them).
+    """
+    costs = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        # Nested imports are indented by two spaces per level
+        if fields[2].startswith("  "):
+            continue
+        name = fields[2].strip()
+        if name == "streamlit":
+            # Interpreter startup and streamlit are paid by every page
+            costs = {}
+            continue
+        costs[name] = int(fields[1]) / 1e6
+    return costs
+
+def run_app(cache_dir):
+    env = dict(os.environ, AUDITS2I_CACHE_DIR=cache_dir, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", RUN_APP.format(app=os.path.join(ROOT, "app.py"))],
+        capture_output=True, text=True, cwd=ROOT, env=env, timeout=300,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr[-2000:])
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["imports"] = parse_importtime(result.stderr)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=0.25,
+                        help="Allowed median seconds of the empty-state page after streamlit is imported.")
+    parser.add_argument("--deferred", nargs="*", default=DEFERRED_MODULES,
+                        help="Modules the empty-state page must not load.")
+    parser.add_argument("--top", type=int, default=10, help="Imports listed, by cumulative cost.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [run_app(tmp) for _ in range(args.runs)]
+
+    app_seconds = statistics.median(r["app"] for r in runs)
+    streamlit_seconds = statistics.median(r["streamlit"] for r in runs)
+    imports = runs[-1]["imports"]
+    print(f"{'import':<32} {'cumulative s':>12}")
+    for name, seconds in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<32} {seconds:>12.3f}")
+
+    loaded = [m for m in args.deferred if m in runs[-1]["modules"]]
+    print(f"\nstreamlit import: {streamlit_seconds:.3f} s (median of {args.runs})")
+    print(f"empty-state page: {app_seconds:.3f} s (median of {args.runs}, budget {args.budget:.3f} s)")
+    print(f"deferred modules loaded: {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if app_seconds > args.budget:
+        failures.append(f"empty-state page over budget ({app_seconds:.3f} s > {args.budget:.3f} s)")
+    if loaded:
+        failures.append(f"deferred modules loaded at startup: {', '.join(loaded)}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
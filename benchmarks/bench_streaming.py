@@ -0,0 +1,71 @@
+"""
+Time-to-first-finding benchmark for streamed agent responses.
+
+A local stand-in webhook writes its findings one by one, item_delay seconds
+apart, as NDJSON or as a chunked JSON array. The buffered send_to_n8n only
+returns once the whole body is read; iter_findings yields each finding as
+soon as it is parsed.
+
+Usage:
+    python benchmarks/bench_streaming.py --findings 20 --item-delay 0.1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import n8n_connector
+from mock_n8n import MockWebhookServer
+
+def make_findings(count):
+    base = n8n_connector.MOCK_FINDINGS
+    return [dict(base[i % len(base)], risk_score=1 + i % 25) for i in range(count)]
+
+def timed(run):
+    """
+    Calls run, consumes the iterable it returns and returns
+    (items, seconds to the first item, total seconds).
+    """
+    start = time.perf_counter()
+    first = None
+    items = []
+    for item in run():
+        if first is None:
+            first = time.perf_counter() - start
+        items.append(item)
+    return items, first, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--findings", type=int, default=20, help="Findings written by the stand-in per request.")
+    parser.add_argument("--item-delay", type=float, default=0.1, help="Delay before each finding (s).")
+    parser.add_argument("--latency", type=float, default=0.2, help="Delay before the response starts (s).")
+    args = parser.parse_args()
+
+    findings = make_findings(args.findings)
+    payload = {"infrastructure": [{"cpu_usage": 91}], "mlops": [{"drift_score": 0.4}], "api_logs": [{"status_code": 500}]}
+
+    print(f"{'format':>7} {'scenario':>16} {'findings':>9} {'first s':>8} {'total s':>8}")
+    for stream_format in ("ndjson", "array"):
+        with MockWebhookServer(latency=args.latency, findings=findings,
+                               stream_format=stream_format, item_delay=args.item_delay) as server:
+            scenarios = [
+                ("buffered", lambda: [n8n_connector.send_to_n8n(payload, server.url)]),
+                ("streamed", lambda: n8n_connector.iter_findings(payload, server.url)),
+                ("parallel+stream", lambda: n8n_connector.iter_pillar_findings(payload, server.url, stream=True)),
+            ]
+            for name, run in scenarios:
+                items, first, total = timed(run)
+                if name == "buffered":
+                    items = items[0]
+                elif name == "parallel+stream":
+                    items = [f for _, result in items for f in result]
+                assert isinstance(items, list) and all("error" not in f for f in items), items
+                expected = len(findings) * (3 if name == "parallel+stream" else 1)
+                assert len(items) == expected, (name, len(items))
+                print(f"{stream_format:>7} {name:>16} {len(items):>9} {first:>8.3f} {total:>8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Tail mode on growing API logs.
+
+For each file size, writes synthetic API logs, lets a TailAuditor catch up
+to the end of the file, then appends a few lines per cycle and times the
+cycles (read, parse and micro-batch sent to the local n8n stand-in, see
+mock_n8n.py). The full re-read the upload flow does for the same new lines
+is timed for comparison: the cycle time should not grow with the file.
+
+Usage:
+    python benchmarks/bench_tail.py --rows 100000 1000000 --append 1000 --cycles 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+from bench_ingestion import write_api_csv
+from mock_n8n import MockWebhookServer
+from tail import TailAuditor
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--append", type=int, default=1000, help="Lines appended per cycle.")
+    parser.add_argument("--cycles", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'MB':>7} {'append':>7} {'cycle s':>8} {'rows/cycle':>10} {'full read s':>11}")
+    with MockWebhookServer() as server, tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"api_{rows}.csv")
+            write_api_csv(path, rows)
+            # The appended lines come from a separate file of the same shape
+            more = os.path.join(tmp, "more.csv")
+            write_api_csv(more, args.append * args.cycles, seed=1)
+            with open(more, encoding="utf-8") as f:
+                lines = f.readlines()[1:]
+
+            auditor = TailAuditor({"api_logs": path}, state_path=os.path.join(tmp, f"state_{rows}.json"),
+                                  from_end=True, root=tmp)
+            auditor.cycle(server.url)
+
+            seconds, parsed = [], []
+            for n in range(args.cycles):
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines[n * args.append:(n + 1) * args.append])
+                report = auditor.cycle(server.url)
+                assert report["error"] is None, report["error"]
+                seconds.append(report["seconds"])
+                parsed.append(report["rows"])
+
+            start = time.perf_counter()
+            ingestion.load_source(path, "api_logs")
+            full = time.perf_counter() - start
+            print(f"{rows:>9} {os.path.getsize(path) / 1e6:>7.1f} {args.append:>7} {statistics.median(seconds):>8.3f} "
+                  f"{int(statistics.median(parsed)):>10} {full:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Bytes-on-wire and latency benchmark for the n8n transport.
+
+Compares the legacy one-shot requests.post(json=...) with the pooled,
+gzip-compressed and batched transport against a local stand-in webhook.
+
+Usage:
+    python benchmarks/bench_transport.py --rows 10000 200000 --latency 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingestion
+import n8n_connector
+from bench_ingestion import write_api_csv
+from mock_n8n import MockWebhookServer
+
+def legacy_send(payload, url):
+    response = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 200_000])
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated agent latency per request (s).")
+    parser.add_argument("--batch-bytes", type=int, default=4 * 1024 * 1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    scenarios = [
+        ("legacy", lambda p, url: legacy_send(p, url)),
+        ("pooled", lambda p, url: n8n_connector.send_to_n8n(p, url, compress=False)),
+        ("gzip", lambda p, url: n8n_connector.send_to_n8n(p, url)),
+        ("gzip+batch", lambda p, url: n8n_connector.send_to_n8n(p, url, max_batch_bytes=args.batch_bytes)),
+    ]
+
+    print(f"{'rows':>9} {'scenario':>11} {'requests':>9} {'wire KB':>10} {'json KB':>10} {'best s':>8}")
+    with MockWebhookServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, "api.csv")
+            write_api_csv(path, rows)
+            payload = {"api_logs": ingestion.to_records(ingestion.load_source(path, "api_logs"))}
+
+            for name, send in scenarios:
+                best = float("inf")
+                for _ in range(args.repeat):
+                    server.reset_counters()
+                    start = time.perf_counter()
+                    result = send(payload, server.url)
+                    best = min(best, time.perf_counter() - start)
+                assert isinstance(result, list), result
+                print(f"{rows:>9} {name:>11} {server.requests:>9} {server.bytes_received / 1024:>10.0f} "
+                      f"{server.bytes_decoded / 1024:>10.0f} {best:>8.3f}")
+
+if __name__ == "__main__":
+    main()
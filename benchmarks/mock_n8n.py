@@ -0,0 +1,197 @@
+"""
+Local stand-in for the n8n webhook, used by the benchmarks.
+
+Accepts JSON (optionally gzip-compressed, optionally chunked) POST bodies, records the bytes
+received and answers with the connector's mock findings after a
+configurable delay, either as one JSON body or streamed finding by finding.
+Slow answers (a share of requests delayed further) and failures (an error
+status) can be injected to stand in for an unhealthy n8n replica.
+Run directly to serve it for the app or the batch CLI
+(N8N_WEBHOOK_URL=http://127.0.0.1:5678/webhook/audit).
+
+Usage:
+    python benchmarks/mock_n8n.py --port 5678 --latency 2.0 --findings 200 --stream ndjson --item-delay 0.05
+    python benchmarks/mock_n8n.py --port 5679 --latency 0.1 --slow-rate 0.05 --slow-latency 2.0
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from n8n_connector import MOCK_FINDINGS
+
+class MockWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            raw = self._read_chunked()
+        else:
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = gzip.decompress(raw) if self.headers.get("Content-Encoding") == "gzip" else raw
+        payload = json.loads(body)
+
+        with server.lock:
+            server.requests += 1
+            server.bytes_received += len(raw)
+            server.bytes_decoded += len(body)
+            server.inflight += 1
+            server.max_inflight = max(server.max_inflight, server.inflight)
+        try:
+            self._respond(server, payload)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+    def _respond(self, server, payload):
+        latency = server.latency
+        if server.slow_rate and random.random() < server.slow_rate:
+            latency += server.slow_latency
+        if latency:
+            time.sleep(latency)
+
+        if server.fail_status:
+            self.send_response(server.fail_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        findings = server.findings_for(payload)
+        if server.stream_format:
+            self._stream(findings, server.stream_format, server.item_delay)
+            return
+
+        response = json.dumps(findings).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def _stream(self, findings, stream_format, item_delay):
+        # Chunked response, one finding per chunk, like an agent writing FRAPs one by one
+        self.send_response(200)
+        content_type = "application/x-ndjson" if stream_format == "ndjson" else "application/json"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(data):
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        if stream_format == "array":
+            chunk(b"[")
+        for index, finding in enumerate(findings):
+            if item_delay:
+                time.sleep(item_delay)
+            text = json.dumps(finding, ensure_ascii=False)
+            if stream_format == "ndjson":
+                text += "\n"
+            elif index:
+                text = "," + text
+            chunk(text.encode("utf-8"))
+        if stream_format == "array":
+            chunk(b"]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_chunked(self):
+        # Streamed bodies (StreamBody) are sent with chunked transfer encoding
+        parts = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if size == 0:
+                self.rfile.readline()
+                return b"".join(parts)
+            parts.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def log_message(self, format, *args):
+        pass
+
+class MockWebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, findings=None, port=0, stream_format=None, item_delay=0.0):
+        super().__init__(("127.0.0.1", port), MockWebhookHandler)
+        self.latency = latency
+        # None answers with one JSON body; 'ndjson' or 'array' stream the
+        # findings in chunks, item_delay seconds apart
+        self.stream_format = stream_format
+        self.item_delay = item_delay
+        # Share of requests delayed slow_latency seconds more (tail latency), and
+        # the status answered to every request instead of the findings (failure)
+        self.slow_rate = 0.0
+        self.slow_latency = 0.0
+        self.fail_status = None
+        self.findings = MOCK_FINDINGS if findings is None else findings
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        # Requests being answered now, and the most seen at once
+        self.inflight = 0
+        self.max_inflight = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/webhook/audit"
+
+    def findings_for(self, payload):
+        return self.findings
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_received = 0
+            self.bytes_decoded = 0
+            self.max_inflight = self.inflight
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    from synthetic import make_findings
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay before each response (s).")
+    parser.add_argument("--findings", type=int, default=None,
+                        help="Findings per response (synthetic); defaults to the connector's mock findings.")
+    parser.add_argument("--stream", choices=("ndjson", "array"), default=None, help="Stream the findings in chunks.")
+    parser.add_argument("--item-delay", type=float, default=0.0, help="Delay before each streamed finding (s).")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of requests answered slowly.")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="Extra delay of the slow answers (s).")
+    parser.add_argument("--fail-status", type=int, default=None, help="Answer every request with this status.")
+    args = parser.parse_args()
+
+    findings = make_findings(args.findings) if args.findings is not None else None
+    server = MockWebhookServer(args.latency, findings, args.port, args.stream, args.item_delay)
+    server.slow_rate = args.slow_rate
+    server.slow_latency = args.slow_latency
+    server.fail_status = args.fail_status
+    print(f"Listening on {server.url}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{server.requests} requests, {server.bytes_received / 1e6:.1f} MB received")
+
+if __name__ == "__main__":
+    main()
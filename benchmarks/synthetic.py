@@ -0,0 +1,133 @@
+"""
+Synthetic data shared by the benchmarks.
+
+Generates findings and infra.csv / mlops.csv / api.csv files with the same
+shape as data/ at any size. Run directly to write one environment (the
+layout read by batch_audit.py).
+
+Usage:
+    python benchmarks/synthetic.py environments/prod --infra 500 --mlops 40 --api 1000000
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from n8n_connector import MOCK_FINDINGS
+
+def make_findings(count, seed=0):
+    """
+    Generates findings shaped like the agent's answer, cycling over the mock FRAP texts
+    with random frequency/gravity.
+    """
+    rng = random.Random(seed)
+    findings = []
+    for i in range(count):
+        template = MOCK_FINDINGS[i % len(MOCK_FINDINGS)]
+        frequency = rng.randint(1, 5)
+        gravity = rng.randint(1, 5)
+        findings.append({
+            **template,
+            "frequency": frequency,
+            "gravity": gravity,
+            "risk_score": frequency * gravity,
+            "frap_text": template["frap_text"].replace("1. CONTEXTE :", f"1. CONTEXTE (constat n°{i + 1}) :"),
+        })
+    return findings
+
+# --- API Logs ---
+ENDPOINTS = ["/api/v1/login", "/api/v1/data", "/api/v1/users", "/api/v1/admin", "/admin/settings"]
+METHODS = ["GET", "POST", "PUT", "DELETE"]
+# Mostly benign traffic with rare client/server errors, like production logs
+STATUS_CODES = [200, 201, 204, 301, 400, 401, 403, 404, 500, 503]
+STATUS_WEIGHTS = [0.95, 0.02, 0.01, 0.005, 0.004, 0.003, 0.002, 0.003, 0.002, 0.001]
+
+def write_api_csv(path, rows, block=500_000, seed=0):
+    """
+    Writes a synthetic api.csv with the same shape as data/api.csv.
+    """
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2023-10-10T00:00:00")
+    header = True
+    for offset in range(0, rows, block):
+        n = min(block, rows - offset)
+        seconds = np.arange(offset, offset + n) // 10
+        df = pd.DataFrame({
+            "timestamp": np.datetime_as_string(start + seconds.astype("timedelta64[s]")),
+            "endpoint": rng.choice(ENDPOINTS, n),
+            "method": rng.choice(METHODS, n),
+            "status_code": rng.choice(STATUS_CODES, n, p=STATUS_WEIGHTS),
+            "response_time": pd.Series(rng.lognormal(4.4, 0.5, n).astype(int) + 1).astype(str) + "ms",
+        })
+        df.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+
+# --- Infrastructure ---
+OPERATING_SYSTEMS = ["Ubuntu 20.04", "Ubuntu 22.04", "Windows Server 2019", "CentOS 7", "Debian 12"]
+# Common services first; telnet/ftp/RDP/databases are the findings-worthy ones
+PORTS = [22, 80, 443, 8080, 3389, 5432, 3306, 6379, 27017, 21, 23]
+PORT_WEIGHTS = [0.9, 0.6, 0.8, 0.2, 0.1, 0.08, 0.08, 0.05, 0.03, 0.02, 0.01]
+
+def write_infra_csv(path, hosts, seed=0):
+    """
+    Writes a synthetic infra.csv (one row per host) with the shape of data/infra.csv.
+    """
+    rng = np.random.default_rng(seed)
+    open_ports = rng.random((hosts, len(PORTS))) < np.array(PORT_WEIGHTS)
+    df = pd.DataFrame({
+        "hostname": [f"server-{i + 1:04d}" for i in range(hosts)],
+        "ip": [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(hosts)],
+        "os": rng.choice(OPERATING_SYSTEMS, hosts),
+        "open_ports": [";".join(str(p) for p, is_open in zip(PORTS, row) if is_open) for row in open_ports],
+    })
+    df.to_csv(path, index=False)
+
+# --- MLOps ---
+MODEL_NAMES = ["fraud_detection", "customer_churn", "credit_scoring", "demand_forecast", "anomaly_detection"]
+
+def write_mlops_csv(path, models, seed=0):
+    """
+    Writes a synthetic mlops.csv (one row per model version) with the shape of data/mlops.csv.
+    """
+    rng = np.random.default_rng(seed)
+    trained = np.datetime64("2023-10-10") - rng.integers(0, 540, models).astype("timedelta64[D]")
+    df = pd.DataFrame({
+        "model_name": [MODEL_NAMES[i % len(MODEL_NAMES)] for i in range(models)],
+        "version": [f"v{i // len(MODEL_NAMES) + 1}.{i % 3}" for i in range(models)],
+        "accuracy": rng.beta(18, 2, models).round(3),
+        "last_trained": np.datetime_as_string(trained),
+    })
+    df.to_csv(path, index=False)
+
+def write_environment(directory, infra=200, mlops=20, api=100_000, seed=0):
+    """
+    Writes infra.csv, mlops.csv and api.csv into directory.
+
+    Returns:
+        tuple: The (infra, mlops, api) paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = tuple(os.path.join(directory, name) for name in ("infra.csv", "mlops.csv", "api.csv"))
+    write_infra_csv(paths[0], infra, seed)
+    write_mlops_csv(paths[1], mlops, seed)
+    write_api_csv(paths[2], api, seed=seed)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="Output directory.")
+    parser.add_argument("--infra", type=int, default=200, help="Hosts.")
+    parser.add_argument("--mlops", type=int, default=20, help="Model versions.")
+    parser.add_argument("--api", type=int, default=100_000, help="API log rows.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in write_environment(args.directory, args.infra, args.mlops, args.api, args.seed):
+        print(f"{path}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+if __name__ == "__main__":
+    main()
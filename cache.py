@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.getenv("AUDITS2I_CACHE_DIR", ".audits2i_cache")
+# Cache entries get their own directory: state files of other modules live in DEFAULT_CACHE_DIR
+DEFAULT_RESPONSES_DIR = os.path.join(DEFAULT_CACHE_DIR, "responses")
+# File names of cache entries (payload digests); eviction and clear() touch nothing else
+ENTRY_NAME = re.compile(r"^[0-9a-f]{64}\.json$")
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+def _json_default(value):
+    # DataFrames are hashed through their columnar serialization (whatever the
+    # payload's wire format: it is a key of the payload, so part of the digest)
+    if hasattr(value, "columns") and hasattr(value, "iloc"):
+        from ingestion import iter_frame_json
+
+        digest = hashlib.sha256()
+        for piece in iter_frame_json(value):
+            digest.update(piece.encode("utf-8"))
+        return "frame:" + digest.hexdigest()
+    return str(value)
+
+def payload_digest(data_payload, workflow=""):
+    """
+    Computes a stable SHA-256 key for a payload sent to a given workflow.
+
+    The payload is normalized (sorted keys, compact separators, non-JSON
+    values rendered with str, DataFrames by the digest of their columnar
+    serialization) so equal inputs always give the same key.
+
+    Args:
+        data_payload: The payload sent to n8n.
+        workflow (str): Workflow identifier (e.g. the webhook URL).
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256(workflow.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(data_payload, sort_keys=True, separators=(",", ":"), default=_json_default).encode("utf-8"))
+    return digest.hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache for AI audit results: an in-memory LRU in front of a
+    directory of JSON files bounded by size and TTL.
+    """
+
+    def __init__(self, directory=DEFAULT_RESPONSES_DIR, memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 disk_bytes=DEFAULT_DISK_BYTES, ttl=DEFAULT_TTL_SECONDS):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+
+        with self._lock:
+            if entry is None or now - entry["created"] > self.ttl:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+            self._remember(key, entry["created"], entry["value"])
+            return entry["value"]
+
+    def put(self, key, value):
+        """
+        Stores value in both tiers and evicts the oldest disk entries above the size cap.
+        """
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+            self._evict_disk()
+        except OSError:
+            # The disk tier is best effort; the memory tier still holds the value
+            pass
+
+    def clear(self):
+        """
+        Empties both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        for entry in self._disk_entries():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _disk_entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if ENTRY_NAME.match(e.name)]
+        except OSError:
+            return []
+
+    def _evict_disk(self):
+        now = time.time()
+        entries = []
+        for entry in self._disk_entries():
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                os.remove(entry.path)
+                self.stats["evictions"] += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+            self.stats["evictions"] += 1
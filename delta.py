@@ -0,0 +1,197 @@
+import datetime
+import hashlib
+import json
+import os
+import re
+
+import pandas as pd
+
+from cache import DEFAULT_CACHE_DIR
+
+# One state file per dataset and workflow (see state_path)
+DEFAULT_STATE_DIR = os.path.join(DEFAULT_CACHE_DIR, "delta")
+
+# Columns identifying an inventory item. API logs are keyed by time window instead.
+KEY_COLUMNS = {
+    "infrastructure": ["hostname"],
+    "mlops": ["model_name", "version"],
+}
+API_WINDOW = "1h"
+# Pillar of the findings about API logs (see n8n_connector.PILLARS)
+API_PILLAR = "Sécurité API"
+
+# --- Fingerprints ---
+def row_keys(df, source, window=API_WINDOW):
+    """
+    Computes the delta key of each row: hostname, 'model_name|version' or the API time window.
+
+    Returns:
+        pd.Series: String keys aligned with df.
+    """
+    if source == "api_logs":
+        return df["timestamp"].dt.floor(window).dt.strftime("%Y-%m-%dT%H:%M:%S").fillna("")
+
+    columns = KEY_COLUMNS[source]
+    keys = df[columns[0]].astype("string").fillna("")
+    for col in columns[1:]:
+        keys = keys + "|" + df[col].astype("string").fillna("")
+    return keys
+
+def _row_hashes(df):
+    # Lists (open_ports) are not hashable by pandas; hash their CSV form instead
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object:
+            series = series.map(lambda v: ";".join(map(str, v)) if isinstance(v, list) else v)
+        columns[col] = series
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False)
+
+def fingerprint(df, source, window=API_WINDOW):
+    """
+    Fingerprints a source per key.
+
+    Row hashes are summed per key (modulo 2**64), so a key's fingerprint
+    changes when any of its rows is added, removed or modified, independently
+    of row order.
+
+    Returns:
+        tuple: (keys, fingerprints) where keys is aligned with df and
+        fingerprints maps each key to a hex digest.
+    """
+    keys = row_keys(df, source, window)
+    if df.empty:
+        return keys, {}
+    sums = _row_hashes(df).groupby(keys.to_numpy()).sum()
+    return keys, {str(k): format(int(v), "016x") for k, v in sums.items()}
+
+def compute_delta(frames, previous, window=API_WINDOW):
+    """
+    Compares the current sources with the fingerprints of the previous run.
+
+    Args:
+        frames (dict): Typed DataFrames keyed by 'infrastructure', 'mlops', 'api_logs'.
+        previous (dict): Fingerprints per source from the previous run (may be empty).
+        window (str): API logs time window.
+
+    Returns:
+        dict: 'frames' (added/changed rows per source with a 'change' column),
+        'removed' (keys gone since the previous run), 'touched' (names of items
+        whose rows were changed or removed), 'touched_pillars' (pillars whose
+        previous findings are all invalidated), 'fingerprints' (to persist)
+        and 'counts' (added/changed/removed per source). When any API window
+        changed, every API window is sent again ('unchanged' rows included):
+        the previous API findings are dropped, so the agent must see them all.
+    """
+    delta = {"frames": {}, "removed": {}, "touched": set(), "touched_pillars": set(), "fingerprints": {}, "counts": {}}
+    for source, df in frames.items():
+        keys, current = fingerprint(df, source, window)
+        before = previous.get(source, {})
+
+        added = {k for k in current if k not in before}
+        changed = {k for k in current if k in before and before[k] != current[k]}
+        removed = sorted(k for k in before if k not in current)
+
+        api_touched = source not in KEY_COLUMNS and bool(added or changed or removed)
+        selected = df.copy() if api_touched else df[keys.isin(added | changed).to_numpy()].copy()
+        selected["change"] = keys[selected.index].map(
+            lambda k: "added" if k in added else "changed" if k in changed else "unchanged"
+        ).to_numpy()
+
+        delta["frames"][source] = selected
+        delta["removed"][source] = removed
+        delta["fingerprints"][source] = current
+        delta["counts"][source] = {"added": len(added), "changed": len(changed), "removed": len(removed)}
+        if source in KEY_COLUMNS:
+            # Findings name items by their first key column (hostname, model_name)
+            delta["touched"].update(k.split("|")[0] for k in changed | set(removed))
+        elif api_touched:
+            # API findings describe the traffic as a whole, not one time window
+            delta["touched_pillars"].add(API_PILLAR)
+    return delta
+
+def has_changes(delta):
+    return any(sum(c.values()) for c in delta["counts"].values())
+
+# --- Findings ---
+def carry_over_findings(previous_findings, touched, touched_pillars=()):
+    """
+    Keeps the previous findings that are still valid.
+
+    A finding is dropped when its text names (as a whole word) an item whose
+    rows changed or disappeared, or when it belongs to a touched pillar; the
+    agent re-audits those from the delta.
+
+    Args:
+        previous_findings (list): Findings of the previous run.
+        touched (set): Names of changed or removed items.
+        touched_pillars (set): Pillars whose findings are all dropped.
+
+    Returns:
+        list: Findings that still apply.
+    """
+    names = [re.escape(name) for name in sorted(touched) if name]
+    # 'server-01' must not match 'server-010'
+    pattern = re.compile(rf"(?<![\w-])(?:{'|'.join(names)})(?![\w-])", re.IGNORECASE) if names else None
+    return [
+        f for f in previous_findings
+        if f.get("pillar") not in touched_pillars
+        and not (pattern and pattern.search(f.get("frap_text", "")))
+    ]
+
+def merge_findings(carried, new_findings):
+    """
+    Concatenates carried-over and new findings, dropping exact duplicates.
+    """
+    seen = set()
+    merged = []
+    for finding in list(carried) + list(new_findings):
+        key = (finding.get("pillar"), finding.get("frap_text"))
+        if key not in seen:
+            seen.add(key)
+            merged.append(finding)
+    return merged
+
+# --- Persistence ---
+def state_path(dataset, workflow="", directory=DEFAULT_STATE_DIR):
+    """
+    Returns the state file of a dataset audited by a workflow.
+
+    Args:
+        dataset (tuple): Identity of the uploads, e.g. their file names (not
+            their content, which changes between incremental runs).
+        workflow (str): Webhook URL(s) the findings come from.
+
+    Returns:
+        str: Path of the JSON state file.
+    """
+    key = hashlib.sha256(json.dumps([list(dataset), workflow], ensure_ascii=False).encode("utf-8")).hexdigest()
+    return os.path.join(directory, f"{key}.json")
+
+def load_state(path):
+    """
+    Loads the fingerprints and findings of the previous run.
+
+    Returns:
+        dict: {'fingerprints': {...}, 'findings': [...], 'updated': str or None}.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"fingerprints": {}, "findings": [], "updated": None}
+
+def save_state(fingerprints, findings, path):
+    """
+    Persists the fingerprints and findings of the current run.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    state = {
+        "fingerprints": fingerprints,
+        "findings": findings,
+        "updated": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
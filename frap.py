@@ -0,0 +1,188 @@
+import functools
+import re
+import unicodedata
+
+# Section key -> FRAP heading, in report order
+SECTIONS = {
+    "contexte": "CONTEXTE",
+    "constat": "CONSTAT",
+    "consequence": "CONSÉQUENCE",
+    "recommandation": "RECOMMANDATION",
+    "norme": "NORME VIOLÉE",
+}
+FRAP_CACHE_SIZE = 4096
+
+# Characters outside Latin-1 (FPDF core fonts), replaced in a single pass
+LATIN1_TABLE = str.maketrans({
+    '\u2013': '-',  # En dash
+    '\u2014': '-',  # Em dash
+    '\u2018': "'",  # Left single quote
+    '\u2019': "'",  # Right single quote
+    '\u201c': '"',  # Left double quote
+    '\u201d': '"',  # Right double quote
+    '\u2022': '*',  # Bullet
+    '\u2026': '...', # Ellipsis
+    '€': 'EUR',
+})
+
+# --- Line Patterns ---
+_MARKDOWN_HEADER = re.compile(r'^#+\s*')          # ### Title
+_BOLD_LINE = re.compile(r'^\*\*(?:(.*)\*\*|\*?)$')  # **Title**
+_NUMBERED_HEADER = re.compile(r'^\d\..')           # 1. Title
+_UPPERCASE_LABEL = re.compile(r'^([^:]{0,39}):')   # CONTEXTE :
+_SECTION_NAME = re.compile(
+    r'^(?:\d+\s*[.)]\s*)?(CONTEXTE|CONSTAT|CONSEQUENCES?|RECOMMANDATIONS?|NORMES?\s+VIOLEES?)\b'
+)
+_LABEL_SEPARATOR = re.compile(r'^[^:]*:\s*')
+# Standards cited in NORME VIOLÉE: ISO/IEC 27001:2013, COBIT 2019 (EDM04), A.10.1.1, ...
+_NORM_REFERENCE = re.compile(
+    r'\b(?:ISO/IEC|ISO|IEC)\s*\d{4,5}(?:-\d+)?(?::\d{4})?'
+    r'|\bCOBIT(?:\s*\d{4})?'
+    r'|\bITIL(?:\s*v?\d)?'
+    r'|\bNIST\s+(?:SP\s+)?\d{3}-\d+'
+    r'|\bRGPD\b|\bGDPR\b'
+    r'|\b[A-Z]\.\d+(?:\.\d+)+'
+    r'|\b(?:EDM|APO|BAI|DSS|MEA)\d{2}\b'
+)
+
+def clean_text(text):
+    """
+    Replaces incompatible characters for Latin-1 encoding.
+    """
+    return text.translate(LATIN1_TABLE).encode('latin-1', 'replace').decode('latin-1')
+
+def _section_key(header):
+    # Accents are folded so 'CONSÉQUENCE' and 'CONSEQUENCE' match alike
+    folded = unicodedata.normalize('NFKD', header.upper()).encode('ascii', 'ignore').decode('ascii')
+    match = _SECTION_NAME.match(folded)
+    if match is None:
+        return None
+    name = match.group(1)
+    for key in SECTIONS:
+        if name.lower().startswith(key):
+            return key
+    return None
+
+def _classify(line):
+    """
+    Returns (is_header, text) for a stripped, non-empty line.
+    """
+    if line.startswith('#'):
+        return True, _MARKDOWN_HEADER.sub('', line)
+    bold = _BOLD_LINE.match(line)
+    if bold:
+        return True, (bold.group(1) or '').strip()
+    if _NUMBERED_HEADER.match(line):
+        return True, line
+    label = _UPPERCASE_LABEL.match(line)
+    return bool(label and label.group(1).isupper()), line
+
+@functools.lru_cache(maxsize=FRAP_CACHE_SIZE)
+def parse_frap(text):
+    """
+    Parses a FRAP text into its section model.
+
+    Memoized on the text, so each finding is scanned once however many times
+    it is rendered (expanders, PDF pages, exports). The returned model is
+    shared between callers and must not be modified.
+
+    Args:
+        text (str): The 'frap_text' of a finding.
+
+    Returns:
+        dict: 'blocks', a tuple of (kind, markdown, latin1) lines where kind is
+        'blank', 'header', 'norm' (the NORME VIOLÉE heading) or 'text';
+        'sections', the plain text of each recognized section keyed as in SECTIONS;
+        'norms', the standard references cited in NORME VIOLÉE.
+    """
+    blocks = []
+    sections = {}
+    current = None
+    for raw in text.split('\n'):
+        line = raw.strip()
+        if not line:
+            blocks.append(('blank', '', ''))
+            if current is not None:
+                sections[current].append('')
+            continue
+
+        is_header, line = _classify(line)
+        line = line.replace('**', '')
+        kind = 'text'
+        if is_header:
+            kind = 'norm' if 'NORME' in line and 'VIOLÉE' in line else 'header'
+            key = _section_key(line)
+            if key is not None:
+                current = key
+                sections.setdefault(key, [])
+                # 'CONTEXTE : text' carries its first line inline
+                inline = _LABEL_SEPARATOR.sub('', line, count=1) if ':' in line else ''
+                if inline:
+                    sections[key].append(inline)
+            elif current is not None:
+                sections[current].append(line)
+            blocks.append((kind, line, clean_text(line)))
+            continue
+
+        if current is not None:
+            sections[current].append(line)
+        # Body lines keep their inline markdown for the UI
+        blocks.append((kind, raw.strip(), clean_text(line)))
+
+    sections = {key: '\n'.join(lines).strip() for key, lines in sections.items()}
+    norms = [' '.join(ref.split()) for ref in _NORM_REFERENCE.findall(sections.get("norme", ""))]
+    return {
+        "blocks": tuple(blocks),
+        "sections": sections,
+        "norms": tuple(dict.fromkeys(norms)),
+    }
+
+# --- Helper Function for Risk Level ---
+def get_risk_level(score):
+    if score > 10:
+        return "CRITIQUE", "🔴", (220, 53, 69) # Red
+    elif score >= 6:
+        return "MAJEUR", "🟠", (255, 193, 7) # Orange/Dark Yellow
+    else:
+        return "MINEUR", "🟢", (40, 167, 69) # Green
+
+def parse_finding(finding):
+    """
+    Returns the section model of a finding (see parse_frap).
+    """
+    return parse_frap(finding.get("frap_text") or "")
+
+def to_markdown(finding):
+    """
+    Renders a finding's FRAP text as Markdown, each heading in bold on its own line.
+    """
+    paragraphs = [[]]
+    for kind, markdown, _ in parse_finding(finding)["blocks"]:
+        if kind == 'text':
+            paragraphs[-1].append(markdown)
+            continue
+        if paragraphs[-1]:
+            paragraphs.append([])
+        if kind != 'blank':
+            paragraphs[-1].append(f"**{markdown}**")
+            paragraphs.append([])
+    return '\n\n'.join('\n'.join(lines) for lines in paragraphs if lines)
+
+def export_finding(finding):
+    """
+    Flattens a finding into an export record with one field per FRAP section.
+
+    Returns:
+        dict: Scoring fields, then one key per section of SECTIONS ('' when absent).
+    """
+    sections = parse_finding(finding)["sections"]
+    record = {
+        "pillar": finding.get("pillar", "Général"),
+        "status": finding.get("status"),
+        "risk_score": finding.get("risk_score", 0),
+        "frequency": finding.get("frequency"),
+        "gravity": finding.get("gravity"),
+    }
+    for key in SECTIONS:
+        record[key] = sections.get(key, "")
+    return record
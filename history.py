@@ -0,0 +1,237 @@
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+
+from cache import DEFAULT_CACHE_DIR
+from frap import parse_finding
+
+DEFAULT_DB_PATH = os.getenv("AUDITS2I_HISTORY_DB", os.path.join(DEFAULT_CACHE_DIR, "history.sqlite3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    environment TEXT,
+    uploads TEXT,
+    findings INTEGER NOT NULL,
+    max_score INTEGER
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    pillar TEXT,
+    status TEXT,
+    frequency INTEGER,
+    gravity INTEGER,
+    risk_score INTEGER,
+    fingerprint TEXT NOT NULL,
+    title TEXT,
+    frap_text TEXT
+);
+CREATE TABLE IF NOT EXISTS finding_norms (
+    finding_id INTEGER NOT NULL REFERENCES findings(id) ON DELETE CASCADE,
+    norm TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_started_at ON runs(started_at);
+CREATE INDEX IF NOT EXISTS findings_run ON findings(run_id);
+CREATE INDEX IF NOT EXISTS findings_pillar_score ON findings(pillar, risk_score);
+CREATE INDEX IF NOT EXISTS findings_score ON findings(risk_score);
+CREATE INDEX IF NOT EXISTS findings_fingerprint ON findings(fingerprint, run_id, risk_score);
+CREATE INDEX IF NOT EXISTS finding_norms_norm ON finding_norms(norm);
+CREATE INDEX IF NOT EXISTS finding_norms_finding ON finding_norms(finding_id);
+"""
+
+def finding_fingerprint(finding):
+    """
+    Identifies a finding across runs: its pillar and its CONSTAT section
+    (the whole text when the FRAP has no CONSTAT), case and spacing ignored.
+    """
+    model = parse_finding(finding)
+    evidence = model["sections"].get("constat") or finding.get("frap_text") or ""
+    key = f"{finding.get('pillar', '')}\0{' '.join(evidence.lower().split())}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+def _title(finding):
+    # First line of the evidence, shown in the recurring findings table
+    sections = parse_finding(finding)["sections"]
+    text = sections.get("constat") or sections.get("contexte") or finding.get("frap_text") or ""
+    return text.strip().split("\n")[0][:160]
+
+class HistoryStore:
+    """
+    SQLite history of audit runs and their findings.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Shared by the Streamlit sessions; writes are serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    # --- Writes ---
+    def record_run(self, findings, source="app", environment=None, uploads=None, started_at=None):
+        """
+        Stores an audit run and its findings in one transaction.
+
+        Args:
+            findings (list): Findings returned by send_to_n8n.
+            source (str): 'app' or 'batch'.
+            environment (str, optional): Audited environment (batch runs).
+            uploads (str, optional): Digest of the audited files.
+            started_at (datetime, optional): Defaults to now.
+
+        Returns:
+            int: The run id.
+        """
+        started_at = (started_at or datetime.datetime.now()).isoformat(timespec="seconds")
+        scores = [f.get("risk_score") for f in findings if isinstance(f.get("risk_score"), (int, float))]
+        rows = [
+            (
+                f.get("pillar"), f.get("status"), f.get("frequency"), f.get("gravity"), f.get("risk_score"),
+                finding_fingerprint(f), _title(f), f.get("frap_text"),
+            )
+            for f in findings
+        ]
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (started_at, source, environment, uploads, findings, max_score) VALUES (?, ?, ?, ?, ?, ?)",
+                (started_at, source, environment, uploads, len(findings), max(scores) if scores else None),
+            )
+            run_id = cursor.lastrowid
+            for row, finding in zip(rows, findings):
+                cursor = self._conn.execute(
+                    "INSERT INTO findings (run_id, pillar, status, frequency, gravity, risk_score, fingerprint, title, frap_text) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id,) + row,
+                )
+                norms = parse_finding(finding)["norms"]
+                if norms:
+                    self._conn.executemany(
+                        "INSERT INTO finding_norms (finding_id, norm) VALUES (?, ?)",
+                        [(cursor.lastrowid, norm) for norm in norms],
+                    )
+        return run_id
+
+    # --- Queries ---
+    def recent_runs(self, limit=20, environment=None):
+        """
+        Returns the latest runs, newest first.
+        """
+        where, params = ("WHERE environment = ?", (environment,)) if environment else ("", ())
+        return self._query(
+            f"SELECT * FROM runs {where} ORDER BY started_at DESC, id DESC LIMIT ?", params + (limit,)
+        )
+
+    def environments(self):
+        return [row["environment"] for row in self._query(
+            "SELECT DISTINCT environment FROM runs WHERE environment IS NOT NULL ORDER BY environment"
+        )]
+
+    def score_trend(self, runs=50, environment=None):
+        """
+        Returns the score per pillar of the latest runs, oldest first.
+
+        Returns:
+            list: Dicts with run_id, started_at, pillar, findings, max_score, avg_score.
+        """
+        where, params = ("WHERE environment = ?", (environment,)) if environment else ("", ())
+        return self._query(
+            f"""
+            WITH latest AS (
+                SELECT id, started_at FROM runs {where}
+                ORDER BY started_at DESC, id DESC LIMIT ?
+            )
+            SELECT latest.id AS run_id, latest.started_at, f.pillar,
+                   COUNT(*) AS findings, MAX(f.risk_score) AS max_score, AVG(f.risk_score) AS avg_score
+            FROM latest JOIN findings f ON f.run_id = latest.id
+            GROUP BY latest.id, f.pillar
+            ORDER BY latest.started_at, latest.id, f.pillar
+            """,
+            params + (runs,),
+        )
+
+    def top_recurring(self, limit=10, pillar=None, min_score=None, environment=None):
+        """
+        Returns the findings seen in the most runs (of environment, when given).
+
+        Returns:
+            list: Dicts with fingerprint, pillar, title, runs (distinct runs),
+            occurrences, max_score, first_seen and last_seen.
+        """
+        clauses, params = [], []
+        if pillar:
+            clauses.append("f.pillar = ?")
+            params.append(pillar)
+        if min_score is not None:
+            clauses.append("f.risk_score >= ?")
+            params.append(min_score)
+        if environment:
+            clauses.append("f.run_id IN (SELECT id FROM runs WHERE environment = ?)")
+            params.append(environment)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # Aggregated on the covering fingerprint index; run ids grow with
+        # time, so the first and last runs give the first and last dates.
+        return self._query(
+            f"""
+            WITH recurring AS (
+                SELECT f.fingerprint, COUNT(DISTINCT f.run_id) AS runs, COUNT(*) AS occurrences,
+                       MAX(f.risk_score) AS max_score, MIN(f.run_id) AS first_run,
+                       MAX(f.run_id) AS last_run, MAX(f.id) AS latest_id
+                FROM findings f
+                {where}
+                GROUP BY f.fingerprint
+                ORDER BY runs DESC, max_score DESC
+                LIMIT ?
+            )
+            SELECT recurring.fingerprint, latest.pillar, latest.title, recurring.runs,
+                   recurring.occurrences, recurring.max_score,
+                   first.started_at AS first_seen, last.started_at AS last_seen
+            FROM recurring
+            JOIN findings latest ON latest.id = recurring.latest_id
+            JOIN runs first ON first.id = recurring.first_run
+            JOIN runs last ON last.id = recurring.last_run
+            ORDER BY recurring.runs DESC, recurring.max_score DESC
+            """,
+            tuple(params) + (limit,),
+        )
+
+    def norm_counts(self, limit=10, environment=None):
+        """
+        Returns the most cited standard references and their number of findings
+        (in the runs of environment, when given).
+        """
+        if not environment:
+            return self._query(
+                "SELECT norm, COUNT(*) AS findings FROM finding_norms GROUP BY norm ORDER BY findings DESC, norm LIMIT ?",
+                (limit,),
+            )
+        return self._query(
+            """
+            SELECT n.norm, COUNT(*) AS findings
+            FROM finding_norms n
+            JOIN findings f ON f.id = n.finding_id
+            JOIN runs r ON r.id = f.run_id
+            WHERE r.environment = ?
+            GROUP BY n.norm
+            ORDER BY findings DESC, n.norm
+            LIMIT ?
+            """,
+            (environment, limit),
+        )
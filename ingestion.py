@@ -0,0 +1,264 @@
+import json
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Rows per chunk read from an uploaded CSV. Peak memory of the ingestion stage
+# is bounded by this value rather than by the size of the file.
+DEFAULT_CHUNKSIZE = 100_000
+
+# Columns stored as pandas categoricals (low cardinality, heavily repeated).
+CATEGORICAL_COLUMNS = {
+    "infrastructure": ["os"],
+    "mlops": ["model_name"],
+    "api_logs": ["endpoint", "method"],
+}
+
+# --- Column Parsers ---
+def parse_response_time(series):
+    """
+    Converts response times such as '120ms', '1.2s' or '85' into integer milliseconds.
+
+    Args:
+        series (pd.Series): Raw response time strings.
+
+    Returns:
+        pd.Series: Nullable Int32 series (missing or unparsable values become <NA>).
+    """
+    parts = series.astype("string").str.extract(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*$", expand=True)
+    values = pd.to_numeric(parts[0], errors="coerce")
+    values = values.where(parts[1] != "s", values * 1000)
+    return values.round().astype("Int32")
+
+def parse_open_ports(series):
+    """
+    Converts port lists such as '22;80;443' into lists of integers.
+
+    Args:
+        series (pd.Series): Raw semicolon separated port strings.
+
+    Returns:
+        pd.Series: Object series holding one list of ints per row.
+    """
+    split = series.astype("string").fillna("").str.split(";")
+    return pd.Series(
+        [[int(p) for p in ports if p.strip().isdigit()] for ports in split],
+        index=series.index,
+        dtype=object,
+    )
+
+def parse_timestamp(series):
+    """
+    Converts ISO-like timestamps into datetime64 (invalid values become NaT).
+    """
+    return pd.to_datetime(series, errors="coerce")
+
+def _parse_infrastructure(chunk):
+    if "open_ports" in chunk.columns:
+        chunk["open_ports"] = parse_open_ports(chunk["open_ports"])
+    return chunk
+
+def _parse_mlops(chunk):
+    if "accuracy" in chunk.columns:
+        chunk["accuracy"] = pd.to_numeric(chunk["accuracy"], errors="coerce")
+    if "last_trained" in chunk.columns:
+        chunk["last_trained"] = parse_timestamp(chunk["last_trained"])
+    return chunk
+
+def _parse_api_logs(chunk):
+    if "timestamp" in chunk.columns:
+        chunk["timestamp"] = parse_timestamp(chunk["timestamp"])
+    if "status_code" in chunk.columns:
+        chunk["status_code"] = pd.to_numeric(chunk["status_code"], errors="coerce").astype("Int16")
+    if "response_time" in chunk.columns:
+        chunk["response_time"] = parse_response_time(chunk["response_time"])
+    return chunk
+
+PARSERS = {
+    "infrastructure": _parse_infrastructure,
+    "mlops": _parse_mlops,
+    "api_logs": _parse_api_logs,
+}
+
+# --- Chunked Reading ---
+def iter_source(file, source, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Reads a CSV source in bounded-size chunks and yields typed DataFrames.
+
+    Consumers that only need one pass over the data (aggregation, filtering)
+    should iterate this directly so that memory stays constant with file size.
+
+    Args:
+        file (str or file-like): Path or uploaded file object.
+        source (str): One of 'infrastructure', 'mlops' or 'api_logs'.
+        chunksize (int): Number of rows per chunk.
+
+    Yields:
+        pd.DataFrame: Parsed chunk with real dtypes.
+    """
+    parser = PARSERS[source]
+    categorical = {col: "category" for col in CATEGORICAL_COLUMNS.get(source, [])}
+
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+    reader = pd.read_csv(file, chunksize=chunksize, dtype=categorical)
+    with reader:
+        for chunk in reader:
+            yield parser(chunk)
+
+def _concat_chunks(chunks):
+    """
+    Concatenates typed chunks, unioning categoricals instead of falling back to object dtype.
+    """
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True))
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+def load_source(file, source, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Loads a whole CSV source as one compact typed DataFrame.
+
+    Args:
+        file (str or file-like): Path or uploaded file object.
+        source (str): One of 'infrastructure', 'mlops' or 'api_logs'.
+        chunksize (int): Number of rows per chunk.
+
+    Returns:
+        pd.DataFrame: Parsed DataFrame.
+    """
+    return _concat_chunks(list(iter_source(file, source, chunksize)))
+
+def load_sources(infra_file, mlops_file, api_file, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Loads the three audit sources.
+
+    Returns:
+        dict: DataFrames keyed by payload name ('infrastructure', 'mlops', 'api_logs').
+    """
+    return {
+        "infrastructure": load_source(infra_file, "infrastructure", chunksize),
+        "mlops": load_source(mlops_file, "mlops", chunksize),
+        "api_logs": load_source(api_file, "api_logs", chunksize),
+    }
+
+# --- Payload Conversion ---
+def _format_ms(value):
+    return f"{value}ms"
+
+def to_records(df):
+    """
+    Converts a typed DataFrame back into JSON-ready row dicts.
+
+    Typed columns are rendered in their original CSV representation so the n8n
+    workflow receives the same wire format as before ('120ms', '22;80;443',
+    ISO timestamps). Missing values become empty strings.
+
+    Args:
+        df (pd.DataFrame): Parsed DataFrame.
+
+    Returns:
+        list: One dict per row.
+    """
+    out = {}
+    for col in df.columns:
+        series = df[col]
+        if col == "response_time":
+            series = series.map(_format_ms, na_action="ignore")
+        elif col == "open_ports":
+            series = series.map(lambda ports: ";".join(map(str, ports)))
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            date_only = (series.dropna() == series.dropna().dt.normalize()).all()
+            series = series.dt.strftime("%Y-%m-%d" if date_only else "%Y-%m-%dT%H:%M:%S")
+        series = series.astype(object)
+        out[col] = series.where(series.notna(), "")
+
+    return pd.DataFrame(out, index=df.index).to_dict(orient="records")
+
+# Units of the typed columns in the columnar wire format
+COLUMN_UNITS = {"response_time": "ms"}
+# Rows serialized at once by iter_frame_json (bounds the size of each piece)
+SERIALIZE_SLICE_ROWS = 100_000
+# Payload key selecting the layout of DataFrame values: absent or 'records' keeps
+# the row lists n8n workflows expect, 'columns' opts into iter_frame_json
+WIRE_FORMAT_KEY = "wire_format"
+WIRE_FORMATS = ("records", "columns")
+
+def _column_json(series):
+    # Nullable integers with missing values would be rendered as floats by to_json
+    if pd.api.types.is_integer_dtype(series.dtype) and series.hasnans:
+        return json.dumps(series.to_numpy(dtype=object, na_value=None).tolist(), separators=(",", ":"))
+    # Missing values become null during serialization (no fillna copy)
+    return series.to_json(orient="values", date_format="iso")
+
+def iter_frame_json(df, slice_rows=SERIALIZE_SLICE_ROWS):
+    """
+    Serializes a typed DataFrame as a columnar JSON object, piece by piece.
+
+    Layout: {"format": "columns", "length": n, "units": {...},
+    "columns": {"col": [values...], ...}}. Each column is serialized by
+    pandas' C encoder in slices of slice_rows rows, so no per-row dict is
+    built and at most one slice of one column is held as text at a time.
+    Missing values are written as null, timestamps in ISO 8601, open ports
+    as arrays of integers and response times as integer milliseconds.
+
+    Args:
+        df (pd.DataFrame): Parsed DataFrame.
+        slice_rows (int): Rows serialized per piece.
+
+    Yields:
+        str: Consecutive pieces of the JSON text.
+    """
+    units = {col: unit for col, unit in COLUMN_UNITS.items() if col in df.columns}
+    yield (
+        f'{{"format":"columns","length":{len(df)},'
+        f'"units":{json.dumps(units, separators=(",", ":"))},"columns":{{'
+    )
+    for position, col in enumerate(df.columns):
+        yield ("," if position else "") + json.dumps(str(col), ensure_ascii=False) + ":["
+        series = df[col]
+        for start in range(0, len(df), slice_rows):
+            values = _column_json(series.iloc[start:start + slice_rows])
+            # Slices are joined inside the column array
+            yield ("," if start else "") + values[1:-1]
+        yield "]"
+    yield "}}"
+
+def iter_frame_records_json(df, slice_rows=SERIALIZE_SLICE_ROWS):
+    """
+    Serializes a typed DataFrame as a JSON array of row records (see
+    to_records), piece by piece.
+
+    This is the original wire format; only one slice of slice_rows rows is
+    converted to dicts at a time.
+
+    Yields:
+        str: Consecutive pieces of the JSON text.
+    """
+    yield "["
+    for start in range(0, len(df), slice_rows):
+        rows = json.dumps(to_records(df.iloc[start:start + slice_rows]), ensure_ascii=False,
+                          separators=(",", ":"), default=str)
+        yield ("," if start else "") + rows[1:-1]
+    yield "]"
+
+def frame_encoder(wire_format=None):
+    """
+    Returns the serializer of DataFrame values for a payload wire format
+    (None stands for 'records').
+    """
+    if wire_format in (None, "records"):
+        return iter_frame_records_json
+    if wire_format == "columns":
+        return iter_frame_json
+    raise ValueError(f"Unknown wire format: {wire_format!r} (expected one of {', '.join(WIRE_FORMATS)})")
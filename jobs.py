@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cache import DEFAULT_CACHE_DIR
+from telemetry import bind
+
+DEFAULT_JOBS_DIR = os.path.join(DEFAULT_CACHE_DIR, "jobs")
+DEFAULT_JOB_WORKERS = int(os.getenv("AUDITS2I_JOB_WORKERS", "4"))
+DEFAULT_MAX_JOBS = 200
+
+class JobQueue:
+    """
+    Bounded in-process worker pool for audits submitted from the UI.
+
+    A job runs a function returning an iterable; each item it yields is
+    appended to the job as soon as it is produced, so pollers see partial
+    results. Finished jobs are written to the jobs directory and can be
+    fetched by id after a page reload or a server restart.
+
+    Job states: 'queued', 'running', 'done' or 'failed'.
+    """
+
+    def __init__(self, directory=DEFAULT_JOBS_DIR, workers=DEFAULT_JOB_WORKERS, max_jobs=DEFAULT_MAX_JOBS):
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audit-job")
+        self._jobs = OrderedDict()
+        self._queued = []
+        self._lock = threading.Lock()
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    # --- Submission ---
+    def submit(self, fn, *args, on_done=None, meta=None, **kwargs):
+        """
+        Queues fn(*args, **kwargs) and returns immediately.
+
+        Args:
+            fn (callable): Returns an iterable of JSON-serializable items.
+            on_done (callable, optional): Called in the worker with the items
+                once fn succeeded; returns a list of notes shown with the results.
+            meta (dict, optional): JSON-serializable data kept with the job.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "submitted": time.time(),
+            "started": None,
+            "finished": None,
+            "items": [],
+            "notes": [],
+            "error": None,
+            "meta": meta or {},
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._queued.append(job_id)
+            self._evict()
+        # Spans of the job go to the submitter's recorder (see telemetry.bind)
+        self._pool.submit(bind(self._run), job, fn, args, kwargs, on_done)
+        return job_id
+
+    def _run(self, job, fn, args, kwargs, on_done):
+        with self._lock:
+            self._queued.remove(job["id"])
+            job["status"] = "running"
+            job["started"] = time.time()
+        try:
+            for item in fn(*args, **kwargs):
+                with self._lock:
+                    job["items"].append(item)
+            if on_done is not None:
+                job["notes"] = list(on_done(list(job["items"])) or [])
+            status = "done"
+        except Exception as e:
+            job["error"] = f"{type(e).__name__}: {e}"
+            status = "failed"
+        with self._lock:
+            job["status"] = status
+            job["finished"] = time.time()
+        self._save(job)
+
+    # --- Polling ---
+    def get(self, job_id):
+        """
+        Returns a snapshot of a job, or None when the id is unknown.
+
+        Queued jobs carry their 'position' in the queue (1 = next to start).
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                snapshot = dict(job, items=list(job["items"]), notes=list(job["notes"]))
+                if job["status"] == "queued":
+                    snapshot["position"] = self._queued.index(job_id) + 1
+                return snapshot
+        # Finished before a restart, or evicted from memory
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        """
+        Returns the number of jobs per state among those held in memory.
+        """
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    # --- Persistence ---
+    def _save(self, job):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(job["id"]) + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self._path(job["id"]))
+            self._prune()
+        except OSError:
+            # The job stays available in memory
+            pass
+
+    def _prune(self):
+        # Oldest result files beyond max_jobs are removed
+        files = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in files[:max(0, len(files) - self.max_jobs)]:
+            os.remove(entry.path)
+
+    def _evict(self):
+        # Finished jobs beyond max_jobs are dropped from memory (still on disk)
+        excess = len(self._jobs) - self.max_jobs
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id]["status"] in ("done", "failed"):
+                del self._jobs[job_id]
+                excess -= 1
@@ -1,57 +1,429 @@
 import requests
+import codecs
+import gzip
 import json
 import os
+import time
+import uuid
+import zlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
+from cache import payload_digest
+from replicas import HedgeCancelled, ReplicaPool, get_replica_pool, is_replica_failure, parse_webhook_urls
+from telemetry import bind, span
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 
-def send_to_n8n(data_payload, webhook_url=None):
+# Mock response for testing when no URL is provided
+MOCK_FINDINGS = [
+    {
+        "status": "Critique",
+        "risk_score": 12,
+        "pillar": "Infrastructure",
+        "frequency": 3,
+        "gravity": 4,
+        "frap_text": "1. CONTEXTE :\nUn audit de sécurité automatisé a été réalisé sur l'infrastructure cloud de production.\n\n2. CONSTAT (Preuves) :\nUn bucket S3 nommé 'prod-data-backup' est actuellement non chiffré. Les logs d'accès montrent des tentatives de lecture anonymes.\n\n3. CONSÉQUENCE :\nRisque élevé de fuite de données confidentielles (PII, secrets industriels), pouvant entraîner des sanctions RGPD et une perte de réputation.\n\n4. RECOMMANDATION :\nActiver le chiffrement côté serveur (SSE-S3 ou SSE-KMS) sur le bucket immédiatement et restreindre les politiques d'accès public.\n\n5. NORME VIOLÉE :\nISO/IEC 27001:2013 - Contrôle A.10.1.1 (Politique de cryptographie)."
+    },
+    {
+        "status": "Majeur",
+        "risk_score": 9,
+        "pillar": "MLOps",
+        "frequency": 5,
+        "gravity": 5,
+        "frap_text": "1. CONTEXTE :\nSurveillance continue des performances des modèles de machine learning en production.\n\n2. CONSTAT (Preuves) :\nLe modèle 'Fraud_Detection_v2' présente une dérive (drift) significative des données d'entrée par rapport au jeu d'entraînement de référence (Score KS > 0.15).\n\n3. CONSÉQUENCE :\nDégradation de la précision des prédictions, augmentant les faux négatifs dans la détection de fraude.\n\n4. RECOMMANDATION :\nDéclencher un réentraînement immédiat du modèle avec les données des 30 derniers jours et mettre à jour le pipeline de validation.\n\n5. NORME VIOLÉE :\nCOBIT 2019 (EDM04 - Optimisation des Ressources)."
+    },
+    {
+        "status": "Majeur",
+        "risk_score": 8,
+        "pillar": "Sécurité API",
+        "frequency": 2,
+        "gravity": 3,
+        "frap_text": "1. CONTEXTE :\nAnalyse des configurations d'authentification des endpoints API exposés.\n\n2. CONSTAT (Preuves) :\nL'endpoint '/api/v1/admin' permet l'authentification par simple clé API sans rotation forcée ni MFA.\n\n3. CONSÉQUENCE :\nPotentiel d'accès non autorisé élevé en cas de fuite de la clé API. Manque de traçabilité forte des actions administratives.\n\n4. RECOMMANDATION :\nImplémenter l'authentification OAuth2 avec MFA pour tous les endpoints administratifs.\n\n5. NORME VIOLÉE :\nISO/IEC 25010 (Efficacité de performance - Comportement temporel)."
+    }
+]
+
+# --- Transport Settings ---
+DEFAULT_TIMEOUT = 30
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+GZIP_LEVEL = 3
+MAX_PARALLEL_BATCHES = 4
+# Size of the chunks written to the socket when streaming a body
+STREAM_CHUNK_BYTES = 256 * 1024
+# Response types parsed as one JSON value per line (otherwise a JSON array)
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+# Concurrent webhook calls allowed across the whole process (all sessions, jobs and pillars)
+MAX_INFLIGHT = int(os.getenv("N8N_MAX_INFLIGHT", "8"))
+
+_session = None
+_inflight = threading.BoundedSemaphore(MAX_INFLIGHT)
+
+def set_max_inflight(limit):
+    """
+    Changes the process-wide cap on concurrent webhook calls.
+
+    Calls already holding a slot release it on their original semaphore.
+    """
+    global _inflight
+    _inflight = threading.BoundedSemaphore(limit)
+
+class _CallSlot:
+    # Holds one of the MAX_INFLIGHT slots for the duration of a webhook call
+    __slots__ = ("timing", "semaphore")
+
+    def __init__(self, timing):
+        self.timing = timing
+        self.semaphore = _inflight
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.semaphore.acquire()
+        self.timing.set(slot_wait_seconds=time.perf_counter() - start)
+        return self
+
+    def __exit__(self, *exc):
+        self.semaphore.release()
+        return False
+
+def _try_slot():
+    # Extra slot for a hedged copy, without waiting (see ReplicaPool.request)
+    semaphore = _inflight
+    if not semaphore.acquire(blocking=False):
+        return None
+    return semaphore.release
+
+def get_session():
+    """
+    Returns the process-wide requests.Session (persistent connection pool).
+    """
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+# --- Payload Encoding ---
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def _is_frame(value):
+    # Duck-typed so the connector does not import pandas for dict payloads
+    return hasattr(value, "columns") and hasattr(value, "iloc")
+
+def iter_json_body(data_payload):
+    """
+    Serializes a payload piece by piece. DataFrame values are written as row
+    records, or in the columnar layout of ingestion.iter_frame_json when the
+    payload sets 'wire_format': 'columns'; other values as usual.
+
+    Yields:
+        str: Consecutive pieces of the JSON text.
+    """
+    from ingestion import WIRE_FORMAT_KEY, frame_encoder
+
+    encode = frame_encoder(data_payload.get(WIRE_FORMAT_KEY))
+    yield "{"
+    for position, (key, value) in enumerate(data_payload.items()):
+        yield ("," if position else "") + _dumps(key) + ":"
+        if _is_frame(value):
+            yield from encode(value)
+        else:
+            yield _dumps(value)
+    yield "}"
+
+class StreamBody:
+    """
+    A JSON body serialized while it is sent (chunked transfer encoding), so
+    the full text is never held in memory. It can be iterated again for retries.
+    """
+
+    def __init__(self, data_payload):
+        self.data_payload = data_payload
+        self.bytes_sent = 0
+
+    def chunks(self, compress=True, chunk_bytes=STREAM_CHUNK_BYTES):
+        """
+        Yields the encoded (and optionally gzip-compressed) body in chunks.
+        """
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+        self.bytes_sent = 0
+        pending, size = [], 0
+        for piece in iter_json_body(self.data_payload):
+            pending.append(piece.encode("utf-8"))
+            size += len(pending[-1])
+            if size >= chunk_bytes:
+                chunk = b"".join(pending)
+                pending, size = [], 0
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                if chunk:
+                    self.bytes_sent += len(chunk)
+                    yield chunk
+        chunk = b"".join(pending)
+        if compressor is not None:
+            chunk = compressor.compress(chunk) + compressor.flush()
+        if chunk:
+            self.bytes_sent += len(chunk)
+            yield chunk
+
+def _frame_batches(data_payload, max_batch_bytes, sample_rows=1000):
+    """
+    Splits the DataFrame values of a payload into row slices whose estimated
+    serialized size stays under max_batch_bytes (one slice per body).
+    """
+    from ingestion import WIRE_FORMAT_KEY, frame_encoder
+
+    encode = frame_encoder(data_payload.get(WIRE_FORMAT_KEY))
+    context = {k: v for k, v in data_payload.items() if not _is_frame(v)}
+    context_bytes = len(_dumps(context).encode("utf-8"))
+    batches = []
+    for key, df in data_payload.items():
+        if not _is_frame(df) or df.empty:
+            continue
+        # Bytes per row estimated from the serialized head of the frame
+        sample = df.iloc[:sample_rows]
+        row_bytes = len("".join(encode(sample)).encode("utf-8")) / len(sample)
+        rows = max(1, int((max_batch_bytes - context_bytes) / row_bytes))
+        for start in range(0, len(df), rows):
+            batches.append({key: df.iloc[start:start + rows]})
+
+    if len(batches) <= 1:
+        return [StreamBody(data_payload)]
+    batch_id = uuid.uuid4().hex
+    return [
+        StreamBody({**context, **frames, "batch": {"id": batch_id, "index": index, "count": len(batches)}})
+        for index, frames in enumerate(batches)
+    ]
+
+def build_batches(data_payload, max_batch_bytes=None):
+    """
+    Serializes the payload into one or more JSON bodies.
+
+    List-valued keys (the row lists) are split so that each body stays under
+    max_batch_bytes; every other key is repeated in each batch as context.
+    Each row is serialized exactly once. When more than one body is produced,
+    each carries a 'batch' object with a shared id, its index and the count.
+
+    Payloads holding DataFrames are not serialized here: each body is a
+    StreamBody written while it is sent (see iter_json_body), and
+    max_batch_bytes splits the frames into row slices (other values are
+    repeated as context).
+
+    Args:
+        data_payload (dict): The data to send.
+        max_batch_bytes (int, optional): Size bound per body. None sends a single body.
+
+    Returns:
+        list: Encoded (UTF-8) JSON bodies, or StreamBody objects for DataFrame payloads.
+    """
+    if isinstance(data_payload, dict) and any(_is_frame(v) for v in data_payload.values()):
+        if not max_batch_bytes:
+            return [StreamBody(data_payload)]
+        return _frame_batches(data_payload, max_batch_bytes)
+
+    if not max_batch_bytes or not isinstance(data_payload, dict):
+        return [_dumps(data_payload).encode("utf-8")]
+
+    context = {k: v for k, v in data_payload.items() if not isinstance(v, list)}
+    context_json = _dumps(context)[1:-1]
+    row_keys = [k for k, v in data_payload.items() if isinstance(v, list)]
+
+    # Each batch is a dict: key -> list of serialized rows
+    batches = [{}]
+    size = len(context_json)
+    for key in row_keys:
+        for row in data_payload[key]:
+            row_json = _dumps(row)
+            if size + len(row_json) > max_batch_bytes and any(batches[-1].values()):
+                batches.append({})
+                size = len(context_json)
+            batches[-1].setdefault(key, []).append(row_json)
+            size += len(row_json) + 1
+
+    batch_id = uuid.uuid4().hex
+    bodies = []
+    for index, rows in enumerate(batches):
+        parts = [context_json] if context_json else []
+        for key in row_keys:
+            parts.append(f"{_dumps(key)}:[{','.join(rows.get(key, []))}]")
+        if len(batches) > 1:
+            parts.append('"batch":' + _dumps({"id": batch_id, "index": index, "count": len(batches)}))
+        bodies.append(("{" + ",".join(parts) + "}").encode("utf-8"))
+    return bodies
+
+# --- HTTP ---
+def _open(url, body, compress, timeout, max_retries, backoff, timing, stream=False):
+    """
+    POSTs a body with retries and returns the successful response (see post_json).
+    """
+    headers = {"Content-Type": "application/json"}
+    if stream:
+        headers["Accept"] = ", ".join(NDJSON_TYPES + ("application/json",))
+    streamed = isinstance(body, StreamBody)
+    if compress:
+        if not streamed:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    if not streamed:
+        timing.set(bytes_out=len(body))
+
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        timing.set(attempts=attempt + 1)
+        try:
+            data = body.chunks(compress) if streamed else body
+            response = session.post(url, data=data, headers=headers, timeout=timeout, stream=stream)
+            if streamed:
+                timing.set(bytes_out=body.bytes_sent)
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                response.close()
+                time.sleep(backoff * 2 ** attempt)
+                continue
+            response.raise_for_status()
+            return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= max_retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+def _is_ndjson(response):
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    return content_type in NDJSON_TYPES
+
+def _resolve(webhook_url):
+    """
+    Returns (target, workflow key) for a webhook setting: a single URL, or a
+    ReplicaPool when several comma-separated URLs are given. (None, '') when unset.
+    """
+    urls = parse_webhook_urls(webhook_url or os.getenv("N8N_WEBHOOK_URL"))
+    if not urls:
+        return None, ""
+    if len(urls) == 1:
+        return urls[0], urls[0]
+    return get_replica_pool(urls), ",".join(urls)
+
+def post_json(url, body, compress=True, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS,
+              hedge=False):
+    """
+    POSTs an encoded JSON body, retrying transient failures with exponential backoff.
+
+    Args:
+        url (str or ReplicaPool): Target URL, or replicas to balance over (a
+            failed attempt is retried on another replica).
+        body (bytes or StreamBody): Encoded JSON body, or a body streamed with
+            chunked transfer encoding (serialized again on each attempt).
+        compress (bool): Send the body gzip-compressed (Content-Encoding: gzip).
+        timeout (float): Per-attempt timeout in seconds.
+        max_retries (int): Retries after the first attempt on connection errors,
+            timeouts and 429/5xx responses.
+        backoff (float): Base delay; attempt n waits backoff * 2**n seconds.
+        hedge (bool): With replicas, send a second copy to another replica when
+            the first has not answered after the pool's p95 latency.
+
+    Returns:
+        The decoded JSON response (a list of items for an NDJSON response).
+
+    Raises:
+        requests.exceptions.RequestException: When all attempts failed.
+        json.JSONDecodeError: When the response is not valid JSON.
+    """
+    with span("n8n.post") as timing, _CallSlot(timing):
+        if isinstance(url, ReplicaPool):
+            answered = threading.Event()
+            opened = []
+
+            def attempt(target):
+                response = _open(target, body, compress, timeout, 0, backoff, timing, stream=True)
+                opened.append(response)
+                try:
+                    if answered.is_set():
+                        raise HedgeCancelled(target)
+                    # Read here so the replica's latency covers the whole answer
+                    response.content
+                except Exception:
+                    response.close()
+                    if answered.is_set():
+                        raise HedgeCancelled(target)
+                    raise
+                return response
+            response = url.request(attempt, retries=max_retries, backoff=backoff, hedge=hedge, hedge_slot=_try_slot)
+            # The slower hedged copy stops reading its answer (or closes it on arrival)
+            answered.set()
+            for other in opened:
+                if other is not response:
+                    other.close()
+        else:
+            response = _open(url, body, compress, timeout, max_retries, backoff, timing)
+        timing.set(bytes_in=len(response.content))
+    if _is_ndjson(response):
+        return list(iter_json_items([response.content], ndjson=True))
+    return json.loads(response.content)
+
+def send_to_n8n(data_payload, webhook_url=None, compress=True, max_batch_bytes=None, cache=None, hedge=False):
     """
     Sends the data payload to the n8n webhook.
 
     Args:
-        data_payload (dict): The data to send (converted to JSON).
-        webhook_url (str, optional): The webhook URL. Defaults to env var N8N_WEBHOOK_URL.
+        data_payload (dict): The data to send (converted to JSON). Values may be
+            typed DataFrames, which are streamed while sent (see iter_json_body).
+        webhook_url (str or list, optional): The webhook URL. Defaults to env var N8N_WEBHOOK_URL.
+            Several URLs (a list or a comma-separated string) are n8n replicas:
+            calls are balanced over them with failover (see replicas.ReplicaPool).
+        compress (bool): Gzip-compress request bodies.
+        max_batch_bytes (int, optional): Split large payloads into batches of at most
+            this many (uncompressed) bytes. Findings of all batches are merged.
+        cache (cache.ResponseCache, optional): Returns the stored findings when the same
+            payload was already sent to the same webhook. Errors are never cached.
+        hedge (bool): With replicas, hedge slow calls on a second replica.
 
     Returns:
-        dict: The JSON response from n8n or an error dictionary.
+        list: The findings returned by n8n, or an error dictionary.
     """
-    url = webhook_url or os.getenv("N8N_WEBHOOK_URL")
+    url, workflow = _resolve(webhook_url)
 
-    if not url:
+    if url is None:
         # Mock response for testing when no URL is provided
-        return [
-            {
-                "status": "Critique",
-                "risk_score": 12,
-                "pillar": "Infrastructure",
-                "frequency": 3,
-                "gravity": 4,
-                "frap_text": "1. CONTEXTE :\nUn audit de sécurité automatisé a été réalisé sur l'infrastructure cloud de production.\n\n2. CONSTAT (Preuves) :\nUn bucket S3 nommé 'prod-data-backup' est actuellement non chiffré. Les logs d'accès montrent des tentatives de lecture anonymes.\n\n3. CONSÉQUENCE :\nRisque élevé de fuite de données confidentielles (PII, secrets industriels), pouvant entraîner des sanctions RGPD et une perte de réputation.\n\n4. RECOMMANDATION :\nActiver le chiffrement côté serveur (SSE-S3 ou SSE-KMS) sur le bucket immédiatement et restreindre les politiques d'accès public.\n\n5. NORME VIOLÉE :\nISO/IEC 27001:2013 - Contrôle A.10.1.1 (Politique de cryptographie)."
-            },
-            {
-                "status": "Majeur",
-                "risk_score": 9,
-                "pillar": "MLOps",
-                "frequency": 5,
-                "gravity": 5,
-                "frap_text": "1. CONTEXTE :\nSurveillance continue des performances des modèles de machine learning en production.\n\n2. CONSTAT (Preuves) :\nLe modèle 'Fraud_Detection_v2' présente une dérive (drift) significative des données d'entrée par rapport au jeu d'entraînement de référence (Score KS > 0.15).\n\n3. CONSÉQUENCE :\nDégradation de la précision des prédictions, augmentant les faux négatifs dans la détection de fraude.\n\n4. RECOMMANDATION :\nDéclencher un réentraînement immédiat du modèle avec les données des 30 derniers jours et mettre à jour le pipeline de validation.\n\n5. NORME VIOLÉE :\nCOBIT 2019 (EDM04 - Optimisation des Ressources)."
-            },
-            {
-                "status": "Majeur",
-                "risk_score": 8,
-                "pillar": "Sécurité API",
-                "frequency": 2,
-                "gravity": 3,
-                "frap_text": "1. CONTEXTE :\nAnalyse des configurations d'authentification des endpoints API exposés.\n\n2. CONSTAT (Preuves) :\nL'endpoint '/api/v1/admin' permet l'authentification par simple clé API sans rotation forcée ni MFA.\n\n3. CONSÉQUENCE :\nPotentiel d'accès non autorisé élevé en cas de fuite de la clé API. Manque de traçabilité forte des actions administratives.\n\n4. RECOMMANDATION :\nImplémenter l'authentification OAuth2 avec MFA pour tous les endpoints administratifs.\n\n5. NORME VIOLÉE :\nISO/IEC 25010 (Efficacité de performance - Comportement temporel)."
-            }
-        ]
+        return MOCK_FINDINGS
+
+    with span("n8n.send") as timing:
+        findings = _send(data_payload, url, workflow, compress, max_batch_bytes, cache, timing, hedge)
+        if isinstance(findings, list):
+            timing.set(rows=len(findings))
+    return findings
+
+def _send(data_payload, url, workflow, compress, max_batch_bytes, cache, timing, hedge):
+    if cache is not None:
+        key = payload_digest(data_payload, workflow)
+        cached = cache.get(key)
+        timing.set(cache="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
 
     try:
-        headers = {'Content-Type': 'application/json'}
-        response = requests.post(url, json=data_payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with span("n8n.serialize") as serialize:
+            bodies = build_batches(data_payload, max_batch_bytes)
+            # Streamed bodies are serialized while sent (see n8n.post)
+            serialize.set(bytes_out=sum(len(b) for b in bodies if isinstance(b, bytes)), batches=len(bodies))
+        if len(bodies) == 1:
+            findings = post_json(url, bodies[0], compress=compress, hedge=hedge)
+        else:
+            # Batches share the pooled session; results are merged in batch order
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_BATCHES) as pool:
+                results = list(pool.map(bind(lambda body: post_json(url, body, compress=compress, hedge=hedge)), bodies))
+
+            findings = []
+            for result in results:
+                if isinstance(result, list):
+                    findings.extend(result)
+                else:
+                    findings.append(result)
     except requests.exceptions.RequestException as e:
         return {
             "error": True,
@@ -62,3 +434,272 @@ def send_to_n8n(data_payload, webhook_url=None):
             "error": True,
             "message": "⚠ Invalid JSON response from AI Agent."
         }
+
+    if cache is not None and isinstance(findings, list):
+        cache.put(key, findings)
+    return findings
+
+# --- Streamed Responses ---
+_SEPARATORS = " \t\r\n\x1e"
+_decoder = json.JSONDecoder()
+# Characters that may continue a number token ('1' then '.5', 'e3', ...)
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+def iter_json_items(chunks, ndjson=False):
+    """
+    Parses a JSON response incrementally and yields its items as they arrive.
+
+    Args:
+        chunks (iterable): Raw response bytes, in arbitrary pieces.
+        ndjson (bool): The body is a sequence of JSON values (NDJSON / JSON
+            lines / JSON text sequences); arrays in it are flattened. Otherwise
+            the body is a single JSON array, yielded element by element.
+
+    Yields:
+        Each decoded item.
+
+    Raises:
+        ValueError: When a non-NDJSON body is not an array.
+        json.JSONDecodeError: When the body is empty, truncated or invalid
+            (including missing or extra commas in the array).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_array = False
+    started = ndjson
+    # Whether an array or an NDJSON value was seen at all (an empty body is invalid)
+    seen = False
+    # Inside the array: a ',' or ']' is expected next (after a value), and
+    # whether the last token was a ',' (then a value must follow)
+    after_value = after_comma = False
+
+    def parse(final):
+        nonlocal buffer, in_array, started, seen, after_value, after_comma
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _SEPARATORS:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if not ndjson and started and not in_array:
+                raise json.JSONDecodeError("Extra data after the JSON array", buffer, position)
+            if not started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                started = in_array = seen = True
+                position += 1
+                continue
+            if in_array and (char == "," or char == "]"):
+                if char == "," and not after_value or char == "]" and after_comma:
+                    raise json.JSONDecodeError(f"Unexpected '{char}' in JSON array", buffer, position)
+                after_value, after_comma = False, char == ","
+                in_array = in_array and char == ","
+                position += 1
+                continue
+            if in_array and after_value:
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                # Incomplete value: wait for more bytes
+                break
+            if (not final and isinstance(item, (int, float)) and not isinstance(item, bool)
+                    and all(c in _NUMBER_CHARS for c in buffer[end:])):
+                # A number followed only by number characters up to the end of the
+                # buffer ('1.' of '1.5') may continue in the next chunk (objects,
+                # arrays, strings and literals end with their own delimiter)
+                break
+            position = end
+            seen = True
+            after_value, after_comma = in_array, False
+            if isinstance(item, list) and not in_array:
+                yield from item
+            else:
+                yield item
+        # Only the unparsed tail is kept
+        buffer = buffer[position:]
+
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        yield from parse(final=False)
+    buffer += decoder.decode(b"", final=True)
+    yield from parse(final=True)
+    if in_array:
+        raise json.JSONDecodeError("Unterminated JSON array", buffer, len(buffer))
+    if not seen:
+        raise json.JSONDecodeError("Expecting value", buffer, 0)
+
+def _open_stream(url, body, compress, timing):
+    """
+    Opens a streamed response. Returns (response, done): done is None for a
+    single URL, else the callback releasing the replica (see ReplicaPool.request).
+    """
+    if isinstance(url, ReplicaPool):
+        return url.request(
+            lambda target: _open(target, body, compress, DEFAULT_TIMEOUT, 0, BACKOFF_SECONDS, timing, stream=True),
+            retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, hold=True,
+        )
+    return _open(url, body, compress, DEFAULT_TIMEOUT, MAX_RETRIES, BACKOFF_SECONDS, timing, stream=True), None
+
+def iter_findings(data_payload, webhook_url=None, compress=True, max_batch_bytes=None, cache=None, hedge=False):
+    """
+    Sends the data payload to the n8n webhook and yields findings as soon as
+    they are received.
+
+    The response may be NDJSON (one finding per line) or a JSON array, sent
+    with chunked transfer encoding or not; either way it is parsed while the
+    bytes arrive instead of after the whole body is buffered.
+
+    Args:
+        Same as send_to_n8n. Streams are balanced over replicas and failed
+        over, but never hedged (hedge is accepted and ignored).
+
+    Yields:
+        dict: Each finding. On failure an error dictionary (as returned by
+        send_to_n8n) is yielded last.
+    """
+    url, workflow = _resolve(webhook_url)
+
+    if url is None:
+        # Mock response for testing when no URL is provided
+        yield from MOCK_FINDINGS
+        return
+
+    if cache is not None:
+        key = payload_digest(data_payload, workflow)
+        cached = cache.get(key)
+        if cached is not None:
+            yield from cached
+            return
+
+    findings = []
+    with span("n8n.stream") as timing:
+        started = time.perf_counter()
+        try:
+            for body in build_batches(data_payload, max_batch_bytes):
+                with _CallSlot(timing):
+                    response, done = _open_stream(url, body, compress, timing)
+                    error = None
+                    try:
+                        with response:
+                            items = iter_json_items(response.iter_content(chunk_size=None), ndjson=_is_ndjson(response))
+                            for finding in items:
+                                if not findings:
+                                    timing.set(first_item_seconds=time.perf_counter() - started)
+                                findings.append(finding)
+                                yield finding
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        # The replica stays outstanding until its stream is consumed
+                        if done is not None:
+                            done(failed=error is not None and is_replica_failure(error))
+        except requests.exceptions.RequestException as e:
+            yield {
+                "error": True,
+                "message": f"⚠ Connection to AI Agent failed: {str(e)}"
+            }
+            return
+        except ValueError:
+            # json.JSONDecodeError is a ValueError
+            yield {
+                "error": True,
+                "message": "⚠ Invalid JSON response from AI Agent."
+            }
+            return
+        finally:
+            timing.set(rows=len(findings))
+
+    if cache is not None:
+        cache.put(key, findings)
+
+# --- Per-Pillar Dispatch ---
+# Payload key -> pillar label used in the findings
+PILLARS = {
+    "infrastructure": "Infrastructure",
+    "mlops": "MLOps",
+    "api_logs": "Sécurité API",
+}
+
+def split_by_pillar(data_payload):
+    """
+    Splits a payload into one payload per pillar.
+
+    Keys that do not belong to a pillar (mode, rule metadata, ...) are kept in
+    every pillar payload as context, and a 'pillar' key names the pillar.
+
+    Returns:
+        dict: Pillar payloads keyed by payload key ('infrastructure', 'mlops', 'api_logs').
+    """
+    context = {k: v for k, v in data_payload.items() if k not in PILLARS}
+    return {
+        key: {**context, key: data_payload[key], "pillar": label}
+        for key, label in PILLARS.items() if key in data_payload
+    }
+
+def _iter_streamed_pillars(payloads, url, max_workers, send_kwargs):
+    # Each pillar is consumed by a worker thread; findings are fanned in through a queue
+    items = queue.Queue()
+    done = object()
+
+    def consume(key, payload):
+        try:
+            for item in iter_findings(payload, url, **send_kwargs):
+                items.put((key, item))
+        except Exception as e:
+            items.put((key, {"error": True, "message": f"⚠ Connection to AI Agent failed: {str(e)}"}))
+        finally:
+            items.put((key, done))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for key, payload in payloads.items():
+            pool.submit(bind(consume), key, payload)
+        remaining = len(payloads)
+        while remaining:
+            key, item = items.get()
+            if item is done:
+                remaining -= 1
+            elif isinstance(item, dict) and "error" in item:
+                yield key, item
+            else:
+                yield key, [item]
+
+def iter_pillar_findings(data_payload, webhook_url=None, max_workers=len(PILLARS), stream=False, **send_kwargs):
+    """
+    Dispatches each pillar concurrently and yields results as they arrive.
+
+    The fastest pillar is yielded first, so callers can render its findings
+    without waiting for the slowest one.
+
+    Args:
+        data_payload (dict): The full payload (see split_by_pillar).
+        webhook_url (str, optional): The webhook URL. Defaults to env var N8N_WEBHOOK_URL.
+        max_workers (int): Maximum concurrent webhook calls.
+        stream (bool): Yield each finding as soon as it is parsed from its
+            pillar's response (see iter_findings) instead of whole pillars.
+        **send_kwargs: Forwarded to send_to_n8n (compress, max_batch_bytes, cache, hedge).
+
+    Yields:
+        tuple: (pillar key, findings list or error dictionary).
+    """
+    url = webhook_url or os.getenv("N8N_WEBHOOK_URL")
+    payloads = split_by_pillar(data_payload)
+
+    if not parse_webhook_urls(url):
+        # Mock response for testing when no URL is provided
+        for key in payloads:
+            yield key, [f for f in MOCK_FINDINGS if f["pillar"] == PILLARS[key]]
+        return
+
+    if stream:
+        yield from _iter_streamed_pillars(payloads, url, max_workers, send_kwargs)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(bind(send_to_n8n), payload, url, **send_kwargs): key for key, payload in payloads.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
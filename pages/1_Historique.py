@@ -0,0 +1,91 @@
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from history import HistoryStore
+
+@st.cache_resource
+def get_history():
+    return HistoryStore()
+
+def create_trend_chart(trend):
+    """
+    Max risk score per pillar over the latest runs.
+    """
+    fig = go.Figure()
+    for pillar, rows in trend.groupby("pillar", sort=True):
+        fig.add_trace(go.Scatter(
+            x=rows["started_at"],
+            y=rows["max_score"],
+            mode="lines+markers",
+            name=pillar,
+            customdata=rows[["findings", "avg_score"]],
+            hovertemplate="<b>%{fullData.name}</b><br>Score max : %{y}<br>Constats : %{customdata[0]}"
+                          "<br>Score moyen : %{customdata[1]:.1f}<extra></extra>",
+        ))
+    fig.update_layout(
+        yaxis=dict(title="Score de risque max", range=[0, 26]),
+        xaxis=dict(title="Audit"),
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=40, r=20, t=20, b=40),
+        height=380,
+    )
+    return fig
+
+st.set_page_config(page_title="AuditS2I | Historique", page_icon="🛡", layout="wide")
+st.title("📈 Historique des Audits")
+
+history = get_history()
+
+with st.sidebar:
+    environments = history.environments()
+    environment = st.selectbox("Environnement", ["Tous"] + environments) if environments else "Tous"
+    runs = st.slider("Audits affichés", min_value=5, max_value=200, value=50, step=5)
+    pillar = st.selectbox("Pilier (constats récurrents)", ["Tous", "Infrastructure", "MLOps", "Sécurité API"])
+
+environment = None if environment == "Tous" else environment
+start = time.perf_counter()
+trend = pd.DataFrame(history.score_trend(runs, environment))
+recurring = history.top_recurring(10, None if pillar == "Tous" else pillar, environment=environment)
+norms = history.norm_counts(10, environment)
+recent = history.recent_runs(1, environment)
+elapsed_ms = (time.perf_counter() - start) * 1000
+
+if trend.empty:
+    st.info("Aucun audit enregistré pour le moment. Lancez un audit depuis la console pour alimenter l'historique.")
+    st.stop()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Audits affichés", trend["run_id"].nunique())
+with col2:
+    st.metric("Dernier audit", recent[0]["started_at"].replace("T", " ") if recent else "-")
+with col3:
+    st.metric("Score max (dernier audit)", recent[0]["max_score"] if recent else "-")
+
+st.markdown("### Évolution des scores par pilier")
+st.plotly_chart(create_trend_chart(trend), width="stretch")
+
+col_left, col_right = st.columns([2, 1])
+with col_left:
+    st.markdown("### 🔁 Constats récurrents")
+    st.dataframe(
+        pd.DataFrame(recurring).reindex(columns=["pillar", "title", "runs", "max_score", "first_seen", "last_seen"]),
+        hide_index=True,
+        column_config={
+            "pillar": "Pilier",
+            "title": "Constat",
+            "runs": "Audits",
+            "max_score": "Score max",
+            "first_seen": "Première fois",
+            "last_seen": "Dernière fois",
+        },
+    )
+with col_right:
+    st.markdown("### 📚 Normes les plus citées")
+    st.dataframe(pd.DataFrame(norms), hide_index=True, column_config={"norm": "Norme", "findings": "Constats"})
+
+st.caption(f"Requêtes historiques : {elapsed_ms:.0f} ms")
@@ -0,0 +1,48 @@
+from aggregation import build_summary_payload
+from ingestion import WIRE_FORMAT_KEY, frame_encoder
+from rules import build_filtered_payload
+from sampling import sample_api_logs
+
+def build_payload(frames, summary=False, rules=False, sample=None, wire_format="records"):
+    """
+    Builds the payload sent to the AI agent from the typed source frames.
+
+    Shared by the Streamlit app and the batch command line so both send the
+    same data for the same options.
+
+    Args:
+        frames (dict): Typed DataFrames keyed by 'infrastructure', 'mlops', 'api_logs'.
+        summary (bool): Send the local aggregates instead of the rows.
+        rules (bool): Send only the rows flagged by the rule engine (added to
+            the summary as 'flagged' when both are set).
+        sample (dict, optional): In rows mode, replace the API logs by a
+            stratified sample within this budget (keyword arguments of
+            sampling.sample_api_logs, e.g. {'max_rows': 50000}). The sampling
+            report is added to the payload as 'sampling'.
+        wire_format (str): Layout of the rows in rows mode: 'records' (one
+            object per row, the format n8n workflows expect) or 'columns'
+            (one array per column, see ingestion.iter_frame_json). 'columns'
+            is announced to the workflow as 'wire_format' in the payload.
+
+    Returns:
+        dict: The payload. In the default (rows) mode it holds the typed
+        DataFrames themselves, serialized by send_to_n8n while they are sent.
+    """
+    # Unknown formats are rejected here rather than when the body is sent
+    frame_encoder(wire_format)
+    if summary:
+        # Compact summary: size grows with endpoints/hosts/models, not rows
+        payload = build_summary_payload(frames)
+        if rules:
+            payload["flagged"] = build_filtered_payload(frames)
+        return payload
+    if rules:
+        # Only rows flagged by the local rule engine
+        return build_filtered_payload(frames)
+    # Typed frames are streamed to n8n while sent (see n8n_connector.StreamBody)
+    payload = dict(frames)
+    if wire_format != "records":
+        payload[WIRE_FORMAT_KEY] = wire_format
+    if sample is not None:
+        payload["api_logs"], payload["sampling"] = sample_api_logs(frames["api_logs"], wire_format=wire_format, **sample)
+    return payload
@@ -0,0 +1,281 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+# Consecutive failures that open a replica's circuit, and how long it stays open
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 30.0
+# Hedging starts once this many latencies were observed, at their HEDGE_QUANTILE
+HEDGE_QUANTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+# Threads running hedged calls (both copies of each call in flight)
+HEDGE_WORKERS = 32
+# Weight of the last call in a replica's latency average
+EWMA_ALPHA = 0.2
+# Statuses meaning the replica is unhealthy (others are answers about the request)
+FAILURE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class NoReplicaAvailable(requests.exceptions.ConnectionError):
+    """
+    Raised when every replica is excluded or has an open circuit.
+    """
+
+class HedgeCancelled(Exception):
+    """
+    Raised by an attempt whose hedged twin already answered (not a replica failure).
+    """
+
+def parse_webhook_urls(value):
+    """
+    Returns the webhook URLs of a setting: a list, or a string separated by commas or whitespace.
+    """
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [u for u in value if u]
+    return value.replace(",", " ").split()
+
+def is_replica_failure(error):
+    """
+    Tells whether an exception raised by a call should count against the replica.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code in FAILURE_STATUS_CODES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+class Replica:
+    __slots__ = ("url", "outstanding", "failures", "state", "opened_at", "probing",
+                 "latency", "calls", "errors")
+
+    def __init__(self, url):
+        self.url = url
+        self.outstanding = 0
+        self.failures = 0
+        # 'closed' (healthy), 'open' (skipped until the cooldown ends), 'half-open' (one probe)
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probing = False
+        self.latency = None
+        self.calls = 0
+        self.errors = 0
+
+class ReplicaPool:
+    """
+    Spreads webhook calls over several n8n replicas.
+
+    Each call goes to the available replica with the fewest outstanding
+    requests (then the lowest recent latency). A replica failing
+    failure_threshold times in a row has its circuit opened: it is skipped
+    for cooldown seconds, then receives a single probe call that closes the
+    circuit again on success. Hedged calls send a second copy to another
+    replica when the first has not answered after the pool's p95 latency,
+    and return whichever answer comes first.
+    """
+
+    def __init__(self, urls, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS,
+                 hedge_quantile=HEDGE_QUANTILE, hedge_min_samples=HEDGE_MIN_SAMPLES):
+        self.replicas = [Replica(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._hedges = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="n8n-hedge")
+        self.stats = {"calls": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0, "cancelled": 0, "rejected": 0}
+
+    # --- Health ---
+    def _available(self, replica, now):
+        if replica.state == "open" and now - replica.opened_at >= self.cooldown:
+            replica.state = "half-open"
+        if replica.state == "half-open":
+            return not replica.probing
+        return replica.state == "closed"
+
+    def acquire(self, exclude=()):
+        """
+        Picks the replica for the next call and counts it as outstanding.
+
+        Raises:
+            NoReplicaAvailable: When every replica is excluded or open.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [r for r in self.replicas if r not in exclude and self._available(r, now)]
+            if not candidates:
+                self.stats["rejected"] += 1
+                raise NoReplicaAvailable("No n8n replica available (circuits open or all replicas failed)")
+            best = min(candidates, key=lambda r: (r.outstanding, r.latency or 0.0, random.random()))
+            if best.state == "half-open":
+                best.probing = True
+            best.outstanding += 1
+            best.calls += 1
+            self.stats["calls"] += 1
+            return best
+
+    def release(self, replica, seconds=None, failed=False, cancelled=False):
+        """
+        Records the outcome of a call made on an acquired replica. A cancelled
+        call says nothing about the replica's health; its duration is still a
+        (lower bound) latency sample for the hedge delay.
+        """
+        with self._lock:
+            replica.outstanding -= 1
+            replica.probing = False
+            if cancelled:
+                self.stats["cancelled"] += 1
+                if seconds is not None:
+                    self._latencies.append(seconds)
+                return
+            if failed:
+                replica.errors += 1
+                replica.failures += 1
+                if replica.state == "half-open" or replica.failures >= self.failure_threshold:
+                    replica.state = "open"
+                    replica.opened_at = time.monotonic()
+                return
+            replica.failures = 0
+            replica.state = "closed"
+            if seconds is not None:
+                self._latencies.append(seconds)
+                replica.latency = seconds if replica.latency is None else (
+                    EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * replica.latency
+                )
+
+    def hedge_delay(self):
+        """
+        Returns the delay before a hedged copy is sent, or None while too few
+        latencies were observed to estimate it.
+        """
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+
+    def health(self):
+        """
+        Returns one dict per replica: url, state, outstanding, latency, calls, errors.
+        """
+        with self._lock:
+            return [
+                {"url": r.url, "state": r.state, "outstanding": r.outstanding,
+                 "latency": r.latency, "calls": r.calls, "errors": r.errors}
+                for r in self.replicas
+            ]
+
+    # --- Calls ---
+    def _call(self, attempt, replica, hold=False):
+        start = time.perf_counter()
+        try:
+            result = attempt(replica.url)
+        except HedgeCancelled:
+            self.release(replica, seconds=time.perf_counter() - start, cancelled=True)
+            raise
+        except Exception as e:
+            self.release(replica, failed=is_replica_failure(e))
+            raise
+        if hold:
+            def done(failed=False):
+                self.release(replica, seconds=None if failed else time.perf_counter() - start, failed=failed)
+            return result, done
+        self.release(replica, seconds=time.perf_counter() - start)
+        return result
+
+    def _hedged(self, attempt, primary, tried, hedge_slot=None):
+        delay = self.hedge_delay()
+        if delay is None or len(self.replicas) < 2:
+            return self._call(attempt, primary)
+        first = self._hedges.submit(self._call, attempt, primary)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        # The copy counts against the caller's concurrency cap: no free slot, no hedge
+        release_slot = hedge_slot() if hedge_slot is not None else (lambda: None)
+        if release_slot is None:
+            return first.result()
+        try:
+            backup = self.acquire(exclude=tried + [primary])
+        except NoReplicaAvailable:
+            release_slot()
+            return first.result()
+        with self._lock:
+            self.stats["hedges"] += 1
+        second = self._hedges.submit(self._call, attempt, backup)
+        second.add_done_callback(lambda _: release_slot())
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The attempt closes the slower copy (see HedgeCancelled)
+                    if future is second:
+                        with self._lock:
+                            self.stats["hedge_wins"] += 1
+                    return future.result()
+                error = future.exception()
+        # Both copies failed: neither replica is retried before the others
+        tried.append(backup)
+        raise error
+
+    def request(self, attempt, retries=2, backoff=0.5, hedge=False, hold=False, hedge_slot=None):
+        """
+        Runs attempt(url) on a replica, failing over to another replica when
+        it fails with a connection error, a timeout or a 429/5xx status.
+
+        Args:
+            attempt (callable): Makes one call to the given URL and returns its result.
+            retries (int): Further attempts after a failure.
+            backoff (float): Base delay before replicas that already failed are tried again.
+            hedge (bool): Send a hedged copy to a second replica after the p95 delay.
+            hold (bool): Keep the replica outstanding after attempt returns (streamed
+                responses); the caller then calls done(failed=False) once consumed.
+            hedge_slot (callable, optional): Reserves capacity for a hedged copy
+                without blocking; returns the function releasing it, or None
+                when none is free (the call is then not hedged).
+
+        Returns:
+            The result of the first successful attempt, or (result, done) with hold.
+        """
+        tried = []
+        for n in range(retries + 1):
+            try:
+                replica = self.acquire(exclude=tried)
+            except NoReplicaAvailable:
+                if not tried:
+                    raise
+                # Every replica failed once: back off, then start over among the closed circuits
+                time.sleep(backoff * 2 ** n)
+                tried = []
+                replica = self.acquire()
+            try:
+                if hedge and not hold:
+                    return self._hedged(attempt, replica, tried, hedge_slot)
+                return self._call(attempt, replica, hold=hold)
+            except Exception as e:
+                if not is_replica_failure(e) or n >= retries:
+                    raise
+                tried.append(replica)
+                with self._lock:
+                    self.stats["failovers"] += 1
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_replica_pool(urls):
+    """
+    Returns the process-wide pool for a list of URLs, so health and latency
+    history are kept across audits.
+    """
+    key = tuple(urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ReplicaPool(key)
+        return _pools[key]
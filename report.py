@@ -0,0 +1,321 @@
+import datetime
+import io
+import multiprocessing
+import os
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+
+# get_risk_level lives in frap so the UI can use it without loading fpdf
+from frap import clean_text, get_risk_level, parse_finding
+
+# Fonts used by the report, registered in this order in every AuditReport so
+# their /F<n> resource names match across documents rendered in parallel.
+REPORT_FONTS = [('Arial', ''), ('Arial', 'B'), ('Arial', 'I'), ('Arial', 'BI')]
+
+
+# Reports with fewer findings are rendered in-process (pool start-up dominates)
+PARALLEL_THRESHOLD = 200
+DEFAULT_CHUNK_SIZE = 50
+
+# --- PDF Generation Logic ---
+class AuditReport(FPDF):
+    def __init__(self, deferred_page_numbers=False):
+        super().__init__()
+        # Sections rendered in parallel do not know their absolute page
+        # numbers; the merger stamps the footer instead (see PageNumberStamp).
+        self.deferred_page_numbers = deferred_page_numbers
+        for family, style in REPORT_FONTS:
+            self.set_font(family, style, 8)
+        self.font_family = ''
+        self.set_auto_page_break(auto=True, margin=15)
+
+    def header(self):
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, f'AuditS2I - Rapport d\'Inspection Automatisé | {datetime.date.today()}', 0, 1, 'R')
+        self.ln(5)
+
+    def footer(self):
+        if self.deferred_page_numbers:
+            return
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+    def finish_pages(self):
+        """
+        Closes the last page and returns the raw content stream of every page,
+        without assembling a PDF document.
+        """
+        if self.page > 0 and self.state == 2:
+            self.in_footer = 1
+            self.footer()
+            self.in_footer = 0
+            self._endpage()
+        return [self.pages[n] for n in range(1, self.page + 1)]
+
+def render_title_page(pdf):
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 24)
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(0, 60, '', 0, 1) # Spacer
+    pdf.cell(0, 10, 'RAPPORT DE MISSION D\'AUDIT', 0, 1, 'C')
+    pdf.ln(10)
+    
+    pdf.set_font('Arial', 'B', 16)
+    pdf.set_text_color(80, 80, 80)
+    pdf.cell(0, 10, 'Module 1 : Fondations Technologiques', 0, 1, 'C')
+    pdf.ln(20)
+    
+    pdf.set_font('Arial', 'I', 12)
+    pdf.set_text_color(128, 128, 128)
+    pdf.cell(0, 10, 'Confidentiel', 0, 1, 'C')
+
+def render_risk_page(pdf, risk):
+    pdf.add_page()
+    
+    score = risk.get("risk_score", 0)
+    pillar = risk.get("pillar", "Général")
+    
+    level_name, _, color_rgb = get_risk_level(score)
+    
+    # Banner Header
+    pdf.set_fill_color(*color_rgb)
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font('Arial', 'B', 16)
+    # Add some padding visually by using a cell with fill
+    header_text = f"  {pillar.upper()} - {level_name}"
+    pdf.cell(0, 15, clean_text(header_text), 0, 1, 'L', 1)
+    pdf.ln(10)
+    
+    # Risk Score Badge
+    pdf.set_fill_color(245, 245, 245) # Light Gray
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_draw_color(200, 200, 200)
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(50, 10, f" Score de Risque : {score} ", 1, 1, 'C', 1)
+    pdf.ln(10)
+    
+    # Body Content
+    pdf.set_text_color(0, 0, 0)
+    
+    # Lines come pre-classified and Latin-1 cleaned from the memoized FRAP parser
+    for kind, _, line in parse_finding(risk)["blocks"]:
+        if kind == 'blank':
+            pdf.ln(5) # Spacing for empty lines
+            continue
+
+        if kind == 'text':
+            pdf.set_font('Arial', '', 11)
+            pdf.set_text_color(0, 0, 0)
+            pdf.multi_cell(0, 6, line)
+            continue
+
+        # Special styling for "NORME VIOLÉE"
+        if kind == 'norm':
+            pdf.set_font('Arial', 'BI', 10)
+            pdf.set_text_color(100, 100, 100) # Gray
+        else:
+            pdf.set_font('Arial', 'B', 11)
+            pdf.set_text_color(0, 0, 0) # Black
+
+        # Add a small top margin for headers if not at top of page
+        if pdf.get_y() > 40:
+            pdf.ln(2)
+        pdf.multi_cell(0, 6, line)
+
+        # Reset color to black for subsequent text if it was gray
+        pdf.set_text_color(0, 0, 0)
+    
+    # Footer Note for the risk
+    pdf.ln(10)
+    pdf.set_font('Arial', 'I', 9)
+    pdf.set_text_color(100, 100, 100)
+    pdf.cell(0, 10, "Généré par l'Agent IA AuditS2I", 0, 1, 'L')
+
+# --- Report Engine ---
+def render_section(risks, title_page=False):
+    """
+    Renders a run of risk pages into compressed page streams.
+
+    Runs in a worker process. Page numbers are left to the merger, which
+    knows the absolute position of each page.
+
+    Returns:
+        list: Flate-compressed content stream of each page.
+    """
+    pdf = AuditReport(deferred_page_numbers=True)
+    if title_page:
+        render_title_page(pdf)
+    for risk in risks:
+        render_risk_page(pdf, risk)
+    return [zlib.compress(content.encode('latin-1')) for content in pdf.finish_pages()]
+
+class PageNumberStamp(AuditReport):
+    """
+    Produces the footer content stream ("Page N") of any page, using the
+    same drawing code as the serial footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.add_page()
+
+    def header(self):
+        pass
+
+    def stream(self, page_number):
+        self.pages[self.page] = ''
+        # Force set_font to emit the font selection again
+        self.font_family = ''
+        # Drawn as a footer: no automatic page break
+        self.in_footer = 1
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128, 128, 128)
+        self.cell(0, 10, f'Page {page_number}', 0, 0, 'C')
+        self.in_footer = 0
+        return self.pages[self.page].encode('latin-1')
+
+class PdfStreamWriter:
+    """
+    Writes a PDF incrementally to a binary file-like object: each page is
+    written as soon as it is available and only object offsets are kept.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.position = 0
+        # Objects 1 (page tree) and 2 (resources) are written last
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3
+        template = AuditReport()
+        self.fonts = sorted((f['i'], f['name']) for f in template.fonts.values())
+        self.width_pt = template.fw_pt
+        self.height_pt = template.fh_pt
+        self._write(b'%PDF-1.3\n')
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id, body):
+        self.offsets[obj_id] = self.position
+        self._write(f'{obj_id} 0 obj\n'.encode('latin-1') + body + b'\nendobj\n')
+
+    def _new_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def add_page(self, *streams):
+        """
+        Writes a page whose content is the concatenation of the given
+        Flate-compressed streams.
+        """
+        page_id = self._new_id()
+        content_ids = [self._new_id() for _ in streams]
+        self.page_ids.append(page_id)
+        contents = ' '.join(f'{content_id} 0 R' for content_id in content_ids)
+        self._object(page_id, f'<</Type /Page\n/Parent 1 0 R\n/Resources 2 0 R\n/Contents [{contents}]>>'.encode('latin-1'))
+        for content_id, stream in zip(content_ids, streams):
+            self._object(content_id, f'<</Filter /FlateDecode /Length {len(stream)}>>\nstream\n'.encode('latin-1') + stream + b'\nendstream')
+
+    def close(self):
+        font_refs = []
+        for index, name in self.fonts:
+            font_id = self._new_id()
+            self._object(font_id, f'<</Type /Font\n/BaseFont /{name}\n/Subtype /Type1\n/Encoding /WinAnsiEncoding\n>>'.encode('latin-1'))
+            font_refs.append(f'/F{index} {font_id} 0 R')
+        self._object(2, ('<</ProcSet [/PDF /Text /ImageB /ImageC /ImageI]\n/Font <<\n' + '\n'.join(font_refs) + '\n>>\n/XObject <<\n>>\n>>').encode('latin-1'))
+
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self.page_ids)
+        self._object(1, f'<</Type /Pages\n/Kids [{kids} ]\n/Count {len(self.page_ids)}\n/MediaBox [0 0 {self.width_pt:.2f} {self.height_pt:.2f}]\n>>'.encode('latin-1'))
+
+        info_id = self._new_id()
+        created = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
+        self._object(info_id, f'<</Producer (AuditS2I)\n/CreationDate (D:{created})>>'.encode('latin-1'))
+        catalog_id = self._new_id()
+        first_page = self.page_ids[0] if self.page_ids else 3
+        self._object(catalog_id, f'<</Type /Catalog\n/Pages 1 0 R\n/OpenAction [{first_page} 0 R /FitH null]\n/PageLayout /OneColumn>>'.encode('latin-1'))
+
+        xref = self.position
+        lines = [f'xref\n0 {self.next_id}\n0000000000 65535 f \n']
+        for obj_id in range(1, self.next_id):
+            lines.append(f'{self.offsets[obj_id]:010d} 00000 n \n')
+        lines.append(f'trailer\n<<\n/Size {self.next_id}\n/Root {catalog_id} 0 R\n/Info {info_id} 0 R\n>>\nstartxref\n{xref}\n%%EOF\n')
+        self._write(''.join(lines).encode('latin-1'))
+
+def _iter_sections(sections, workers):
+    """
+    Yields rendered sections in order, keeping at most 2 * workers in flight.
+    """
+    if not workers:
+        for risks, title_page in sections:
+            yield render_section(risks, title_page)
+        return
+
+    # spawn: forking a threaded server process (Streamlit) is unsafe
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        for risks, title_page in sections:
+            pending.append(pool.submit(render_section, risks, title_page))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def render_report(audit_results, out, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Renders the audit report, optionally in parallel, streaming it to out.
+
+    Risk pages are rendered in chunks (in a process pool when workers > 0),
+    merged in order with continuous page numbering and written page by page,
+    so the whole document is never held in memory.
+
+    Args:
+        audit_results (list): Findings returned by the AI agent.
+        out (str or file-like): Output path or binary file-like object.
+        workers (int, optional): Worker processes. None uses one per CPU for
+            large reports and renders small ones in-process; 0 forces in-process.
+        chunk_size (int): Findings per rendered section.
+
+    Returns:
+        int: Number of pages written.
+    """
+    if isinstance(out, str):
+        with open(out, 'wb') as f:
+            return render_report(audit_results, f, workers, chunk_size)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+        if workers < 2 or len(audit_results) < PARALLEL_THRESHOLD:
+            workers = 0
+
+    sections = [([], True)] + [
+        (audit_results[i:i + chunk_size], False) for i in range(0, len(audit_results), chunk_size)
+    ]
+
+    writer = PdfStreamWriter(out)
+    stamp = PageNumberStamp()
+    page_number = 0
+    for pages in _iter_sections(sections, workers):
+        for content in pages:
+            page_number += 1
+            writer.add_page(content, zlib.compress(stamp.stream(page_number)))
+    writer.close()
+    return page_number
+
+def generate_pdf(audit_results):
+    """
+    Generates a Professional PDF report from the audit results.
+    """
+    buffer = io.BytesIO()
+    render_report(audit_results, buffer)
+    return buffer.getvalue()
@@ -0,0 +1,174 @@
+import fnmatch
+import re
+
+import numpy as np
+import pandas as pd
+
+from ingestion import to_records
+
+# --- Rule Catalogue ---
+# Each rule targets one source and fires when ALL its conditions hold.
+# A condition is (column, operator, value); see OPERATORS below.
+DEFAULT_RULES = [
+    {
+        "id": "API-AUTH-ADMIN",
+        "source": "api_logs",
+        "description": "Échec d'authentification (401/403) sur un endpoint d'administration",
+        "norm": "ISO/IEC 27001 - A.9.4 (Contrôle d'accès aux systèmes)",
+        "when": [("status_code", "in", [401, 403]), ("endpoint", "glob", ["/admin*", "/api/*/admin*"])],
+    },
+    {
+        "id": "API-5XX",
+        "source": "api_logs",
+        "description": "Erreur serveur (5xx)",
+        "norm": "ITIL 4 - Gestion des incidents",
+        "when": [("status_code", ">=", 500)],
+    },
+    {
+        "id": "API-SLOW",
+        "source": "api_logs",
+        "description": "Temps de réponse supérieur à 1 000 ms",
+        "norm": "ISO/IEC 25010 - Efficacité de performance",
+        "when": [("response_time", ">", 1000)],
+    },
+    {
+        "id": "INFRA-RDP-OPEN",
+        "source": "infrastructure",
+        "description": "Port RDP 3389 exposé",
+        "norm": "ISO/IEC 27001 - A.13.1 (Sécurité des réseaux)",
+        "when": [("open_ports", "contains", 3389)],
+    },
+    {
+        "id": "INFRA-CLEARTEXT",
+        "source": "infrastructure",
+        "description": "Service en clair exposé (FTP 21 / Telnet 23)",
+        "norm": "ISO/IEC 27001 - A.10.1 (Cryptographie)",
+        "when": [("open_ports", "contains", [21, 23])],
+    },
+    {
+        "id": "MLOPS-LOW-ACCURACY",
+        "source": "mlops",
+        "description": "Précision du modèle inférieure à 0.9",
+        "norm": "COBIT 2019 - APO14 (Gestion des données)",
+        "when": [("accuracy", "<", 0.9)],
+    },
+    {
+        "id": "MLOPS-STALE",
+        "source": "mlops",
+        "description": "Modèle non réentraîné depuis plus de 30 jours",
+        "norm": "COBIT 2019 - BAI03 (Gestion des solutions)",
+        "when": [("last_trained", "older_than_days", 30)],
+    },
+]
+
+# --- Operators ---
+def _glob(series, patterns):
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    regex = re.compile("|".join(fnmatch.translate(p) for p in patterns))
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Match once per category instead of once per row
+        hits = np.array([bool(regex.match(str(c))) for c in series.cat.categories] + [False])
+        return hits[series.cat.codes.to_numpy()]
+    return series.astype("string").str.match(regex.pattern).fillna(False).to_numpy(dtype=bool)
+
+def _contains(series, value):
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    exploded = series.explode()
+    hit = exploded.isin(values)
+    return hit.groupby(level=0, sort=False).any().reindex(series.index, fill_value=False).to_numpy(dtype=bool)
+
+def _older_than_days(series, days, now):
+    return ((now - series) > pd.Timedelta(days=days)).fillna(False).to_numpy(dtype=bool)
+
+def _compare(op):
+    def apply(series, value):
+        return op(series, value).fillna(False).to_numpy(dtype=bool)
+    return apply
+
+OPERATORS = {
+    "==": _compare(lambda s, v: s == v),
+    "!=": _compare(lambda s, v: s != v),
+    "<": _compare(lambda s, v: s < v),
+    "<=": _compare(lambda s, v: s <= v),
+    ">": _compare(lambda s, v: s > v),
+    ">=": _compare(lambda s, v: s >= v),
+    "in": lambda s, v: s.isin(v).to_numpy(dtype=bool),
+    "not_in": lambda s, v: ~s.isin(v).to_numpy(dtype=bool),
+    "glob": _glob,
+    "contains": _contains,
+}
+
+# --- Evaluation ---
+def rule_mask(df, rule, now=None):
+    """
+    Evaluates one rule as a boolean mask over a DataFrame.
+
+    Args:
+        df (pd.DataFrame): Typed DataFrame of the rule's source.
+        rule (dict): Rule definition (see DEFAULT_RULES).
+        now (pd.Timestamp, optional): Reference time for 'older_than_days'.
+
+    Returns:
+        np.ndarray: Boolean array, True where the rule fires. All False if a column is missing.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in rule["when"]:
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        if op == "older_than_days":
+            now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+            mask &= _older_than_days(df[column], value, now)
+        else:
+            mask &= OPERATORS[op](df[column], value)
+    return mask
+
+def evaluate_rules(frames, rules=DEFAULT_RULES, now=None):
+    """
+    Evaluates the rules over every source and keeps only flagged rows.
+
+    Args:
+        frames (dict): Typed DataFrames keyed by 'infrastructure', 'mlops', 'api_logs'.
+        rules (list): Rule definitions.
+        now (pd.Timestamp, optional): Reference time for 'older_than_days'.
+
+    Returns:
+        tuple: (flagged, hits) where flagged maps each source to its flagged rows with
+        a 'rules_fired' column, and hits maps each rule id to its number of matching rows.
+    """
+    flagged = {}
+    hits = {}
+    for source, df in frames.items():
+        source_rules = [r for r in rules if r["source"] == source]
+        if not source_rules:
+            flagged[source] = df.iloc[0:0].assign(rules_fired=pd.Series(dtype=object))
+            continue
+
+        masks = np.column_stack([rule_mask(df, r, now) for r in source_rules])
+        ids = np.array([r["id"] for r in source_rules])
+        for rule_id, count in zip(ids.tolist(), masks.sum(axis=0)):
+            hits[rule_id] = int(count)
+
+        rows = masks.any(axis=1)
+        selected = df[rows].copy()
+        selected["rules_fired"] = [ids[m].tolist() for m in masks[rows]]
+        flagged[source] = selected
+    return flagged, hits
+
+def build_filtered_payload(frames, rules=DEFAULT_RULES, now=None):
+    """
+    Builds a payload holding only the rows flagged by the rule engine.
+
+    Returns:
+        dict: Flagged rows per source, per-rule hit counts and the definitions of the rules that fired.
+    """
+    flagged, hits = evaluate_rules(frames, rules, now)
+    payload = {source: to_records(df) for source, df in flagged.items()}
+    payload["mode"] = "filtered"
+    payload["rule_hits"] = hits
+    payload["rules"] = {
+        r["id"]: {"description": r["description"], "norm": r["norm"]}
+        for r in rules if hits.get(r["id"])
+    }
+    return payload
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+from ingestion import frame_encoder
+
+# Default payload budget for the API log rows sent to the agent
+DEFAULT_MAX_ROWS = 50_000
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+# Width of the time buckets of the strata
+DEFAULT_TIME_BUCKET = "1h"
+# Latencies above Q3 + LATENCY_FENCE * IQR of their (endpoint, method) are anomalous
+LATENCY_FENCE = 3.0
+WEIGHT_COLUMN = "sample_weight"
+
+def strata_keys(df, time_bucket=DEFAULT_TIME_BUCKET):
+    """
+    Returns the stratum of each API log row: (endpoint, method, status class, time bucket).
+
+    Returns:
+        pd.Series: Integer stratum ids aligned with df.
+    """
+    keys = pd.DataFrame({
+        "endpoint": df["endpoint"],
+        "method": df["method"],
+        "status_class": df["status_code"] // 100,
+        "bucket": df["timestamp"].dt.floor(time_bucket),
+    }, index=df.index)
+    return keys.groupby(list(keys.columns), observed=True, dropna=False).ngroup()
+
+def must_keep_mask(df, fence=LATENCY_FENCE):
+    """
+    Flags the rows that are never sampled out: errors (4xx/5xx or no status
+    code) and latencies beyond the Tukey fence of their (endpoint, method).
+    """
+    errors = (df["status_code"] >= 400).fillna(True)
+    latency = df["response_time"].astype("float64")
+    grouped = latency.groupby([df["endpoint"], df["method"]], observed=True, dropna=False)
+    q1 = grouped.transform("quantile", 0.25)
+    q3 = grouped.transform("quantile", 0.75)
+    slow = (latency > q3 + fence * (q3 - q1)).fillna(False)
+    return (errors | slow).to_numpy(dtype=bool)
+
+def _row_budget(df, max_rows, max_bytes, wire_format=None, sample_rows=1000):
+    # Bytes per row estimated from the serialized head, as for the batches
+    if not max_bytes or df.empty:
+        return max_rows
+    sample = df.iloc[:sample_rows]
+    row_bytes = len("".join(frame_encoder(wire_format)(sample)).encode("utf-8")) / len(sample)
+    return max(1, min(max_rows, int(max_bytes / row_bytes)))
+
+def _quotas(sizes, budget, rng):
+    """
+    Allocates budget rows over strata: one row per stratum, the rest in
+    proportion to the stratum sizes. With more strata than rows, a random
+    subset of strata gets one row each.
+    """
+    if budget <= 0:
+        return np.zeros(len(sizes), dtype=np.int64)
+    if len(sizes) >= budget:
+        quotas = np.zeros(len(sizes), dtype=np.int64)
+        quotas[rng.choice(len(sizes), size=budget, replace=False)] = 1
+        return quotas
+    extra = sizes - 1
+    share = np.floor(extra * (budget - len(sizes)) / max(extra.sum(), 1)).astype(np.int64)
+    return np.minimum(sizes, 1 + share)
+
+def sample_api_logs(df, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES,
+                    time_bucket=DEFAULT_TIME_BUCKET, seed=0, wire_format="records"):
+    """
+    Stratified sample of API logs within a row and byte budget.
+
+    Error and anomalous-latency rows are always kept. The remaining budget is
+    shared over the strata of the other rows (see strata_keys): every stratum
+    keeps at least one row, so rare endpoint/method/status combinations stay
+    represented, and rows are drawn uniformly at random within a stratum.
+    Each kept row carries a 'sample_weight' (rows it stands for: 1 for kept
+    rows, stratum size / rows drawn otherwise), so counts can be re-scaled.
+
+    Args:
+        df (pd.DataFrame): Typed API logs (see ingestion.load_source).
+        max_rows (int): Row budget.
+        max_bytes (int, optional): Byte budget of the serialized rows.
+        time_bucket (str): Width of the time buckets.
+        seed (int): Random seed (the same upload gives the same sample).
+        wire_format (str): Serialization max_bytes applies to ('records' or
+            'columns', see pipeline.build_payload).
+
+    Returns:
+        tuple: (sample, report). The sample is df itself when it already fits
+        the budget. The report holds rows_in, rows_out, ratio, kept (error and
+        anomalous rows), strata, budget_rows and over_budget (kept rows alone
+        exceed the budget).
+    """
+    budget = _row_budget(df, max_rows, max_bytes, wire_format)
+    report = {"rows_in": len(df), "rows_out": len(df), "ratio": 1.0, "kept": 0,
+              "strata": 0, "budget_rows": budget, "over_budget": False}
+    if len(df) <= budget:
+        return df, report
+
+    rng = np.random.default_rng(seed)
+    keep = must_keep_mask(df)
+    strata = strata_keys(df, time_bucket).to_numpy()
+    normal = np.flatnonzero(~keep)
+
+    # Random priority per row; the quota lowest priorities of each stratum are
+    # drawn (a uniform sample without replacement, like a reservoir per stratum)
+    codes, inverse, sizes = np.unique(strata[normal], return_inverse=True, return_counts=True)
+    quotas = _quotas(sizes, budget - int(keep.sum()), rng)
+    order = np.lexsort((rng.random(len(normal)), inverse))
+    starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    rank = np.empty(len(normal), dtype=np.int64)
+    rank[order] = np.arange(len(normal)) - starts
+    drawn = rank < quotas[inverse]
+
+    weights = np.ones(len(df))
+    taken = np.maximum(quotas, 1)
+    weights[normal] = sizes[inverse] / taken[inverse]
+    selected = keep.copy()
+    selected[normal[drawn]] = True
+
+    sample = df[selected].copy()
+    sample[WEIGHT_COLUMN] = weights[selected]
+    report.update(
+        rows_out=len(sample),
+        ratio=round(len(sample) / len(df), 6),
+        kept=int(keep.sum()),
+        strata=len(codes),
+        over_budget=bool(keep.sum() > budget),
+    )
+    return sample, report
@@ -0,0 +1,275 @@
+import datetime
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from cache import DEFAULT_CACHE_DIR
+from ingestion import load_source
+from n8n_connector import PILLARS, send_to_n8n
+from pipeline import build_payload
+
+# Only files under this directory can be tailed; tail mode is off when unset
+TAIL_ROOT = os.getenv("AUDITS2I_TAIL_ROOT")
+# Own directory, apart from the response cache entries (cache.DEFAULT_RESPONSES_DIR)
+DEFAULT_TAIL_STATE_PATH = os.path.join(DEFAULT_CACHE_DIR, "tail", "state.json")
+# Bytes read per file and cycle: a long pause is caught up over several cycles
+DEFAULT_MAX_READ_BYTES = 16 * 1024 * 1024
+DEFAULT_INTERVAL_SECONDS = 10.0
+# Findings kept for the dashboard (the totals count all of them)
+DEFAULT_MAX_FINDINGS = 1000
+# Block scanned backwards for the last line end when starting at the end of a file
+TAIL_SCAN_BYTES = 64 * 1024
+# Leading bytes fingerprinted to detect a file replaced under the same inode
+HEAD_BYTES = 1024
+
+# Auditors of different file sets share the state file
+_state_lock = threading.Lock()
+
+def _last_line_end(f, size):
+    start = size
+    while start > 0:
+        start = max(0, start - TAIL_SCAN_BYTES)
+        f.seek(start)
+        block = f.read(min(TAIL_SCAN_BYTES, size - start))
+        position = block.rfind(b"\n")
+        if position >= 0:
+            return start + position + 1
+    return 0
+
+def resolve_tail_path(path, root=TAIL_ROOT):
+    """
+    Resolves a path to tail, relative paths being taken from root.
+
+    Returns:
+        str: The real path (symbolic links resolved).
+
+    Raises:
+        ValueError: When no root is configured or the file lies outside it.
+    """
+    if not root:
+        raise ValueError("Tail mode is disabled: AUDITS2I_TAIL_ROOT is not set.")
+    root = os.path.realpath(root)
+    real = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, real]) != root:
+        raise ValueError(f"{path} is outside the tail root {root}.")
+    return real
+
+def _head_digest(f, size):
+    f.seek(0)
+    data = f.read(min(size, HEAD_BYTES))
+    return len(data), hashlib.sha256(data).hexdigest()
+
+class LogTail:
+    """
+    Reads the lines appended to a CSV log file since a byte offset.
+
+    Only complete lines are parsed; a partly written last line is left for
+    the next poll. The offset moves forward on commit(), so lines of a
+    micro-batch that failed to send are read again. The file is read from
+    the start again when it was truncated or replaced (log rotation).
+    """
+
+    def __init__(self, path, source, offset=0, header=None, inode=None, head_bytes=0, head=None, from_end=False):
+        self.path = path
+        self.source = source
+        self.offset = offset
+        # The CSV header line, prepended to every block of appended lines
+        self.header = header
+        self.inode = inode
+        # Digest of the first head_bytes bytes (a new file may reuse the inode)
+        self.head_bytes = head_bytes
+        self.head = head
+        self.from_end = from_end
+        self._pending = None
+
+    def poll(self, max_bytes=DEFAULT_MAX_READ_BYTES):
+        """
+        Parses the complete lines appended since the offset.
+
+        Returns:
+            pd.DataFrame: Typed rows (see ingestion.load_source), or None when
+            no complete line was appended.
+        """
+        self._pending = None
+        stat = os.stat(self.path)
+        with open(self.path, "rb") as f:
+            if self.header is not None and (
+                stat.st_ino != self.inode or stat.st_size < self.offset
+                or (self.head is not None and _head_digest(f, self.head_bytes) != (self.head_bytes, self.head))
+            ):
+                # Rotated or truncated: the new file is read from just after its header,
+                # whatever from_end says (its lines were all written since)
+                self.offset, self.header, self.from_end = 0, None, False
+            if self.head_bytes < HEAD_BYTES:
+                self.head_bytes, self.head = _head_digest(f, stat.st_size)
+
+            offset = self.offset
+            if self.header is None:
+                f.seek(0)
+                header = f.readline()
+                if not header.endswith(b"\n"):
+                    return None
+                self.header, self.inode = header.decode("utf-8"), stat.st_ino
+                offset = _last_line_end(f, stat.st_size) if self.from_end else len(header)
+                self.offset = offset
+            f.seek(offset)
+            block = f.read(min(stat.st_size - offset, max_bytes))
+
+        end = block.rfind(b"\n") + 1
+        self._pending = offset + end
+        if not end:
+            return None
+        return load_source(io.BytesIO(self.header.encode("utf-8") + block[:end]), self.source)
+
+    def commit(self):
+        """
+        Moves the offset past the lines returned by the last poll.
+        """
+        if self._pending is not None:
+            self.offset, self._pending = self._pending, None
+
+    def state(self):
+        return {"offset": self.offset, "header": self.header, "inode": self.inode,
+                "head_bytes": self.head_bytes, "head": self.head}
+
+class TailAuditor:
+    """
+    Continuous audit of growing log files (tail mode).
+
+    Each cycle parses the lines appended to the files since the offsets
+    persisted by the previous cycle and sends them as one micro-batch through
+    send_to_n8n, so its cost grows with the new lines, not the file sizes.
+    Offsets, the running totals and the last findings are saved after each
+    successful micro-batch; totals and findings are kept per set of tailed
+    files (see run_key).
+    """
+
+    def __init__(self, paths, state_path=DEFAULT_TAIL_STATE_PATH, max_bytes=DEFAULT_MAX_READ_BYTES,
+                 max_findings=DEFAULT_MAX_FINDINGS, from_end=False, root=TAIL_ROOT):
+        """
+        Args:
+            paths (dict): Server-side CSV paths keyed by source ('infrastructure', 'mlops', 'api_logs').
+                They must lie under root (see resolve_tail_path).
+            state_path (str): JSON file of the offsets and results.
+            max_bytes (int): Bytes read per file and cycle.
+            max_findings (int): Findings kept for the dashboard.
+            from_end (bool): Files without a saved offset start at their end
+                (only lines appended from now on are audited).
+            root (str): Directory the tailed files are confined to.
+
+        Raises:
+            ValueError: When a path lies outside root.
+        """
+        self.state_path = state_path
+        self.max_bytes = max_bytes
+        self.max_findings = max_findings
+        self._lock = threading.Lock()
+
+        state = load_state(state_path)
+        self.tails = {}
+        for source, path in paths.items():
+            if path:
+                path = resolve_tail_path(path, root)
+                saved = state["files"].get(path, {})
+                # from_end only applies to files never tailed before
+                self.tails[source] = LogTail(path, source, from_end=from_end and not saved, **saved)
+        run = state["runs"].get(self.run_key(), {})
+        self.totals = run.get("totals", {"cycles": 0, "rows": 0, "findings": 0, "critical": 0, "max_score": 0})
+        self.findings = run.get("findings", [])
+
+    def run_key(self):
+        """
+        Identifies the set of tailed files: 'source=path' pairs, sorted.
+        """
+        return "|".join(sorted(f"{source}={tail.path}" for source, tail in self.tails.items()))
+
+    def cycle(self, webhook_url=None, **send_kwargs):
+        """
+        Audits the lines appended since the last cycle.
+
+        Args:
+            webhook_url (str, optional): Forwarded to send_to_n8n.
+            **send_kwargs: Forwarded to send_to_n8n (compress, max_batch_bytes, hedge).
+
+        Returns:
+            dict: 'rows' (new lines parsed), 'findings' (new findings),
+            'error' (message when the micro-batch failed; its lines are read
+            again next cycle) and 'seconds'.
+        """
+        start = time.perf_counter()
+        report = {"rows": 0, "findings": [], "error": None}
+        with self._lock:
+            frames = {}
+            for source, tail in self.tails.items():
+                try:
+                    df = tail.poll(self.max_bytes)
+                except OSError as e:
+                    report["error"] = f"{tail.path} : {e}"
+                    continue
+                if df is not None and len(df):
+                    frames[source] = df
+            if not frames:
+                report["seconds"] = time.perf_counter() - start
+                return report
+
+            report["rows"] = sum(len(df) for df in frames.values())
+            payload = build_payload({source: frames.get(source, pd.DataFrame()) for source in PILLARS})
+            result = send_to_n8n(payload, webhook_url, **send_kwargs)
+            if isinstance(result, dict) and "error" in result:
+                report["error"] = result["message"]
+            elif not isinstance(result, list):
+                report["error"] = "⚠ Unexpected response format from AI Agent."
+            else:
+                for tail in self.tails.values():
+                    tail.commit()
+                self._add(result, report["rows"])
+                report["findings"] = result
+                save_state(self, self.state_path)
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    def _add(self, findings, rows):
+        # Totals are updated from the new findings only
+        totals = self.totals
+        totals["cycles"] += 1
+        totals["rows"] += rows
+        totals["findings"] += len(findings)
+        totals["critical"] += sum(1 for f in findings if f.get("risk_score", 0) > 10)
+        totals["max_score"] = max([totals["max_score"]] + [f.get("risk_score", 0) for f in findings])
+        self.findings = (self.findings + findings)[-self.max_findings:]
+
+def load_state(path=DEFAULT_TAIL_STATE_PATH):
+    """
+    Loads the offsets, totals and findings of the previous cycles.
+
+    Returns:
+        dict: {'files': {path: {'offset', 'header', ...}}, 'runs': {run key:
+        {'totals': {...}, 'findings': [...]}}, 'updated': str or None}.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    return {"files": state.get("files", {}), "runs": state.get("runs", {}), "updated": state.get("updated")}
+
+def save_state(auditor, path=DEFAULT_TAIL_STATE_PATH):
+    """
+    Persists the offsets of an auditor's files, its totals and findings.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _state_lock:
+        # Offsets and results of other auditors are kept
+        state = load_state(path)
+        state["files"].update({tail.path: tail.state() for tail in auditor.tails.values()})
+        state["runs"][auditor.run_key()] = {"totals": auditor.totals, "findings": auditor.findings}
+        state["updated"] = datetime.datetime.now().isoformat(timespec="seconds")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
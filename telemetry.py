@@ -0,0 +1,252 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from cache import DEFAULT_CACHE_DIR
+
+DEFAULT_METRICS_DIR = os.path.join(DEFAULT_CACHE_DIR, "metrics")
+DEFAULT_MAX_SPANS = 1000
+METRIC_PREFIX = "audits2i_stage"
+
+def _memory_mb():
+    """
+    Returns (current RSS, peak RSS) of the process in MB, (None, None) when unavailable.
+    """
+    current = peak = None
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return current, peak
+
+class SpanRecorder:
+    """
+    Collects timing spans: the latest max_spans in full, plus cumulative
+    totals per stage (exported as Prometheus counters).
+    """
+
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS):
+        self._spans = deque(maxlen=max_spans)
+        self._totals = {}
+        self._lock = threading.Lock()
+        # Serializes the JSON-lines exports (cursor and file) of concurrent sessions
+        self._export_lock = threading.Lock()
+        self._sequence = 0
+        self._exported = 0
+
+    def record(self, span):
+        with self._lock:
+            self._sequence += 1
+            span["seq"] = self._sequence
+            self._spans.append(span)
+            totals = self._totals.setdefault(span["stage"], {
+                "count": 0, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0, "rows": 0, "max_rss_delta_mb": 0.0,
+            })
+            totals["count"] += 1
+            totals["seconds"] += span["seconds"]
+            for key in ("bytes_in", "bytes_out", "rows"):
+                totals[key] += span.get(key) or 0
+            totals["max_rss_delta_mb"] = max(totals["max_rss_delta_mb"], span.get("rss_delta_mb") or 0.0)
+
+    def spans(self, since=0, **tags):
+        """
+        Returns the retained spans whose sequence number is above since and
+        whose fields match tags (e.g. session=..., see TaggedRecorder).
+        """
+        with self._lock:
+            return [
+                dict(s) for s in self._spans
+                if s["seq"] > since and all(s.get(k) == v for k, v in tags.items())
+            ]
+
+    @property
+    def last_sequence(self):
+        return self._sequence
+
+    def totals(self):
+        with self._lock:
+            return {stage: dict(t) for stage, t in self._totals.items()}
+
+    def clear(self):
+        with self._lock:
+            self._spans.clear()
+            self._totals.clear()
+
+    # --- Exports ---
+    def to_prometheus(self):
+        """
+        Renders the cumulative totals in the Prometheus text exposition format.
+        """
+        metrics = [
+            ("duration_seconds_total", "counter", "Wall time spent in the stage.", "seconds", 1),
+            ("calls_total", "counter", "Number of spans recorded for the stage.", "count", 1),
+            ("bytes_in_total", "counter", "Bytes read by the stage.", "bytes_in", 1),
+            ("bytes_out_total", "counter", "Bytes produced by the stage.", "bytes_out", 1),
+            ("rows_total", "counter", "Rows or findings processed by the stage.", "rows", 1),
+            ("max_rss_delta_bytes", "gauge",
+             "Largest process RSS growth during one span of the stage (concurrent work included).",
+             "max_rss_delta_mb", 1024 * 1024),
+        ]
+        totals = self.totals()
+        lines = []
+        for suffix, kind, help_text, key, scale in metrics:
+            name = f"{METRIC_PREFIX}_{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage in sorted(totals):
+                value = totals[stage][key] * scale
+                lines.append(f'{name}{{stage="{stage}"}} {value:.6g}' if isinstance(value, float) else f'{name}{{stage="{stage}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """
+        Atomically writes the totals to path (node_exporter textfile collector format).
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_jsonl(self, path):
+        """
+        Appends the spans recorded since the previous call to a JSON-lines file.
+
+        Returns:
+            int: Number of spans written.
+        """
+        with self._export_lock:
+            spans = self.spans(since=self._exported)
+            if not spans:
+                return 0
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                for span in spans:
+                    f.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+            self._exported = spans[-1]["seq"]
+            return len(spans)
+
+class TaggedRecorder:
+    """
+    Records into a shared SpanRecorder, adding fixed fields to every span
+    (e.g. the Streamlit session), so one session can list its own spans
+    while the totals stay process-wide.
+    """
+
+    def __init__(self, recorder, **tags):
+        self.recorder = recorder
+        self.tags = tags
+
+    def record(self, span):
+        span.update(self.tags)
+        self.recorder.record(span)
+
+# --- Spans ---
+class _NoopSpan:
+    # Returned when telemetry is disabled: a shared object with no state
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+_NOOP = _NoopSpan()
+
+class Span:
+    """
+    Times a stage. Use set() inside the block to attach bytes_in, bytes_out,
+    rows or any other field.
+    """
+    __slots__ = ("recorder", "fields", "_start", "_rss")
+
+    def __init__(self, recorder, stage, fields):
+        self.recorder = recorder
+        self.fields = {"stage": stage, **fields}
+
+    def __enter__(self):
+        self.fields["started"] = time.time()
+        self._rss = _memory_mb()[0]
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.fields["seconds"] = time.perf_counter() - self._start
+        # Process-wide RSS: the delta also counts concurrent work of other threads
+        rss = _memory_mb()[0]
+        self.fields["rss_mb"] = rss
+        self.fields["rss_delta_mb"] = rss - self._rss if rss is not None and self._rss is not None else None
+        if exc_type is not None:
+            self.fields["error"] = exc_type.__name__
+        self.recorder.record(self.fields)
+        return False
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+# Scoped to the current context (thread or task), so a Streamlit session turning
+# timing off does not stop the recording of another one
+_recorder = contextvars.ContextVar("audits2i_span_recorder", default=None)
+
+def enable(recorder=None):
+    """
+    Starts recording the spans of the current context (thread) into recorder
+    (a new SpanRecorder by default). Work handed to other threads records
+    into it when wrapped with bind().
+
+    Returns:
+        SpanRecorder: The active recorder.
+    """
+    recorder = recorder or SpanRecorder()
+    _recorder.set(recorder)
+    return recorder
+
+def disable():
+    _recorder.set(None)
+
+def get_recorder():
+    return _recorder.get()
+
+def bind(fn):
+    """
+    Wraps fn so that, wherever it runs (e.g. a pool thread), its spans go to
+    the recorder active where bind() was called.
+    """
+    recorder = _recorder.get()
+
+    def bound(*args, **kwargs):
+        token = _recorder.set(recorder)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _recorder.reset(token)
+    return bound
+
+def span(stage, **fields):
+    """
+    Returns a context manager timing stage.
+
+    When telemetry is disabled this is a single context variable lookup
+    returning a shared no-op object, so instrumented code pays almost nothing.
+
+    Example:
+        with span("ingestion", bytes_in=size) as s:
+            frames = load_sources(...)
+            s.set(rows=sum(len(df) for df in frames.values()))
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NOOP
+    return Span(recorder, stage, fields)
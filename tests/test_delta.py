@@ -0,0 +1,44 @@
+import pandas as pd
+
+from delta import API_PILLAR, carry_over_findings, compute_delta, merge_findings, row_keys
+
+def api_logs(latency_10h):
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(["2026-01-01 09:05", "2026-01-01 09:40", "2026-01-01 10:15"]),
+        "endpoint": ["/login", "/login", "/orders"],
+        "status_code": [200, 500, 200],
+        "response_time": [120, 900, latency_10h],
+    })
+
+def agent(frames):
+    # Stand-in for the AI agent: one finding per API window it is sent
+    windows = sorted(set(row_keys(frames["api_logs"], "api_logs")))
+    return [{"pillar": API_PILLAR, "frap_text": f"Fenêtre {window} : latence"} for window in windows]
+
+def test_unchanged_api_window_finding_survives_an_incremental_run():
+    first = compute_delta({"api_logs": api_logs(80)}, {})
+    findings = agent(first["frames"])
+    assert len(findings) == 2
+
+    # Only the 10:00 window changes
+    second = compute_delta({"api_logs": api_logs(2500)}, first["fingerprints"])
+    assert second["counts"]["api_logs"] == {"added": 0, "changed": 1, "removed": 0}
+    assert API_PILLAR in second["touched_pillars"]
+    # The unchanged 09:00 window is sent again, labelled as such
+    assert sorted(second["frames"]["api_logs"]["change"]) == ["changed", "unchanged", "unchanged"]
+
+    carried = carry_over_findings(findings, second["touched"], second["touched_pillars"])
+    merged = merge_findings(carried, agent(second["frames"]))
+    assert "Fenêtre 2026-01-01T09:00:00 : latence" in [f["frap_text"] for f in merged]
+    assert len(merged) == 2
+
+def test_inventory_delta_sends_only_changed_items():
+    infra = pd.DataFrame({"hostname": ["server-01", "server-010"], "cpu_usage": [10, 20]})
+    first = compute_delta({"infrastructure": infra}, {})
+    changed = infra.assign(cpu_usage=[95, 20])
+    second = compute_delta({"infrastructure": changed}, first["fingerprints"])
+    assert list(second["frames"]["infrastructure"]["hostname"]) == ["server-01"]
+
+    findings = [{"pillar": "Infrastructure", "frap_text": name} for name in ("server-01 CPU", "server-010 CPU")]
+    carried = carry_over_findings(findings, second["touched"], second["touched_pillars"])
+    assert [f["frap_text"] for f in carried] == ["server-010 CPU"]
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+from n8n_connector import iter_json_items
+
+def parse(*chunks, ndjson=False):
+    return list(iter_json_items([c.encode("utf-8") for c in chunks], ndjson=ndjson))
+
+@pytest.mark.parametrize("chunks", [
+    ("[1.", "5]"),
+    ("[1", "2]"),
+    ("[2e", "3]"),
+    ("[2E+", "3]"),
+    ("[-", "1.25e-", "2]"),
+    ('[{"risk_score": 1.', '5}]'),
+])
+def test_number_split_across_chunks(chunks):
+    assert parse(*chunks) == json.loads("".join(chunks))
+
+def test_ndjson_number_split_across_chunks():
+    assert parse("1.", "5\n2", "\n", ndjson=True) == [1.5, 2]
+
+def test_items_split_at_every_byte():
+    text = '[{"a": [1, 2.5e3]}, "x", -0.5, true, null]'
+    assert parse(*text) == json.loads(text)
+
+@pytest.mark.parametrize("body", ["", "[1,,2]", "[,1]", "[1,]", "[1 2]", "[1]x"])
+def test_invalid_bodies(body):
+    with pytest.raises(json.JSONDecodeError):
+        parse(body)
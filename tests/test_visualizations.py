@@ -0,0 +1,18 @@
+from visualizations import AGGREGATE_THRESHOLD, WEBGL_THRESHOLD, create_risk_matrix
+
+def findings(count):
+    return [{"pillar": "Infrastructure", "frequency": i % 5 + 1, "gravity": i % 3 + 1, "risk_score": 4}
+            for i in range(count)]
+
+def test_large_unaggregated_matrix_uses_webgl():
+    fig = create_risk_matrix(findings(WEBGL_THRESHOLD + 1), aggregate=False)
+    assert fig.data[-1].type == "scattergl"
+    assert len(fig.data[-1].x) == WEBGL_THRESHOLD + 1
+
+def test_small_unaggregated_matrix_uses_svg():
+    assert create_risk_matrix(findings(10), aggregate=False).data[-1].type == "scatter"
+
+def test_many_findings_are_aggregated_per_cell():
+    fig = create_risk_matrix(findings(AGGREGATE_THRESHOLD + 1))
+    assert fig.data[-1].type == "scatter"
+    assert len(fig.data[-1].x) == 15
@@ -1,31 +1,29 @@
-import plotly.graph_objects as go
+import functools
+
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 
-def create_risk_matrix(risks_detected):
-    """
-    Creates a Risk Matrix Heatmap (Frequency vs. Gravity) with a Professional Cyber Style.
-    
-    Background: Tiled Heatmap (z = x*y).
-    Colors: Deep Teal (Low), Muted Amber (Major), Deep Red (Critical).
-    Markers: White with Red Border (Target effect).
+from telemetry import span
 
-    Args:
-        risks_detected (list): List of dicts with 'pillar', 'frequency', 'gravity'.
+# Above this many findings, markers are aggregated per (frequency, gravity) cell
+AGGREGATE_THRESHOLD = 25
+# Above this many individual markers, WebGL is used instead of SVG
+WEBGL_THRESHOLD = 1000
+MARKER_SIZE = 18
+MAX_BUBBLE_SIZE = 48
 
-    Returns:
-        plotly.graph_objects.Figure: The risk matrix figure.
+@functools.lru_cache(maxsize=1)
+def _base_figure():
+    """
+    Builds the static part of the matrix (heatmap board and layout), once per process.
+    Callers copy it before adding the findings.
     """
     # 1. Generate Heatmap Data (5x5 Grid)
     x_axis = [1, 2, 3, 4, 5]
     y_axis = [1, 2, 3, 4, 5]
     
-    z_data = []
-    
-    for y in y_axis:
-        row = []
-        for x in x_axis:
-            row.append(x * y) # z = Score
-        z_data.append(row)
+    z_data = np.outer(y_axis, x_axis) # z = Score
 
     fig = go.Figure()
 
@@ -60,33 +58,7 @@ def create_risk_matrix(risks_detected):
         hovertemplate='<b>Score : %{z}</b><extra></extra>'
     ))
 
-    # 3. Add Scatter Plot Layer (The Risks)
-    if risks_detected:
-        df = pd.DataFrame(risks_detected)
-        
-        # Ensure we have the right columns
-        if {'frequency', 'gravity', 'pillar'}.issubset(df.columns):
-            # Calculate score for tooltip if not present
-            if 'risk_score' not in df.columns:
-                df['risk_score'] = df['frequency'] * df['gravity']
-
-            fig.add_trace(go.Scatter(
-                x=df['frequency'],
-                y=df['gravity'],
-                mode='markers',
-                text=df['pillar'],
-                customdata=df['risk_score'],
-                marker=dict(
-                    size=18,
-                    color='rgba(255, 255, 255, 0.9)', # White, slight opacity
-                    line=dict(width=2, color='#FF0000'), # Red Border (Target)
-                    symbol='circle'
-                ),
-                hoverinfo='text',
-                hovertemplate='<b>Pilier :</b> %{text}<br><b>Score :</b> %{customdata}<extra></extra>'
-            ))
-
-    # 4. Professional Layout
+    # 3. Professional Layout
     fig.update_layout(
         title=dict(
             text="MATRICE DES RISQUES",
@@ -121,3 +93,109 @@ def create_risk_matrix(risks_detected):
     )
 
     return fig
+
+def _aggregate_cells(df):
+    """
+    Counts findings per (frequency, gravity) cell.
+
+    Returns:
+        pd.DataFrame: One row per occupied cell with 'frequency', 'gravity',
+        'count', 'max_score' and 'breakdown' (findings per pillar, for the hover).
+    """
+    cells = ['frequency', 'gravity']
+    grouped = df.groupby(cells, sort=True)
+    agg = grouped['risk_score'].agg(count='size', max_score='max')
+    pillars = pd.crosstab([df['frequency'], df['gravity']], df['pillar'].astype('string').fillna('Général'))
+    pillars = pillars.reindex(agg.index)
+
+    # At most 25 cells: the per-cell strings are cheap whatever the number of findings
+    names = pillars.columns.to_numpy()
+    counts = pillars.to_numpy()
+    agg['breakdown'] = [
+        '<br>'.join(f'{name} : {n}' for name, n in zip(names, row) if n)
+        for row in counts
+    ]
+    return agg.reset_index()
+
+def _cell_trace(cells):
+    # Bubble area grows with the count; the count is printed inside the bubble
+    sizes = MARKER_SIZE + (MAX_BUBBLE_SIZE - MARKER_SIZE) * np.sqrt(cells['count'] / cells['count'].max())
+    return go.Scatter(
+        x=cells['frequency'],
+        y=cells['gravity'],
+        mode='markers+text',
+        text=cells['count'],
+        textfont=dict(color='#0d1117', size=12, family="Courier New, monospace"),
+        customdata=np.stack([cells['max_score'], cells['breakdown']], axis=-1),
+        marker=dict(
+            size=sizes,
+            color='rgba(255, 255, 255, 0.9)',
+            line=dict(width=2, color='#FF0000'),
+            symbol='circle'
+        ),
+        hovertemplate='<b>Constats :</b> %{text}<br><b>Score max :</b> %{customdata[0]}<br>%{customdata[1]}<extra></extra>'
+    )
+
+def _marker_trace(df):
+    # SVG markers become slow in the browser past a few thousand points
+    scatter = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+    return scatter(
+        x=df['frequency'],
+        y=df['gravity'],
+        mode='markers',
+        text=df['pillar'],
+        customdata=df['risk_score'],
+        marker=dict(
+            size=MARKER_SIZE,
+            color='rgba(255, 255, 255, 0.9)', # White, slight opacity
+            line=dict(width=2, color='#FF0000'), # Red Border (Target)
+            symbol='circle'
+        ),
+        hoverinfo='text',
+        hovertemplate='<b>Pilier :</b> %{text}<br><b>Score :</b> %{customdata}<extra></extra>'
+    )
+
+def create_risk_matrix(risks_detected, aggregate=None):
+    """
+    Creates a Risk Matrix Heatmap (Frequency vs. Gravity) with a Professional Cyber Style.
+    
+    Background: Tiled Heatmap (z = x*y).
+    Colors: Deep Teal (Low), Muted Amber (Major), Deep Red (Critical).
+    Markers: White with Red Border (Target effect).
+
+    Args:
+        risks_detected (list): List of dicts with 'pillar', 'frequency', 'gravity'.
+        aggregate (bool, optional): Draw one bubble per cell (size and label =
+            number of findings, hover = per-pillar breakdown and max score)
+            instead of one marker per finding. None aggregates above
+            AGGREGATE_THRESHOLD findings, so the figure size stays flat.
+
+    Returns:
+        plotly.graph_objects.Figure: The risk matrix figure.
+    """
+    with span("matrix.build", rows=len(risks_detected or [])) as timing:
+        fig = go.Figure(_base_figure())
+
+        # Add Scatter Plot Layer (The Risks)
+        required = ('frequency', 'gravity', 'pillar')
+        # Ensure we have the right columns
+        if risks_detected and all(any(col in r for r in risks_detected) for col in required):
+            # Only the plotted fields are extracted (the FRAP texts are never copied)
+            df = pd.DataFrame({
+                col: [r.get(col) for r in risks_detected]
+                for col in required + ('risk_score',)
+            })
+            for col in ('frequency', 'gravity', 'risk_score'):
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+            # Calculate score for tooltip if not present
+            df['risk_score'] = df['risk_score'].fillna(df['frequency'] * df['gravity'])
+
+            if aggregate is None:
+                aggregate = len(df) > AGGREGATE_THRESHOLD
+            if aggregate:
+                fig.add_trace(_cell_trace(_aggregate_cells(df)))
+            else:
+                fig.add_trace(_marker_trace(df))
+        timing.set(aggregate=bool(aggregate), points=len(fig.data[-1].x) if len(fig.data) > 1 else 0)
+
+    return fig